@@ -13,11 +13,21 @@ You should have received a copy of the Modified BSD-3 License along with this
 program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
 """
 
+import easypyplot.areachart
 import easypyplot.barchart
+import easypyplot.cdf
 import easypyplot.color
+import easypyplot.distribution
+import easypyplot.font
 import easypyplot.format
+import easypyplot.heatmap
+import easypyplot.histogram
+import easypyplot.linechart
 import easypyplot.pdf
+import easypyplot.png
+import easypyplot.scatter
 import easypyplot.util
+import easypyplot.waterfall
 
 __version__ = '1.2.0'
 
@@ -0,0 +1,169 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import numpy as np
+
+from .color import COLOR_SET
+from . import font
+
+def draw(axes,
+         data, group_names=None, entry_names=None,
+         xticks=None,
+         colors=None, edgecolor='k', linewidth=0.5,
+         hatchs=None, hatchcolor='k',
+         legendloc='upper right', legendncol=1, log=False,
+         xticklabelfontsize=None, xticklabelrotation='horizontal',
+         xticklabelfontproperties=None):
+    """ A stacked area chart drawing wrapper, with the same data model as the
+    breakdown bar chart in barchart.draw().
+
+    Each entry is drawn as a single filled polygon across all groups.
+
+    axes: the axes instance to be drawn on.
+
+    data: 2-dimension, grouped into groups, each of which has entries. Groups
+        are along x axis, and entries are stacked from bottom to top.
+    group_names, entry_names: names of all groups/entries.
+
+    xticks: the positions of the groups on x axis. Default to be
+        range(num_groups).
+
+    colors: the colors in HEX format used for entries across all groups. Length
+        should be equal to the number of entries.
+    edgecolor: the color of the area edges.
+    linewidth: the width of the area edges.
+
+    hatchs: the hatch patterns for entries. Length should be equal to the
+        number of entries.
+    hatchcolor: the color of all hatches.
+
+    legendloc: the location of the legend.
+    legendncol: number of columns of the legend.
+
+    log: whether the y-axis should be in log scale.
+
+    xticklabelfontsize: the fontsize of the xtick labels.
+    xticklabelrotation: the rotation control of the xtick labels.
+    xticklabelfontproperties: the FontManager instance applied to the xtick
+        labels, including font name, size, etc.. The xticklabelfontsize has a
+        higher priority over xticklabelfontproperties.
+
+    return: handlers associated with entries.
+    """
+    # pylint: disable=too-many-branches,too-many-locals
+
+    ############################################################################
+    # data contains num_groups groups, each group has num_entries entries
+    try:
+        data = np.array(data, dtype=np.float64)
+    except ValueError:
+        raise ValueError('[areachart] data cannot be convert to an array. '
+                         'Dimension mismatch?\n{}'.format(data))
+    dim = data.shape
+    if len(dim) != 2:
+        raise ValueError('[areachart] data must be 2-dimension')
+    num_groups = dim[0]
+    num_entries = dim[1]
+
+    if group_names is not None and len(group_names) != num_groups:
+        raise ValueError('[areachart] group names must have {} elements'
+                         .format(num_groups))
+
+    if entry_names is not None and len(entry_names) != num_entries:
+        raise ValueError('[areachart] entry names must have {} elements'
+                         .format(num_entries))
+
+    ############################################################################
+    # Parse and adjust plot parameters
+    if xticks is None:
+        xticks = np.arange(num_groups)
+    elif len(xticks) != num_groups:
+        raise ValueError('[areachart] xticks size does not match data')
+    else:
+        xticks = np.array(xticks)
+
+    if colors is None:
+        if num_entries > len(COLOR_SET):
+            raise ValueError('[areachart] Not enough default colors')
+        colors = COLOR_SET[:num_entries]
+    if len(colors) < num_entries:
+        raise ValueError('[areachart] Not enough colors')
+
+    if edgecolor is None:
+        edgecolor = 'none'
+
+    if hatchs is not None:
+        if len(hatchs) != num_entries:
+            raise ValueError('[areachart] Given hatchs do not match the data')
+
+    ############################################################################
+    # Coordinates of areas
+
+    # All stacked tops in one pass, as arrays of shape (num_entries,
+    # num_groups), and each entry sits exactly on the top of the previous
+    # entries.
+    ytops = np.cumsum(data.T, axis=0)
+    ybottoms = np.zeros((num_entries, num_groups))
+    ybottoms[1:] = ytops[:-1]
+
+    ############################################################################
+    # Each time draw each entry for all groups
+    hdls = []
+    for eid in range(num_entries):
+        p = axes.fill_between(xticks, ybottoms[eid], ytops[eid],
+                              facecolor=colors[eid], edgecolor=edgecolor,
+                              linewidth=linewidth)
+        if hatchs is not None and hatchs[eid]:
+            # Hatch drawn in a separate unfilled polygon, as it uses the edge
+            # color.
+            axes.fill_between(xticks, ybottoms[eid], ytops[eid],
+                              facecolor='none', edgecolor=hatchcolor,
+                              hatch=hatchs[eid], linewidth=0)
+        hdls.append(p)
+
+    ############################################################################
+    # Axes options
+
+    # Remove xticks
+    axes.xaxis.set_ticks_position('none')
+
+    if group_names is not None:
+        try:
+            xticklabelfontproperties = font.font_properties(
+                xticklabelfontproperties)
+        except TypeError:
+            raise TypeError('[areachart] currently only support '
+                            'xticklabelfontproperties types of str, dict, '
+                            'and FontProperties.')
+
+        # xticklabelfontsize overwrites xticklabelfontproperties.
+        if xticklabelfontsize is not None:
+            xticklabelfontproperties.set_size(xticklabelfontsize)
+
+        axes.set_xticks(xticks)
+        axes.set_xticklabels(
+            group_names,
+            rotation=xticklabelrotation,
+            fontproperties=xticklabelfontproperties)
+
+    if entry_names is not None:
+        axes.legend(hdls, entry_names, loc=legendloc, ncol=legendncol)
+
+    if log:
+        axes.set_yscale('log')
+
+    axes.set_xlim([xticks[0], xticks[-1]])
+
+    return hdls
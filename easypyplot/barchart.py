@@ -15,8 +15,12 @@ program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
 
 import numpy as np
 import matplotlib
+import matplotlib.collections
+import matplotlib.transforms
 
 from .color import COLOR_SET
+from . import font
+from . import util
 
 def draw(axes,
          data, group_names=None, entry_names=None,
@@ -26,7 +30,9 @@ def draw(axes,
          hatchs=None, hatchcolor='k',
          legendloc='upper right', legendncol=1, log=False,
          xticklabelfontsize=None, xticklabelrotation='horizontal',
-         xticklabelfontproperties=None):
+         xticklabelfontproperties=None,
+         annotate=False, annotatefmt='{:g}', annotatefontsize=None,
+         annotateloc=None, clip=None, clipbroken=False):
     """ A super flexible bar chart drawing wrapper.
 
     axes: the axes instance to be drawn on.
@@ -66,9 +72,24 @@ def draw(axes,
         labels, including font name, size, etc.. The xticklabelfontsize has a
         higher priority over xticklabelfontproperties.
 
+    annotate: whether to label each bar with its value. Labels which do not fit
+        in the bar, or overlap with other labels, are skipped.
+    annotatefmt: the format string (e.g., '{:.1f}') or callable used to format
+        the values.
+    annotatefontsize: the fontsize of the value labels.
+    annotateloc: the location of the value labels, 'center' of or 'top' of each
+        bar. Default to be 'center' if breakdown, otherwise 'top'.
+
+    clip: the percentile in (0, 100] of the bar tops (stack tops if breakdown),
+        above which the outlier bars are clipped, marked with a break marker,
+        and labeled with their true values using annotatefmt.
+    clipbroken: if True, instead of clipping, split the axes into a broken
+        layout, with a new upper axes showing the range of the outlier bars.
+        The legend is then put in the upper axes.
+
     return: handlers associated with entries.
     """
-    # pylint: disable=too-many-branches
+    # pylint: disable=too-many-branches,too-many-locals,too-many-statements
 
     ############################################################################
     # data contains num_groups groups, each group has num_entries entries
@@ -129,48 +150,84 @@ def draw(axes,
     else:
         hatchs = [None for eid in range(num_entries)]
 
+    if clip is not None and not 0 < clip <= 100:
+        raise ValueError('[barchart] clip must be a percentile in (0, 100]')
+
+    if annotateloc is None:
+        annotateloc = 'center' if breakdown else 'top'
+    if annotateloc not in ('center', 'top'):
+        raise ValueError('[barchart] annotateloc must be \'center\' or '
+                         '\'top\'')
 
     ############################################################################
     # Coordinates of bars
 
-    # ybottoms is the bottom y coordinates of each bar
-    ybottoms = np.zeros(num_groups)
-    # xlefts are the left x coordinates of each bar
+    # All coordinates are arrays of shape (num_entries, num_groups).
+    bar_heights = data.T
+    bar_width = width * cluster_bar_shrink
     if breakdown:
-        xlefts = xticks - width/2.0
+        # Stacked bars share the same x positions, and each bar sits on the
+        # top of the previous entries.
+        bar_xlefts = np.tile(xticks - width/2.0, (num_entries, 1))
+        bar_ybottoms = np.zeros((num_entries, num_groups))
+        bar_ybottoms[1:] = np.cumsum(bar_heights[:-1], axis=0)
     else:
         xlefts = xticks - width * num_entries / 2.0 \
                 + (1 - cluster_bar_shrink) * width / 2.0
+        bar_xlefts = xlefts + width * np.arange(num_entries)[:, np.newaxis]
+        bar_ybottoms = np.zeros((num_entries, num_groups))
+    bar_ytops = bar_ybottoms + bar_heights
+
+    # Clip outlier bars at the percentile of bar tops (stack tops if
+    # breakdown).
+    clipped = np.zeros((num_entries, num_groups), dtype=bool)
+    if clip is not None:
+        if breakdown:
+            outer_ytops = bar_ytops.max(axis=0)
+            outer_xlefts = bar_xlefts[0]
+        else:
+            outer_ytops = bar_ytops.ravel()
+            outer_xlefts = bar_xlefts.ravel()
+        # Use the lower percentile, i.e., an actual bar top, through a partial
+        # sort, so the clipped top does not fall between normal bars and
+        # outliers.
+        kth = max(int(np.ceil(clip / 100. * outer_ytops.size)) - 1, 0)
+        cliptop = np.partition(outer_ytops, kth)[kth]
+        # Only clip the bars rising above a positive clipped top. Bars below
+        # zero are never clipped, and keep their bottoms.
+        if cliptop > 0:
+            outliers = outer_ytops > cliptop
+        else:
+            outliers = np.zeros(outer_ytops.shape, dtype=bool)
+        if not clipbroken and np.any(outliers):
+            clipped_ytops = np.minimum(bar_ytops, cliptop)
+            bar_ybottoms = np.minimum(bar_ybottoms, cliptop)
+            clipped = clipped_ytops < bar_ytops
+            bar_heights = clipped_ytops - bar_ybottoms
 
     ############################################################################
     # Each time draw each entry for all groups
-    hdls = []
-    for eid in range(num_entries):
-        d = data[:, eid]
-
-        c = colors[eid]
-
-        p = axes.bar(xlefts, d, width * cluster_bar_shrink,
-                     bottom=ybottoms, align='edge',
-                     color=c, log=log,
-                     edgecolor=edgecolor, linewidth=linewidth)
-
-        if hatchs is not None:
-            for (x, y, d1) in zip(xlefts, ybottoms, d):
-                polygon = [[x, y], [x, y+d1],
-                           [x+width*cluster_bar_shrink, y+d1],
-                           [x+width*cluster_bar_shrink, y]]
-                axes.add_patch(matplotlib.patches.Polygon( \
-                               polygon,
-                               hatch=hatchs[eid], color=hatchcolor,
-                               linewidth=0, fill=False))
-
-        if breakdown:
-            ybottoms += d
+    hdls = _draw_bars(axes, bar_xlefts, bar_ybottoms, bar_heights, bar_width,
+                      colors=colors, edgecolor=edgecolor, linewidth=linewidth,
+                      hatchs=hatchs, hatchcolor=hatchcolor, log=log)
+
+    legend_axes = axes
+    upper_axes = None
+    clip_texts = []
+    if clip is not None and np.any(outliers):
+        if clipbroken:
+            upper_axes = _split_broken_axes(axes, cliptop,
+                                            outer_ytops[outliers])
+            _draw_bars(upper_axes, bar_xlefts, bar_ybottoms, bar_heights,
+                       bar_width, colors=colors, edgecolor=edgecolor,
+                       linewidth=linewidth, hatchs=hatchs,
+                       hatchcolor=hatchcolor, log=log)
+            legend_axes = upper_axes
         else:
-            xlefts += width
-
-        hdls.append(p)
+            clip_texts = _mark_clipped(axes, outer_xlefts[outliers],
+                                       outer_ytops[outliers], cliptop,
+                                       bar_width, fmt=annotatefmt,
+                                       fontsize=annotatefontsize)
 
     ############################################################################
     # Axes options
@@ -179,21 +236,13 @@ def draw(axes,
     axes.xaxis.set_ticks_position('none')
 
     if group_names is not None:
-        if xticklabelfontproperties is None:
-            xticklabelfontproperties = matplotlib.font_manager.FontProperties()
-        elif isinstance(xticklabelfontproperties, str):
-            xticklabelfontproperties = matplotlib.font_manager.FontProperties(
+        try:
+            xticklabelfontproperties = font.font_properties(
                 xticklabelfontproperties)
-        elif isinstance(xticklabelfontproperties, matplotlib.font_manager.FontProperties):
-            pass
-        else:
-            try:
-                xticklabelfontproperties = matplotlib.font_manager.FontProperties(
-                    **xticklabelfontproperties)
-            except TypeError:
-                raise TypeError('[barchart] currently only support '
-                                'xticklabelfontproperties types of str, dict, '
-                                'and FontProperties.')
+        except TypeError:
+            raise TypeError('[barchart] currently only support '
+                            'xticklabelfontproperties types of str, dict, '
+                            'and FontProperties.')
 
         # xticklabelfontsize overwrites xticklabelfontproperties.
         if xticklabelfontsize is not None:
@@ -206,9 +255,260 @@ def draw(axes,
             fontproperties=xticklabelfontproperties)
 
     if entry_names is not None:
-        axes.legend(hdls, entry_names, loc=legendloc, ncol=legendncol)
+        legend_axes.legend(hdls, entry_names, loc=legendloc, ncol=legendncol)
 
     axes.set_xlim([xticks[0]-1, xticks[-1]+1])
 
+    if annotate:
+        # The values of clipped bars are already marked.
+        labeled = [(axes, ~clipped)]
+        if upper_axes is not None:
+            # Label each bar on the axes showing its label position, and skip
+            # the labels falling into the break between the two axes.
+            label_ys = bar_ybottoms + bar_heights \
+                    * (0.5 if annotateloc == 'center' else 1.)
+            labeled = [(axes, label_ys <= axes.get_ylim()[1]),
+                       (upper_axes, label_ys >= upper_axes.get_ylim()[0])]
+        for label_axes, selected in labeled:
+            _annotate_values(label_axes, bar_xlefts[selected],
+                             bar_ybottoms[selected], bar_heights[selected],
+                             bar_width, loc=annotateloc, fmt=annotatefmt,
+                             fontsize=annotatefontsize, avoid=clip_texts)
+
     return hdls
 
+
+def _draw_bars(axes, xlefts, ybottoms, heights, width, colors, edgecolor,
+               linewidth, hatchs, hatchcolor, log):
+    """ Draw the bars of all entries given their geometry.
+
+    xlefts, ybottoms, heights: arrays of shape (num_entries, num_groups).
+    width: the width of each bar, or an array of the bar widths of each group.
+
+    return: handlers associated with entries.
+    """
+    hdls = []
+    for eid, (xs, ys, ds) in enumerate(zip(xlefts, ybottoms, heights)):
+
+        p = axes.bar(xs, ds, width,
+                     bottom=ys, align='edge',
+                     color=colors[eid], log=log,
+                     edgecolor=edgecolor, linewidth=linewidth)
+
+        if hatchs is not None:
+            widths = np.ones_like(xs, dtype=float) * width
+            for (x, y, d1, w) in zip(xs, ys, ds, widths):
+                polygon = [[x, y], [x, y+d1],
+                           [x+w, y+d1],
+                           [x+w, y]]
+                axes.add_patch(matplotlib.patches.Polygon( \
+                               polygon,
+                               hatch=hatchs[eid], color=hatchcolor,
+                               linewidth=0, fill=False))
+
+        hdls.append(p)
+
+    return hdls
+
+
+def _mark_clipped(axes, xlefts, values, cliptop, width, fmt='{:g}',
+                  fontsize=None):
+    """ Mark the clipped bars with break markers and their true values.
+
+    All break markers are drawn as a single collection.
+
+    axes: the axes instance the bars are drawn on.
+    xlefts: the left x coordinates of the clipped bars.
+    values: the true top values of the clipped bars.
+    cliptop: the y coordinate where the bars are clipped.
+    width: the width of each bar.
+    fmt: the format string or callable for the values.
+    fontsize: the fontsize of the value labels.
+
+    return: the text instances of the value labels.
+    """
+    # A slanted white band across each bar just below the clipped top. The
+    # band spans the bar in data units along x, but is sized in points below
+    # the clipped top along y, so it does not depend on the value or the scale
+    # of the y axis.
+    ycenter = -6.
+    half = 1.5
+    slant = 2.
+    margin = width * 0.1
+    x0s = xlefts - margin
+    x1s = xlefts + width + margin
+    ones = np.ones_like(x0s)
+    # Vertices of shape (num_bars, 4, 2).
+    verts = np.dstack([
+        np.column_stack([x0s, x1s, x1s, x0s]),
+        np.column_stack([(ycenter - half - slant) * ones,
+                         (ycenter - half + slant) * ones,
+                         (ycenter + half + slant) * ones,
+                         (ycenter + half - slant) * ones]),
+    ])
+    ytrans = matplotlib.transforms.Affine2D().scale(1. / 72) \
+            + axes.figure.dpi_scale_trans \
+            + matplotlib.transforms.ScaledTranslation(0, cliptop,
+                                                      axes.transData)
+    band = matplotlib.collections.PolyCollection(
+        verts, facecolors='w', edgecolors='k', linewidths=0.5, zorder=2.5)
+    band.set_transform(matplotlib.transforms.blended_transform_factory(
+        axes.transData, ytrans))
+    axes.add_collection(band, autolim=False)
+
+    formatter = _CachedFormatter(fmt)
+    fontproperties = font.font_properties({'size': fontsize})
+    texts = []
+    for x, v in zip(xlefts + width / 2., values):
+        texts.append(axes.text(x, cliptop, formatter(v), ha='center',
+                               va='bottom', fontproperties=fontproperties))
+    return texts
+
+
+def _split_broken_axes(axes, cliptop, outlier_ytops, ratio=0.3, gap=0.03):
+    """ Split the axes into a broken layout of two axes sharing the x axis.
+
+    The original axes shows the range up to the clipped top, and a new upper
+    axes shows the range of the outliers.
+
+    axes: the axes instance to be split.
+    cliptop: the y coordinate where the bars are clipped.
+    outlier_ytops: the top y coordinates of the outlier bars.
+    ratio: the height ratio of the upper axes.
+    gap: the height ratio of the gap between the two axes.
+
+    return: the upper axes.
+    """
+    box = axes.get_position()
+    upper_height = box.height * ratio
+    lower_height = box.height * (1 - ratio - gap)
+    axes.set_position([box.x0, box.y0, box.width, lower_height])
+    upper_axes = axes.figure.add_axes(
+        [box.x0, box.y1 - upper_height, box.width, upper_height],
+        sharex=axes)
+
+    axes.autoscale_view()
+    axes.set_ylim([axes.get_ylim()[0], cliptop * 1.05])
+    upper_axes.set_ylim([max(cliptop, outlier_ytops.min() * 0.9),
+                         outlier_ytops.max() * 1.05])
+
+    axes.spines['top'].set_visible(False)
+    upper_axes.spines['bottom'].set_visible(False)
+    upper_axes.xaxis.set_visible(False)
+
+    # Slanted break marks on both sides of the broken spines.
+    kwargs = dict(marker=[(-1, -0.5), (1, 0.5)], markersize=8,
+                  linestyle='none', color='k', mec='k', mew=1, clip_on=False)
+    axes.plot([0, 1], [1, 1], transform=axes.transAxes, **kwargs)
+    upper_axes.plot([0, 1], [0, 0], transform=upper_axes.transAxes, **kwargs)
+
+    return upper_axes
+
+
+class _CachedFormatter(object):
+    """ Format values with a format string or callable, and cache results. """
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, fmt):
+        self.func = fmt if callable(fmt) else fmt.format
+        self.cache = {}
+
+    def __call__(self, value):
+        try:
+            return self.cache[value]
+        except KeyError:
+            s = self.func(value)
+            self.cache[value] = s
+            return s
+
+
+def _annotate_values(axes, xlefts, ybottoms, heights, width,
+                     loc='center', fmt='{:g}', fontsize=None, avoid=None):
+    """ Label the values of all bars in one pass.
+
+    All geometry is transformed to display space at once, and the label extents
+    are measured in bulk. Labels that do not fit in the bar width (and height,
+    if at the center), or overlap with already placed labels, are skipped.
+
+    axes: the axes instance the bars are drawn on.
+    xlefts, ybottoms, heights: arrays of the bar geometry, of the same shape.
+    width: the width of each bar.
+    loc: 'center' or 'top'.
+    fmt: the format string or callable for the values.
+    fontsize: the fontsize of the labels.
+    avoid: the already placed text instances that labels must not overlap.
+
+    return: the text instances of the placed labels.
+    """
+    # pylint: disable=too-many-locals
+    xlefts = np.ravel(xlefts)
+    ybottoms = np.ravel(ybottoms)
+    heights = np.ravel(heights)
+    ytops = ybottoms + heights
+
+    # Settle the axis limits before transforming.
+    axes.autoscale_view()
+    trans = axes.transData
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pbl = trans.transform(np.column_stack([xlefts, ybottoms]))
+        ptr = trans.transform(np.column_stack([xlefts + width, ytops]))
+    bar_widths = ptr[:, 0] - pbl[:, 0]
+    bar_heights = np.abs(ptr[:, 1] - pbl[:, 1])
+
+    formatter = _CachedFormatter(fmt)
+    labels = [formatter(v) for v in heights]
+    fontproperties = font.font_properties({'size': fontsize})
+    renderer = util.get_renderer(axes.figure)
+    text_widths, text_heights, _ = util.text_extents(
+        renderer, labels, fontproperties)
+
+    # Anchors and boxes of labels in display space.
+    xanchors = (pbl[:, 0] + ptr[:, 0]) / 2.
+    if loc == 'center':
+        yanchors = (pbl[:, 1] + ptr[:, 1]) / 2.
+        box_y0s = yanchors - text_heights / 2.
+        fits = (text_widths <= bar_widths) & (text_heights <= bar_heights)
+        valigns = np.array(['center'] * len(labels))
+    else:
+        # Above positive bars, and below negative bars.
+        upwards = ptr[:, 1] >= pbl[:, 1]
+        yanchors = ptr[:, 1]
+        box_y0s = np.where(upwards, yanchors, yanchors - text_heights)
+        fits = text_widths <= bar_widths
+        valigns = np.where(upwards, 'bottom', 'top')
+    box_x0s = xanchors - text_widths / 2.
+    box_x1s = xanchors + text_widths / 2.
+    box_y1s = box_y0s + text_heights
+    fits &= np.isfinite(xanchors) & np.isfinite(yanchors)
+
+    # Check against the texts to avoid all at once.
+    if avoid:
+        obstacles = np.array([t.get_window_extent(renderer).extents
+                              for t in avoid])
+        overlaps = (box_x0s[:, np.newaxis] < obstacles[:, 2]) \
+                & (obstacles[:, 0] < box_x1s[:, np.newaxis]) \
+                & (box_y0s[:, np.newaxis] < obstacles[:, 3]) \
+                & (obstacles[:, 1] < box_y1s[:, np.newaxis])
+        fits &= ~overlaps.any(axis=1)
+
+    # Sweep from left to right, only checking the boxes that still overlap
+    # along x with the current one.
+    keeps = []
+    active = []
+    for idx in np.flatnonzero(fits)[np.argsort(box_x0s[fits], kind='mergesort')]:
+        active = [jdx for jdx in active if box_x1s[jdx] > box_x0s[idx]]
+        if any(box_y0s[idx] < box_y1s[jdx] and box_y0s[jdx] < box_y1s[idx]
+               for jdx in active):
+            continue
+        keeps.append(idx)
+        active.append(idx)
+    keeps.sort()
+
+    anchors = trans.inverted().transform(
+        np.column_stack([xanchors[keeps], yanchors[keeps]]))
+    texts = []
+    for idx, (x, y) in zip(keeps, anchors):
+        texts.append(axes.text(x, y, labels[idx], ha='center', va=valigns[idx],
+                               fontproperties=fontproperties))
+    return texts
+
@@ -0,0 +1,150 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import numpy as np
+import matplotlib.ticker
+
+from .color import COLOR_SET
+from .distribution import sketch_groups
+
+def default_quantiles(maxnines=5, num=250):
+    """ Get the quantiles to evaluate a CDF curve, linearly spaced up to the
+    median, and log-spaced in the tail up to the given number of nines, e.g.,
+    0.99999 for 5 nines.
+
+    maxnines: the number of nines of the largest quantile.
+    num: the total number of quantiles.
+    """
+    num_body = num // 5
+    body = np.linspace(0, 0.5, num_body, endpoint=False)
+    tail = 1 - np.logspace(np.log10(0.5), -maxnines, num - num_body)
+    return np.concatenate([body, tail])
+
+
+def draw(axes,
+         data, entry_names=None,
+         colors=None, linewidth=None, linestyles=None,
+         quantiles=None, nines=False, logx=False,
+         legendloc='lower right', legendncol=1,
+         compression=200):
+    """ A CDF curve drawing wrapper for huge sample sets.
+
+    Each curve is evaluated at a fixed set of quantiles from a quantile sketch
+    (or a histogram), so the number of vertices is bounded regardless of the
+    number of samples, and no sort is needed.
+
+    axes: the axes instance to be drawn on.
+
+    data: a list of series. Each series could be an object with a quantile()
+        method (e.g., distribution.QuantileSketch), or samples accepted by
+        distribution.sketch_groups(), i.e., an array, a np.memmap, or an
+        iterable of values or of arrays.
+    entry_names: names of all series.
+
+    colors: the colors in HEX format used for series. Length should be equal
+        to the number of series.
+    linewidth: the width of the lines.
+    linestyles: the line styles for series. Length should be equal to the
+        number of series.
+
+    quantiles: the quantiles in [0, 1] ([0, 1) if nines) to evaluate the
+        curves. Default to be default_quantiles().
+    nines: if True, use the number of nines (i.e., -log10(1 - q)) as y axis, to
+        expand the tail, with ticks labeled as percentiles. Otherwise y axis is
+        the cumulative fraction.
+    logx: whether the x-axis should be in log scale.
+
+    legendloc: the location of the legend.
+    legendncol: number of columns of the legend.
+
+    compression: the compression of the sketches built from samples. See
+        distribution.QuantileSketch.
+
+    return: handlers associated with series.
+    """
+    # pylint: disable=too-many-branches
+
+    num_series = len(data)
+
+    if entry_names is not None and len(entry_names) != num_series:
+        raise ValueError('[cdf] entry names must have {} elements'
+                         .format(num_series))
+
+    ############################################################################
+    # Parse and adjust plot parameters
+    if colors is None:
+        if num_series > len(COLOR_SET):
+            raise ValueError('[cdf] Not enough default colors')
+        colors = COLOR_SET[:num_series]
+    if len(colors) < num_series:
+        raise ValueError('[cdf] Not enough colors')
+
+    if linestyles is not None:
+        if len(linestyles) != num_series:
+            raise ValueError('[cdf] Given linestyles do not match the data')
+    else:
+        linestyles = ['-' for sid in range(num_series)]
+
+    if quantiles is None:
+        quantiles = default_quantiles()
+    quantiles = np.asarray(quantiles, dtype=np.float64)
+    upper = quantiles >= 1 if nines else quantiles > 1
+    if np.any(quantiles < 0) or np.any(upper):
+        raise ValueError('[cdf] quantiles must be in [0, 1], '
+                         'or [0, 1) with nines')
+
+    # Build sketches only for the raw samples.
+    raw = [sid for sid, series in enumerate(data)
+           if not hasattr(series, 'quantile')]
+    summaries = list(data)
+    for sid, sketch in zip(raw, sketch_groups([data[sid] for sid in raw],
+                                              compression=compression)):
+        summaries[sid] = sketch
+
+    yvals = -np.log10(1 - quantiles) if nines else quantiles
+
+    ############################################################################
+    # Each time draw one series
+    hdls = []
+    for sid, summary in enumerate(summaries):
+        kwargs = {}
+        if linewidth is not None:
+            kwargs['linewidth'] = linewidth
+        hdl, = axes.plot(summary.quantile(quantiles), yvals,
+                         color=colors[sid], linestyle=linestyles[sid],
+                         **kwargs)
+        hdls.append(hdl)
+
+    ############################################################################
+    # Axes options
+
+    if logx:
+        axes.set_xscale('log')
+
+    if nines:
+        # Tolerate the rounding error of log10.
+        maxnines = int(np.ceil(yvals.max() - 1e-6))
+        ticks = np.arange(0, maxnines + 1)
+        labels = ['{:g}%'.format(100 - 100 * 10. ** -t) for t in ticks]
+        axes.yaxis.set_major_locator(matplotlib.ticker.FixedLocator(ticks))
+        axes.yaxis.set_major_formatter(matplotlib.ticker.FixedFormatter(labels))
+        axes.set_ylim([0, maxnines])
+    else:
+        axes.set_ylim([0, 1])
+
+    if entry_names is not None:
+        axes.legend(hdls, entry_names, loc=legendloc, ncol=legendncol)
+
+    return hdls
@@ -16,7 +16,7 @@ program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
 import numpy as np
 import matplotlib.colors
 
-from .util import __mpl_version__
+from .util import mpl_supports
 
 # Colors from http://www.colorbrewer2.org/, 8-class, qualitative, Accent
 COLOR_SET = ['#386cb0', '#7fc97f', '#f0027f', '#beaed4', \
@@ -31,10 +31,9 @@ def color_scale(ref, num, low=0.2, high=0.9):
     high: high brightness.
     """
     # Saturate the color.
-    try:
+    if mpl_supports('colors.to_rgb'):
         rgb = matplotlib.colors.to_rgb(ref)
-    except AttributeError:
-        assert __mpl_version__ < (2, 0)  # Changed from 2.0
+    else:
         rgb = matplotlib.colors.ColorConverter().to_rgb(ref)
     if max(rgb) < 1e-4:
         # All 0, black.
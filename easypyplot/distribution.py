@@ -0,0 +1,322 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import numpy as np
+
+from .color import COLOR_SET
+
+# Maximum number of samples loaded into memory at once, so that memory-mapped
+# arrays and iterators are consumed block by block.
+SAMPLE_CHUNK_SIZE = 1 << 20
+
+class QuantileSketch(object):
+    """ A mergeable quantile sketch with bounded memory, as a merging t-digest.
+
+    Samples are summarized into weighted centroids, which are small near the
+    tails and large around the median, so that extreme quantiles stay
+    accurate. Sketches can be pickled, and sketches built by parallel workers
+    can be merged.
+
+    compression: the accuracy parameter, which bounds the number of centroids
+        to about compression / 2.
+    buffer_size: the number of samples buffered before being merged into the
+        centroids. Default to be 500 times compression.
+    """
+
+    def __init__(self, compression=200, buffer_size=None):
+        if compression <= 0:
+            raise ValueError('[distribution] compression must be positive')
+        self.compression = compression
+        self.buffer_size = buffer_size if buffer_size is not None \
+                else 500 * compression
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._means = np.zeros(0)
+        self._weights = np.zeros(0)
+        self._buffer = []
+        self._buffered = 0
+
+    def update(self, samples):
+        """ Add samples to the sketch. NaN samples are ignored.
+
+        samples: a single value, or an array of values. Could be a np.memmap,
+            which is only read block by block.
+
+        return: the sketch itself.
+        """
+        if np.ndim(samples) == 0:
+            samples = [samples]
+        for start in range(0, len(samples), SAMPLE_CHUNK_SIZE):
+            block = np.asarray(samples[start:start + SAMPLE_CHUNK_SIZE],
+                               dtype=np.float64).ravel()
+            block = block[~np.isnan(block)]
+            if block.size == 0:
+                continue
+            self.count += block.size
+            self.min = min(self.min, block.min())
+            self.max = max(self.max, block.max())
+            self._buffer.append(block)
+            self._buffered += block.size
+            if self._buffered >= self.buffer_size:
+                self._flush()
+        return self
+
+    def merge(self, other):
+        """ Merge another sketch into this sketch.
+
+        other: the other QuantileSketch instance.
+
+        return: the sketch itself.
+        """
+        other._flush()  # pylint: disable=protected-access
+        if other.count == 0:
+            return self
+        self._flush()
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(np.concatenate([self._means, other._means]),  # pylint: disable=protected-access
+                       np.concatenate([self._weights, other._weights]))  # pylint: disable=protected-access
+        return self
+
+    def quantile(self, q):
+        """ Estimate the quantiles.
+
+        q: a quantile in [0, 1], or an array of quantiles.
+
+        return: the estimated value(s), NaN if the sketch is empty.
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if self.count == 0:
+            return (np.zeros(q.shape) + np.nan)[()]
+        positions, values = self._knots()
+        return np.interp(q * self.count, positions, values)[()]
+
+    def mean(self):
+        """ The exact mean of the samples, NaN if the sketch is empty. """
+        self._flush()
+        if self.count == 0:
+            return np.nan
+        return np.dot(self._means, self._weights) / self.count
+
+    def cdf(self, x):
+        """ Estimate the fraction of samples no larger than the values.
+
+        x: a value, or an array of values.
+
+        return: the estimated fraction(s), NaN if the sketch is empty.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        if self.count == 0:
+            return (np.zeros(x.shape) + np.nan)[()]
+        positions, values = self._knots()
+        return (np.interp(x, values, positions, left=0, right=self.count)
+                / self.count)[()]
+
+    def _knots(self):
+        """ The piecewise-linear quantile function, as cumulative counts and
+        values, from the min to the max through the centroid centers.
+        """
+        self._flush()
+        centers = np.cumsum(self._weights) - self._weights / 2.
+        positions = np.concatenate([[0], centers, [self.count]])
+        values = np.concatenate([[self.min], self._means, [self.max]])
+        return positions, values
+
+    def _flush(self):
+        """ Merge the buffered samples into the centroids. """
+        if not self._buffer:
+            return
+        samples = np.concatenate(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        self._compress(np.concatenate([self._means, samples]),
+                       np.concatenate([self._weights, np.ones(samples.size)]))
+
+    def _compress(self, means, weights):
+        """ Merge the centroids into clusters of the same integer k value in
+        order, where the scale function k is steep near the tails.
+        """
+        order = np.argsort(means, kind='mergesort')
+        means = means[order]
+        weights = weights[order]
+        total = weights.sum()
+        mids = (np.cumsum(weights) - weights / 2.) / total
+        # The log-odds scale function, normalized by the total count, which
+        # keeps the number of clusters bounded.
+        norm = 4 * np.log(max(total, self.compression) / self.compression) + 24
+        with np.errstate(divide='ignore'):
+            ks = np.floor(self.compression / norm * np.log(mids / (1 - mids)))
+        starts = np.flatnonzero(np.concatenate([[True], ks[1:] != ks[:-1]]))
+        self._weights = np.add.reduceat(weights, starts)
+        self._means = np.add.reduceat(means * weights, starts) / self._weights
+
+    def __getstate__(self):
+        self._flush()
+        return self.__dict__.copy()
+
+
+def sketch_groups(data, compression=200):
+    """ Build a quantile sketch for each group of samples, in a single pass.
+
+    data: a list of groups. Each group could be an existing QuantileSketch, an
+        array (including np.memmap), or an iterable of values or of arrays.
+    compression: see QuantileSketch.
+
+    return: a list of QuantileSketch instances.
+    """
+    sketches = []
+    for group in data:
+        if isinstance(group, QuantileSketch):
+            sketches.append(group)
+            continue
+        sketch = QuantileSketch(compression=compression)
+        if isinstance(group, np.ndarray):
+            sketch.update(group)
+        else:
+            values = []
+            for item in group:
+                if np.ndim(item) == 0:
+                    values.append(item)
+                    if len(values) >= SAMPLE_CHUNK_SIZE:
+                        sketch.update(values)
+                        values = []
+                else:
+                    sketch.update(item)
+            if values:
+                sketch.update(values)
+        sketches.append(sketch)
+    return sketches
+
+
+def draw(axes,
+         data, group_names=None,
+         kind='box', xticks=None, width=0.5,
+         colors=None, edgecolor='k', linewidth=0.5,
+         whiskers=(5, 95), showmeans=False, points=100,
+         compression=200):
+    """ A distribution plot drawing wrapper, with box or violin glyphs drawn
+    from quantile sketches of the groups.
+
+    axes: the axes instance to be drawn on.
+
+    data: a list of groups of samples, see sketch_groups().
+    group_names: names of all groups.
+
+    kind: 'box' or 'violin'.
+    xticks: the positions of the glyph centers on x axis. Default to be
+        range(num_groups).
+    width: the width of each glyph.
+
+    colors: the colors in HEX format used for groups. Default to be the same
+        color for all groups.
+    edgecolor: the color of the glyph edges.
+    linewidth: the width of the glyph edges.
+
+    whiskers: the percentiles of the box whiskers. Outliers are not drawn,
+        since the sketch does not keep individual samples.
+    showmeans: whether to mark the means. Only valid for box glyphs.
+    points: number of points to evaluate the violin density.
+
+    compression: see QuantileSketch.
+
+    return: a dict of the artists, as returned by axes.bxp() or
+        axes.violin(), and the sketches under 'sketches'.
+    """
+    # pylint: disable=too-many-locals
+
+    sketches = sketch_groups(data, compression=compression)
+    num_groups = len(sketches)
+
+    if group_names is not None and len(group_names) != num_groups:
+        raise ValueError('[distribution] group names must have {} elements'
+                         .format(num_groups))
+
+    if kind not in ('box', 'violin'):
+        raise ValueError('[distribution] kind must be \'box\' or \'violin\'')
+
+    if xticks is None:
+        xticks = np.arange(num_groups)
+    elif len(xticks) != num_groups:
+        raise ValueError('[distribution] xticks size does not match data')
+
+    if colors is None:
+        colors = [COLOR_SET[0]] * num_groups
+    if len(colors) < num_groups:
+        raise ValueError('[distribution] Not enough colors')
+
+    if not 0 <= whiskers[0] <= 25 or not 75 <= whiskers[1] <= 100:
+        raise ValueError('[distribution] whiskers must be percentiles in '
+                         '[0, 25] and [75, 100]')
+
+    ############################################################################
+    # Draw glyphs from the sketches
+    if kind == 'box':
+        stats = []
+        for sketch in sketches:
+            qs = sketch.quantile([whiskers[0] / 100., 0.25, 0.5, 0.75,
+                                  whiskers[1] / 100.])
+            stats.append({'whislo': qs[0], 'q1': qs[1], 'med': qs[2],
+                          'q3': qs[3], 'whishi': qs[4],
+                          'mean': sketch.mean(),
+                          'fliers': []})
+        hdls = axes.bxp(stats, positions=xticks, widths=width,
+                        patch_artist=True, showmeans=showmeans,
+                        showfliers=False)
+        for box, color in zip(hdls['boxes'], colors):
+            box.set_facecolor(color)
+            box.set_edgecolor(edgecolor)
+            box.set_linewidth(linewidth)
+        for key in ('medians', 'whiskers', 'caps'):
+            for line in hdls[key]:
+                line.set_color(edgecolor)
+                line.set_linewidth(linewidth)
+    else:
+        stats = []
+        for sketch in sketches:
+            coords = np.linspace(sketch.min, sketch.max, points)
+            # Density as the derivative of the estimated CDF.
+            vals = np.gradient(sketch.cdf(coords), coords) \
+                    if sketch.max > sketch.min else np.ones(points)
+            stats.append({'coords': coords, 'vals': vals,
+                          'mean': sketch.mean(),
+                          'median': sketch.quantile(0.5),
+                          'min': sketch.min, 'max': sketch.max})
+        hdls = axes.violin(stats, positions=xticks, widths=width,
+                           showmedians=True)
+        for body, color in zip(hdls['bodies'], colors):
+            body.set_facecolor(color)
+            body.set_edgecolor(edgecolor)
+            body.set_linewidth(linewidth)
+            body.set_alpha(1)
+        for key in ('cbars', 'cmins', 'cmaxes', 'cmedians'):
+            if key in hdls:
+                hdls[key].set_color(edgecolor)
+                hdls[key].set_linewidth(linewidth)
+
+    hdls['sketches'] = sketches
+
+    ############################################################################
+    # Axes options
+
+    axes.xaxis.set_ticks_position('none')
+    axes.set_xticks(xticks)
+    if group_names is not None:
+        axes.set_xticklabels(group_names)
+    axes.set_xlim([xticks[0] - 1, xticks[-1] + 1])
+
+    return hdls
+
@@ -0,0 +1,36 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import matplotlib.font_manager
+
+def font_properties(spec=None):
+    """ Get a new FontProperties instance of the font spec, which can be freely
+    modified.
+
+    spec: None (i.e., default), a str (a family name or fontconfig pattern), a
+    dict of FontProperties keyword arguments, or a FontProperties instance,
+    which is copied.
+    """
+    if spec is None:
+        return matplotlib.font_manager.FontProperties()
+    if isinstance(spec, str):
+        return matplotlib.font_manager.FontProperties(spec)
+    if isinstance(spec, matplotlib.font_manager.FontProperties):
+        return spec.copy()
+    try:
+        return matplotlib.font_manager.FontProperties(**spec)
+    except TypeError:
+        raise TypeError('[font] font spec must be None, str, dict, or '
+                        'FontProperties')
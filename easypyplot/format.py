@@ -13,15 +13,22 @@ You should have received a copy of the Modified BSD-3 License along with this
 program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
 """
 
+from contextlib import contextmanager
 import os
 import shutil
 import locale
+import threading
 import numpy as np
+import matplotlib.text
 import matplotlib.ticker
-from cycler import cycler
+import matplotlib.transforms
+from cycler import cycler, Cycler
 
 from .color import COLOR_SET
-from .util import __mpl_version__
+from .util import __mpl_version__, get_renderer, mpl_supports, text_extents
+
+if mpl_supports('style'):
+    import matplotlib.style
 
 # Inches per point.
 INCHES_PER_PT = 1.0 / 72
@@ -46,15 +53,214 @@ def turn_off_box(axes, twinx_axes=None):
         twinx_axes.yaxis.set_ticks_position('right')
 
 
-def paper_plot(fontsize=9, font='paper'):
-    """ Initialize the settings of the plot, including font, fontsize, etc..
+def _font_style(fontsize=9, font='paper'):
+    """ Get the font settings of the plot as a dict of rcParams.
+
+    fontsize: fontsize for legends and labels.
+    font: font for legends and labels, 'paper' uses Times New Roman, 'default'
+    uses default, a tuple of (family, font, ...) customizes font.
+    """
+    rc = {}
+
+    if font == 'paper':
+        rc['font.family'] = 'serif'
+        rc['font.serif'] = ['Times New Roman']
+        rc['mathtext.fontset'] = 'stix'  # to blend well with Times
+        rc['mathtext.rm'] = 'serif'
+    elif font == 'default':
+        pass
+    else:
+        if not isinstance(font, (tuple, list)) or len(font) < 2:
+            raise ValueError('[format] font must be a tuple of (family, font)')
+        rc['font.family'] = font[0]
+        rc['font.{}'.format(font[0])] = list(font[1:])
+        rc['mathtext.rm'] = font[0]
+
+    rc['font.size'] = fontsize
+    rc['legend.fontsize'] = fontsize
+    rc['axes.labelsize'] = fontsize
+    rc['xtick.labelsize'] = fontsize
+    rc['ytick.labelsize'] = fontsize
+
+    return rc
+
+
+def paper_style(fontsize=9, font='paper', version=None):
+    """ Get the settings of the plot, including font, fontsize, etc., as a dict
+    of rcParams, without applying them.
     Also refer to the changes in
     https://matplotlib.org/users/dflt_style_changes.html
 
+    fontsize: fontsize for legends and labels.
+    font: font for legends and labels, 'paper' uses Times New Roman, 'default'
+    uses default, a tuple of (family, font, ...) customizes font.
+    version: the matplotlib version tuple the settings are for. Default to be
+    the current version.
+    """
+    if version is None:
+        version = __mpl_version__
+
+    rc = _font_style(fontsize=fontsize, font=font)
+
+    # Use TrueType fonts.
+    rc['ps.fonttype'] = 42
+    rc['pdf.fonttype'] = 42
+
+    rc['legend.loc'] = 'upper right'
+    rc['legend.fancybox'] = False
+    rc['legend.shadow'] = False
+    rc['legend.numpoints'] = 2
+    rc['legend.scatterpoints'] = 3
+    rc['legend.borderpad'] = 0.4
+    if version >= (2, 0):  # Changed from 2.0
+        rc['legend.facecolor'] = 'inherit'
+        rc['legend.edgecolor'] = 'inherit'
+    if version >= (1, 5):  # Changed from 1.5
+        rc['legend.framealpha'] = 1.0
+    rc['axes.linewidth'] = 1.0
+    rc['axes.facecolor'] = 'w'
+    rc['axes.edgecolor'] = 'k'
+    rc['axes.axisbelow'] = True
+    if version >= (1, 5):  # Changed from 1.5
+        rc['axes.prop_cycle'] = cycler('color', COLOR_SET)
+    else:
+        rc['axes.color_cycle'] = COLOR_SET
+    rc['grid.linestyle'] = ':'
+    rc['grid.linewidth'] = 0.5
+    rc['grid.alpha'] = 1.0
+    rc['grid.color'] = 'k'
+    rc['lines.linewidth'] = 1.0
+    if version >= (2, 0):  # Changed from 2.0
+        rc['lines.color'] = 'C0'
+    rc['lines.markeredgewidth'] = 0.5
+    rc['lines.markersize'] = 4
+    if version >= (2, 0):  # Changed from 2.0
+        rc['lines.dashed_pattern'] = [4, 4]
+        rc['lines.dashdot_pattern'] = [4, 2, 1, 2]
+        rc['lines.dotted_pattern'] = [1, 3]
+    rc['patch.linewidth'] = 0.5
+    if version >= (2, 0):  # Changed from 2.0
+        rc['patch.facecolor'] = 'C0'
+        rc['patch.force_edgecolor'] = True
+    rc['patch.edgecolor'] = 'k'
+    if version >= (2, 0):  # Changed from 2.0
+        rc['hatch.linewidth'] = 0.5
+        rc['hatch.color'] = 'k'
+    if version >= (1, 5):  # Changed from 1.5
+        rc['errorbar.capsize'] = 3
+    rc['xtick.direction'] = 'out'
+    rc['ytick.direction'] = 'out'
+    rc['xtick.major.width'] = 0.8
+    rc['xtick.minor.width'] = 0.6
+    rc['ytick.major.width'] = 0.8
+    rc['ytick.minor.width'] = 0.6
+    if version >= (2, 0):  # Changed from 2.0
+        rc['xtick.top'] = False
+        rc['ytick.right'] = False
+
+    return rc
+
+
+def _style_value_str(value):
+    """ Format an rcParams value as in a style sheet. """
+    def _item_str(item):
+        # '#' starts a comment in style sheets; colors are valid without it.
+        return str(item).lstrip('#')
+    if isinstance(value, Cycler):
+        return ' + '.join('cycler({!r}, [{}])'.format(
+            key, ', '.join(repr(_item_str(v)) for v in vals))
+                          for key, vals in value.by_key().items())
+    if isinstance(value, (list, tuple)):
+        return ', '.join(_item_str(v) for v in value)
+    return _item_str(value)
+
+
+def write_paper_style(fname, fontsize=9, font='paper', version=None):
+    """ Write the settings of the plot as a matplotlib style sheet, which can be
+    used through `matplotlib.style.use()` without easypyplot.
+
+    fname: the style sheet file name, usually ending with .mplstyle.
+    fontsize, font, version: see paper_style().
+    """
+    rc = paper_style(fontsize=fontsize, font=font, version=version)
+    with open(fname, 'w') as fh:
+        fh.write('# easypyplot paper style, generated by '
+                 'easypyplot.format.write_paper_style().\n')
+        for key in sorted(rc):
+            fh.write('{}: {}\n'.format(key, _style_value_str(rc[key])))
+
+
+# Shipped style sheets of the paper style with the default font and fontsize,
+# one per matplotlib version where paper_style() changes. Regenerate them with
+# `make styles`.
+_STYLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'styles')
+_PAPER_STYLE_VERSIONS = [(1, 4), (1, 5), (2, 0), (3, 0)]
+_PAPER_STYLE_FONT_KEYS = ('font.family', 'font.serif', 'mathtext.fontset',
+                          'mathtext.rm')
+# Loaded shipped style sheet, cached per process. None if not usable.
+_PAPER_STYLE_CACHE = []
+
+def paper_style_file(version=None):
+    """ Get the file name of the shipped style sheet of the paper style, see
+    paper_style(), for the matplotlib version.
+
+    version: the matplotlib version tuple. Default to be the current version.
+
+    return: None if the version does not support style sheets.
+    """
+    if version is None:
+        version = __mpl_version__
+    # The latest sheet not newer than the version.
+    sheet_versions = [v for v in _PAPER_STYLE_VERSIONS
+                      if v <= tuple(version[:2])]
+    if not sheet_versions:
+        # matplotlib.style is added from 1.4.
+        return None
+    return os.path.join(_STYLE_DIR, 'paper-mpl{}.{}.mplstyle'
+                        .format(*max(sheet_versions)))
+
+
+def _generate_paper_style_files():
+    """ Generate all shipped style sheets. """
+    for version in _PAPER_STYLE_VERSIONS:
+        write_paper_style(paper_style_file(version), version=version)
+
+
+def _paper_style_sheet():
+    """ Load the shipped style sheet for the current version, only once. """
+    if not _PAPER_STYLE_CACHE:
+        fname = paper_style_file()
+        if fname is not None and os.path.isfile(fname):
+            sheet = matplotlib.rc_params_from_file(
+                fname, use_default_template=False)
+        else:
+            sheet = None
+        _PAPER_STYLE_CACHE.append(sheet)
+    return _PAPER_STYLE_CACHE[0]
+
+
+# The settings last applied by paper_plot().
+_PAPER_PLOT_APPLIED = []
+
+def _paper_plot_key(fontsize, font):
+    """ Get a hashable key of the paper_plot() settings. """
+    return (fontsize, tuple(font) if isinstance(font, list) else font)
+
+
+def paper_plot(fontsize=9, font='paper'):
+    """ Initialize the settings of the plot, including font, fontsize, etc..
+    See paper_style() for the settings, which are loaded from the shipped style
+    sheet if possible, see paper_style_file().
+
+    This changes the global rcParams and locale; use paper_context() to apply
+    the settings only within a context, e.g., when rendering from threads.
+
     fontsize: fontsize for legends and labels.
     font: font for legends and labels, 'paper' uses Times New Roman, 'default'
     uses default, a tuple of (family, font, ...) customizes font.
     """
+    rc = _font_style(fontsize=fontsize, font=font)
+
     # Set locale for unicode signs (e.g., minus sign).
     try:
         locale.setlocale(locale.LC_ALL, 'C.UTF-8')
@@ -75,119 +281,178 @@ def paper_plot(fontsize=9, font='paper'):
             except OSError:
                 shutil.rmtree(fe, ignore_errors=True)
 
-    if font == 'paper':
-        matplotlib.rcParams['font.family'] = 'serif'
-        matplotlib.rcParams['font.serif'] = ['Times New Roman']
-        matplotlib.rcParams['mathtext.fontset'] = 'stix'  # to blend well with Times
-        matplotlib.rcParams['mathtext.rm'] = 'serif'
-    elif font == 'default':
-        pass
+    sheet = _paper_style_sheet()
+    if sheet is None:
+        matplotlib.rcParams.update(paper_style(fontsize=fontsize, font=font))
     else:
-        if not isinstance(font, (tuple, list)) or len(font) < 2:
-            raise ValueError('[format] font must be a tuple of (family, font)')
-        matplotlib.rcParams['font.family'] = font[0]
-        matplotlib.rcParams['font.{}'.format(font[0])] = list(font[1:])
-        matplotlib.rcParams['mathtext.rm'] = font[0]
+        # The style sheet uses the paper font, keep the current one otherwise.
+        kept = {} if font == 'paper' else \
+                {k: matplotlib.rcParams[k] for k in _PAPER_STYLE_FONT_KEYS}
+        matplotlib.style.use(sheet)
+        matplotlib.rcParams.update(kept)
+        matplotlib.rcParams.update(rc)
 
-    matplotlib.rcParams['font.size'] = fontsize
+    _PAPER_PLOT_APPLIED[:] = [_paper_plot_key(fontsize, font)]
 
-    # Use TrueType fonts.
-    matplotlib.rcParams['ps.fonttype'] = 42
-    matplotlib.rcParams['pdf.fonttype'] = 42
-
-    matplotlib.rcParams['legend.loc'] = 'upper right'
-    matplotlib.rcParams['legend.fontsize'] = fontsize
-    matplotlib.rcParams['legend.fancybox'] = False
-    matplotlib.rcParams['legend.shadow'] = False
-    matplotlib.rcParams['legend.numpoints'] = 2
-    matplotlib.rcParams['legend.scatterpoints'] = 3
-    matplotlib.rcParams['legend.borderpad'] = 0.4
-    try:
-        matplotlib.rcParams['legend.facecolor'] = 'inherit'
-        matplotlib.rcParams['legend.edgecolor'] = 'inherit'
-    except KeyError:
-        assert __mpl_version__ < (2, 0)  # Changed from 2.0
-    try:
-        matplotlib.rcParams['legend.framealpha'] = 1.0
-    except KeyError:
-        assert __mpl_version__ < (1, 5)  # Changed from 1.5
-    matplotlib.rcParams['axes.linewidth'] = 1.0
-    matplotlib.rcParams['axes.facecolor'] = 'w'
-    matplotlib.rcParams['axes.edgecolor'] = 'k'
-    matplotlib.rcParams['axes.labelsize'] = fontsize
-    matplotlib.rcParams['axes.axisbelow'] = True
-    try:
-        matplotlib.rcParams['axes.prop_cycle'] = cycler('color', COLOR_SET)
-    except KeyError:
-        assert __mpl_version__ < (1, 5)  # Changed from 1.5
-        matplotlib.rcParams['axes.color_cycle'] = COLOR_SET
-    matplotlib.rcParams['xtick.labelsize'] = fontsize
-    matplotlib.rcParams['ytick.labelsize'] = fontsize
-    matplotlib.rcParams['grid.linestyle'] = ':'
-    matplotlib.rcParams['grid.linewidth'] = 0.5
-    matplotlib.rcParams['grid.alpha'] = 1.0
-    matplotlib.rcParams['grid.color'] = 'k'
-    matplotlib.rcParams['lines.linewidth'] = 1.0
-    try:
-        matplotlib.rcParams['lines.color'] = 'C0'
-    except ValueError:
-        assert __mpl_version__ < (2, 0)  # Changed from 2.0
-    matplotlib.rcParams['lines.markeredgewidth'] = 0.5
-    matplotlib.rcParams['lines.markersize'] = 4
-    try:
-        matplotlib.rcParams['lines.dashed_pattern'] = [4, 4]
-        matplotlib.rcParams['lines.dashdot_pattern'] = [4, 2, 1, 2]
-        matplotlib.rcParams['lines.dotted_pattern'] = [1, 3]
-    except KeyError:
-        assert __mpl_version__ < (2, 0)  # Changed from 2.0
-    matplotlib.rcParams['patch.linewidth'] = 0.5
-    try:
-        matplotlib.rcParams['patch.facecolor'] = 'C0'
-        matplotlib.rcParams['patch.force_edgecolor'] = True
-    except ValueError:
-        assert __mpl_version__ < (2, 0)  # Changed from 2.0
-    matplotlib.rcParams['patch.edgecolor'] = 'k'
-    try:
-        matplotlib.rcParams['hatch.linewidth'] = 0.5
-        matplotlib.rcParams['hatch.color'] = 'k'
-    except KeyError:
-        assert __mpl_version__ < (2, 0)  # Changed from 2.0
-    try:
-        matplotlib.rcParams['errorbar.capsize'] = 3
-    except KeyError:
-        assert __mpl_version__ < (1, 5)  # Changed from 1.5
-    matplotlib.rcParams['xtick.direction'] = 'out'
-    matplotlib.rcParams['ytick.direction'] = 'out'
-    matplotlib.rcParams['xtick.major.width'] = 0.8
-    matplotlib.rcParams['xtick.minor.width'] = 0.6
-    matplotlib.rcParams['ytick.major.width'] = 0.8
-    matplotlib.rcParams['ytick.minor.width'] = 0.6
-    try:
-        matplotlib.rcParams['xtick.top'] = False
-        matplotlib.rcParams['ytick.right'] = False
-    except KeyError:
-        assert __mpl_version__ < (2, 0)  # Changed from 2.0
+
+# Serialize the contexts across threads, since rcParams are process-global.
+_PAPER_CONTEXT_LOCK = threading.RLock()
+
+def paper_plot_once(fontsize=9, font='paper'):
+    """ Apply paper_plot() only if the last paper_plot() used different
+    settings, so that setting up many plots with the same settings neither
+    resets the global rcParams and locale nor clears the font cache each time.
+
+    The lock of paper_context() is only taken when the settings change, and
+    they are then applied holding the lock, so they do not change while
+    another thread renders inside the lock. With unchanged settings, this
+    returns immediately without waiting for the lock.
+
+    fontsize: fontsize for legends and labels.
+    font: font for legends and labels, see paper_plot().
+    """
+    key = _paper_plot_key(fontsize, font)
+    if _PAPER_PLOT_APPLIED == [key]:
+        return
+    with _PAPER_CONTEXT_LOCK:
+        # Check again, another thread may have applied the same settings.
+        if _PAPER_PLOT_APPLIED != [key]:
+            paper_plot(fontsize=fontsize, font=font)
+
+
+@contextmanager
+def paper_context(fontsize=9, font='paper'):
+    """ Open a context with the settings of the plot applied, used for the
+    `with` statement. See paper_style() for the settings.
+
+    The global rcParams are restored when exiting the context, and neither the
+    process locale nor the font cache is touched.
+
+    rcParams are process-global in matplotlib, and are read both when creating
+    and when drawing artists. So it is safe to use the context from multiple
+    threads (e.g., a thread pool), but only one thread at a time can be inside
+    a context. Create, draw, and save (render) figures inside the context, and
+    do other work, e.g., data loading and file writes, outside of it to
+    overlap with rendering in other threads.
+
+    fontsize: fontsize for legends and labels.
+    font: font for legends and labels, 'paper' uses Times New Roman, 'default'
+    uses default, a tuple of (family, font, ...) customizes font.
+    """
+    rc = paper_style(fontsize=fontsize, font=font)
+    with _PAPER_CONTEXT_LOCK:
+        with matplotlib.rc_context(rc=rc):
+            yield
 
 
-def get_fig_dims(width_in_pt):
+def get_fig_dims(width_in_pt, aspect=None):
     """ Get the figure dimension in inches with golden ratio.
 
     width_in_pt: figure width in points.
+    aspect: height to width ratio. If None, use golden ratio.
     """
+    if aspect is None:
+        aspect = _GOLDEN_RATIO
     width = width_in_pt * INCHES_PER_PT
-    height = width * _GOLDEN_RATIO
+    height = width * aspect
     return [width, height]
 
 
-def resize_ax_box(axes, wratio=1, hratio=1, to_right=False, to_bottom=False):
+# Figure size presets, mapping a name to (width in points, aspect, dpi). An
+# aspect of None means golden ratio.
+FIG_PRESETS = {
+    # Single column of a two-column paper.
+    'single': (241, None, 300),
+    # Full text width of a two-column paper.
+    'double': (505, None, 300),
+    # Full 16:9 slide.
+    'slide': (720, 9. / 16, 150),
+    # Small preview image.
+    'thumbnail': (144, None, 72),
+}
+
+def register_fig_preset(name, width_in_pt, aspect=None, dpi=None):
+    """ Register a figure size preset.
+
+    name: preset name.
+    width_in_pt: figure width in points.
+    aspect: height to width ratio. If None, use golden ratio.
+    dpi: resolution of the figure. If None, use the default.
+    """
+    FIG_PRESETS[name] = (width_in_pt, aspect, dpi)
+
+
+def get_fig_preset(figsize, dpi=None):
+    """ Resolve the figure dimension and resolution.
+
+    figsize: a preset name in FIG_PRESETS, or the dimension of the plot in
+    inches, which is returned as is.
+    dpi: resolution of the figure, which overrides the preset resolution.
+
+    return: a tuple of figure dimension in inches and dpi.
+    """
+    if not isinstance(figsize, str):
+        return figsize, dpi
+    try:
+        width_in_pt, aspect, preset_dpi = FIG_PRESETS[figsize]
+    except KeyError:
+        raise ValueError('[format] get_fig_preset: unknown figure preset {}. '
+                         'Available: {}.'
+                         .format(figsize, ', '.join(sorted(FIG_PRESETS))))
+    return get_fig_dims(width_in_pt, aspect), \
+            (preset_dpi if dpi is None else dpi)
+
+
+def _auto_resize_ratios(axes, to_right, to_bottom, pad):
+    """ Compute the ratios to resize the axes box, such that the tick labels
+    and the legend fit in the figure. """
+    renderer = get_renderer(axes.figure)
+    to_fig = axes.figure.transFigure.inverted()
+    bboxes = [axes.get_tightbbox(renderer)]
+    legend = axes.get_legend()
+    if legend is not None:
+        bboxes.append(legend.get_window_extent(renderer))
+    extent = matplotlib.transforms.Bbox.union(bboxes).transformed(to_fig)
+    box = axes.get_position()
+
+    # The parts outside the axes box keep their sizes after resizing, so
+    # shrink the box by the amount they overflow the figure.
+    if to_right:
+        wratio = (box.x1 - pad - (box.x0 - extent.x0)) / box.width
+    else:
+        wratio = (1 - pad - (extent.x1 - box.x1) - box.x0) / box.width
+    if to_bottom:
+        hratio = (box.y1 - pad - (box.y0 - extent.y0)) / box.height
+    else:
+        hratio = (1 - pad - (extent.y1 - box.y1) - box.y0) / box.height
+    return wratio, hratio
+
+
+def resize_ax_box(axes, wratio=1, hratio=1, to_right=False, to_bottom=False,
+                  pad=0.01):
     """ Resize the axes box.
 
     axes: axes to be resized.
-    wratio: width ratio, should be (0, 1].
-    hratio: height ratio, should be (0, 1].
+    wratio: width ratio, should be (0, 1]. If 'auto', the ratio is computed
+    from the measured extents of the tick labels and the legend, to make them
+    fit in the figure.
+    hratio: height ratio, should be (0, 1]. Also accepts 'auto'.
     to_right: if True, shrink left side. Otherwise shrink right side.
     to_bottom: if True, shrink top side. Otherwise shrink bottom side.
+    pad: padding to the figure edges in figure fraction, for 'auto' ratios.
+
+    Return the applied width and height ratios.
     """
+    if wratio == 'auto' or hratio == 'auto':
+        auto_wratio, auto_hratio = _auto_resize_ratios(
+            axes, to_right, to_bottom, pad)
+        if wratio == 'auto':
+            wratio = min(float(auto_wratio), 1)
+        if hratio == 'auto':
+            hratio = min(float(auto_hratio), 1)
+        if wratio <= 0 or hratio <= 0:
+            raise ValueError('[format] resize_ax_box: '
+                             'no room for the axes box after auto resizing.')
     box = axes.get_position()
     assert wratio <= 1 and wratio > 0
     assert hratio <= 1 and hratio > 0
@@ -196,60 +461,152 @@ def resize_ax_box(axes, wratio=1, hratio=1, to_right=False, to_bottom=False):
     y0 = box.y0 if to_bottom else box.y0 + box.height * (1 - hratio)
     height = box.height * hratio
     axes.set_position([x0, y0, width, height])
+    return wratio, hratio
+
 
+class PercentFormatter(matplotlib.ticker.Formatter):
+    """ Tick formatter that displays fractions as percentage.
+
+    precision: a number indicating how many digits should be displayed after
+    the decimal point, as in string format for f/F.
+    mathtext: if True, wrap the label in mathtext for a better minus sign.
+    Otherwise use plain text with a unicode minus sign, which is much faster
+    to lay out.
+    """
 
-def set_axis_to_percent(axis, precision=0):
+    # Maximum number of cached labels.
+    CACHE_SIZE = 256
+
+    def __init__(self, precision=0, mathtext=True):
+        self._precision = precision
+        self._mathtext = mathtext
+        self._compile()
+
+    @property
+    def precision(self):
+        """ Number of digits after the decimal point. """
+        return self._precision
+
+    @precision.setter
+    def precision(self, precision):
+        self._precision = precision
+        self._compile()
+
+    @property
+    def mathtext(self):
+        """ Whether to wrap the label in mathtext. """
+        return self._mathtext
+
+    @mathtext.setter
+    def mathtext(self, mathtext):
+        self._mathtext = mathtext
+        self._compile()
+
+    def _compile(self):
+        """ Precompile the number format, and reset the label cache. """
+        self._fmt = '{{:.{}f}}'.format(self._precision)
+        self._cache = {}
+
+    def __call__(self, value, pos=None):
+        try:
+            return self._cache[value]
+        except KeyError:
+            pass
+        s = self._fmt.format(value * 100)
+        if self.mathtext:
+            # Use Tex for better minus sign. Tex is directly supported in
+            # matplotlib even without Tex installed. See
+            # https://matplotlib.org/users/mathtext.html
+            label = r'${}\%$'.format(s)
+        else:
+            label = s.replace('-', u'\u2212') + '%'
+        if len(self._cache) >= self.CACHE_SIZE:
+            self._cache.clear()
+        self._cache[value] = label
+        return label
+
+    def __getstate__(self):
+        # Do not carry the axis and the cache across processes.
+        return {'precision': self.precision, 'mathtext': self.mathtext}
+
+    def __setstate__(self, state):
+        self._precision = state['precision']
+        self._mathtext = state['mathtext']
+        self._compile()
+
+
+def set_axis_to_percent(axis, precision=0, mathtext=True):
     """ Make axis to display percentage ticker.
 
     axis: a single axis, such as ax.yaxis.
     precision: a number indicating how many digits should be displayed after
     the decimal point, as in string format for f/F or g/G.
+    mathtext: use mathtext for labels, otherwise plain text. See
+    PercentFormatter.
     """
-    def cb_to_percent(value, position):
-        """ Callback, arguments are value and tick position
-        """
-        s = ('{' + ':.{}f'.format(precision) + '}').format(value * 100)
-        s = s.format(value * 100)
-        # Use Tex for better minus sign. Tex is directly supported in
-        # matplotlib even without Tex installed. See
-        # https://matplotlib.org/users/mathtext.html
-        return r'${}\%$'.format(s)
-
-    axis.set_major_formatter(matplotlib.ticker.FuncFormatter(cb_to_percent))
+    axis.set_major_formatter(PercentFormatter(precision=precision,
+                                              mathtext=mathtext))
 
 
 def set_group_xticklabels(axes, grouplabels, xvals, yval,
                           horizontalalignment='center', verticalalignment='center',
-                          **kwargs):
+                          tierspacing=1.2, **kwargs):
     """ Set group labels along x axis.
 
     axes: axes to be added with group labels.
-    grouplabels: group labels to be added.
-    xvals: list of x positions to add group labels. It could have the same length
-        as grouplabels (in which case it is directly used as the positions), or
-        a multiple (in which case the positions are inferred from it).
+    grouplabels: group labels to be added. It could also be a list of label
+        tiers for hierarchical groups, from the outermost to the innermost,
+        e.g., [suites, benchmarks, configs]. The innermost tier is placed at
+        yval, and each outer tier is placed one row below.
+    xvals: list or array of x positions to add group labels. It could have the
+        same length as grouplabels (in which case it is directly used as the
+        positions), or a multiple (in which case the positions are inferred from
+        it). For label tiers, the length must be a multiple of each tier.
     yval: y position to add group labels.
     horizontalalignment: horizontal alignment, e.g., 'center', 'left'.
     verticalalignment: vertical alignment, e.g., 'center', 'top', 'bottom', 'baseline'.
+    tierspacing: the row spacing between label tiers, as a multiple of the
+        height of the tallest label in the inner tier.
     kwargs: additional kw arguments passed to axes.text().
     """
-    gnum = len(grouplabels)
-    xnum = len(xvals)
-    if xnum == 0 or xnum % gnum != 0:
-        raise ValueError('[format] set_group_xticklabels: '
-                         'xvals length must be a multiple of grouplabels length. '
-                         '({} vs. {})'
-                         .format(xnum, gnum))
-
-    # Infer positions for group labels.
-    gsize = xnum // gnum
-    gvals = []
-    for g in range(gnum):
-        gxs = xvals[g * gsize : (g + 1) * gsize]
-        # Use the center of the first and last positions.
-        gval = (gxs[0] + gxs[-1]) / 2.
-        gvals.append(gval)
-
-    for gval, label in zip(gvals, grouplabels):
-        axes.text(gval, yval, label, ha=horizontalalignment, va=verticalalignment, **kwargs)
+    if len(grouplabels) > 0 \
+            and isinstance(grouplabels[0], (list, tuple, np.ndarray)):
+        tiers = list(grouplabels)[::-1]
+    else:
+        tiers = [grouplabels]
 
+    xvals = np.asarray(xvals, dtype=np.float64)
+    xnum = len(xvals)
+    for labels in tiers:
+        gnum = len(labels)
+        if xnum == 0 or gnum == 0 or xnum % gnum != 0:
+            raise ValueError('[format] set_group_xticklabels: '
+                             'xvals length must be a multiple of grouplabels length. '
+                             '({} vs. {})'
+                             .format(xnum, gnum))
+
+    transform = kwargs.pop('transform', axes.transData)
+    if len(tiers) > 1:
+        # Measure the label heights of all tiers in bulk, in points.
+        fontproperties = matplotlib.text.Text(**kwargs).get_fontproperties()
+        renderer = get_renderer(axes.figure)
+        pixels_to_points = 72. / axes.figure.dpi
+
+    offset = 0.
+    for labels in tiers:
+        # Infer positions for group labels, using the center of the first and
+        # last positions of each group.
+        gvals = xvals.reshape(len(labels), -1)[:, [0, -1]].mean(axis=1)
+
+        # Outer tiers are shifted down in points, which is kept when zooming.
+        tier_transform = transform if offset == 0 else \
+                matplotlib.transforms.offset_copy(
+                    transform, fig=axes.figure, y=-offset, units='points')
+        for gval, label in zip(gvals, labels):
+            axes.text(gval, yval, label, ha=horizontalalignment, va=verticalalignment,
+                      transform=tier_transform, **kwargs)
+
+        if len(tiers) > 1:
+            _, heights, _ = text_extents(renderer, [str(l) for l in labels],
+                                         fontproperties)
+            offset += heights.max() * pixels_to_points * tierspacing
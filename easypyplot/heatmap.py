@@ -0,0 +1,208 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import numpy as np
+import matplotlib.colors
+
+from . import font
+from . import util
+
+def draw(axes,
+         data, group_names=None, entry_names=None,
+         cmap=None, vmin=None, vmax=None, norm=None,
+         colorbar=False, downsample=True,
+         xticklabelfontsize=None, xticklabelrotation='horizontal',
+         annotate=False, annotatefmt='{:g}', annotatefontsize=None):
+    """ A heatmap drawing wrapper for large matrices, drawn as a single image.
+
+    axes: the axes instance to be drawn on.
+
+    data: 2-dimension, grouped into groups, each of which has entries, e.g.,
+        the output of math.normalize(). Groups are along x axis, and entries
+        are along y axis from top to bottom.
+    group_names, entry_names: names of all groups/entries.
+
+    cmap: the colormap instance or name.
+    vmin, vmax: the data range covered by the colormap. Default to be the data
+        range.
+    norm: the Normalize instance to map the data to the colormap, which
+        overrides vmin and vmax.
+
+    colorbar: whether to add a colorbar next to the axes.
+    downsample: if True, block-average the matrix down to the pixel resolution
+        of the axes when it has more cells than pixels. Could also be a tuple of
+        the maximum (columns, rows). If False, draw the full matrix.
+
+    xticklabelfontsize: the fontsize of the xtick labels.
+    xticklabelrotation: the rotation control of the xtick labels.
+
+    annotate: whether to label each cell with its value. Labels are only added
+        when the matrix is not downsampled, and the cell is large enough to
+        hold the label.
+    annotatefmt: the format string (e.g., '{:.1f}') or callable used to format
+        the values.
+    annotatefontsize: the fontsize of the value labels.
+
+    return: the image instance.
+    """
+    # pylint: disable=too-many-locals
+
+    ############################################################################
+    # data contains num_groups groups, each group has num_entries entries
+    try:
+        data = np.asarray(data, dtype=np.float64)
+    except ValueError:
+        raise ValueError('[heatmap] data cannot be convert to an array. '
+                         'Dimension mismatch?\n{}'.format(data))
+    dim = data.shape
+    if len(dim) != 2:
+        raise ValueError('[heatmap] data must be 2-dimension')
+    num_groups = dim[0]
+    num_entries = dim[1]
+
+    if group_names is not None and len(group_names) != num_groups:
+        raise ValueError('[heatmap] group names must have {} elements'
+                         .format(num_groups))
+
+    if entry_names is not None and len(entry_names) != num_entries:
+        raise ValueError('[heatmap] entry names must have {} elements'
+                         .format(num_entries))
+
+    ############################################################################
+    # Parse and adjust plot parameters
+    if downsample is True:
+        max_cols = max(int(axes.bbox.width), 1)
+        max_rows = max(int(axes.bbox.height), 1)
+    elif downsample:
+        try:
+            max_cols, max_rows = (int(v) for v in downsample)
+        except (TypeError, ValueError):
+            raise ValueError('[heatmap] downsample must be a bool or a tuple '
+                             'of (columns, rows)')
+    else:
+        max_cols, max_rows = num_groups, num_entries
+
+    if norm is None:
+        norm = matplotlib.colors.Normalize(
+            vmin=np.nanmin(data) if vmin is None else vmin,
+            vmax=np.nanmax(data) if vmax is None else vmax)
+
+    ############################################################################
+    # Draw the image, rows are entries and columns are groups
+    image = block_average(data.T, max_rows, max_cols)
+    downsampled = image.shape != (num_entries, num_groups)
+
+    # The extent keeps the cell coordinates even if downsampled, i.e., the
+    # center of each cell is at integer positions.
+    img = axes.imshow(image, cmap=cmap, norm=norm, aspect='auto',
+                      interpolation='nearest', origin='upper',
+                      extent=(-0.5, num_groups - 0.5, num_entries - 0.5, -0.5))
+
+    ############################################################################
+    # Axes options
+
+    axes.xaxis.set_ticks_position('none')
+    axes.yaxis.set_ticks_position('none')
+
+    if group_names is not None:
+        axes.set_xticks(np.arange(num_groups))
+        axes.set_xticklabels(group_names, rotation=xticklabelrotation,
+                             fontsize=xticklabelfontsize)
+
+    if entry_names is not None:
+        axes.set_yticks(np.arange(num_entries))
+        axes.set_yticklabels(entry_names)
+
+    if colorbar:
+        axes.figure.colorbar(img, ax=axes)
+
+    if annotate and not downsampled:
+        _annotate_cells(axes, data, img, fmt=annotatefmt,
+                        fontsize=annotatefontsize)
+
+    return img
+
+
+def block_average(matrix, max_rows, max_cols):
+    """ Average the matrix over blocks of cells, so that it has no more than
+    the given rows and columns. NaN cells are ignored.
+
+    matrix: 2-dimension array.
+    max_rows, max_cols: the maximum shape of the result.
+
+    return: the averaged matrix, or the matrix itself if small enough.
+    """
+    rows, cols = matrix.shape
+    rfactor = int(np.ceil(float(rows) / max(max_rows, 1)))
+    cfactor = int(np.ceil(float(cols) / max(max_cols, 1)))
+    if rfactor <= 1 and cfactor <= 1:
+        return matrix
+
+    # Pad with NaN to multiples of the block size.
+    out_rows = -(-rows // rfactor)
+    out_cols = -(-cols // cfactor)
+    padded = np.zeros((out_rows * rfactor, out_cols * cfactor)) + np.nan
+    padded[:rows, :cols] = matrix
+    blocks = padded.reshape(out_rows, rfactor, out_cols, cfactor)
+
+    valid = ~np.isnan(blocks)
+    counts = valid.sum(axis=(1, 3))
+    sums = np.where(valid, blocks, 0).sum(axis=(1, 3))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts
+
+
+def _annotate_cells(axes, data, img, fmt='{:g}', fontsize=None):
+    """ Label the values of the cells that can hold the labels.
+
+    axes: the axes instance the heatmap is drawn on.
+    data: the matrix of groups and entries.
+    img: the image instance, whose colormap decides the label colors.
+    fmt: the format string or callable for the values.
+    fontsize: the fontsize of the labels.
+
+    return: the text instances of the placed labels.
+    """
+    num_groups, num_entries = data.shape
+    fontproperties = font.font_properties({'size': fontsize})
+    renderer = util.get_renderer(axes.figure)
+
+    # All cells have the same size in display space.
+    cell_width = axes.bbox.width / num_groups
+    cell_height = axes.bbox.height / num_entries
+    size_pixels = fontproperties.get_size_in_points() * axes.figure.dpi / 72.
+    if cell_height < size_pixels:
+        # Too small for any label, skip measuring.
+        return []
+
+    formatter = fmt if callable(fmt) else fmt.format
+    gids, eids = np.nonzero(np.isfinite(data))
+    values = data[gids, eids]
+    labels = [formatter(v) for v in values]
+    text_widths, text_heights, _ = util.text_extents(
+        renderer, labels, fontproperties)
+    fits = (text_widths <= cell_width) & (text_heights <= cell_height)
+
+    # Dark text on light cells, and light text on dark cells.
+    rgbs = img.cmap(img.norm(values))[:, :3]
+    luminances = rgbs.dot([0.299, 0.587, 0.114])
+
+    texts = []
+    for idx in np.flatnonzero(fits):
+        texts.append(axes.text(gids[idx], eids[idx], labels[idx],
+                               ha='center', va='center',
+                               fontproperties=fontproperties,
+                               color='k' if luminances[idx] > 0.5 else 'w'))
+    return texts
@@ -0,0 +1,286 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import mmap
+import multiprocessing
+
+import numpy as np
+
+from .barchart import _draw_bars
+from .color import COLOR_SET
+from .util import data_range
+
+# Maximum number of samples loaded into memory at once, so that memory-mapped
+# arrays are binned block by block.
+BIN_CHUNK_SIZE = 1 << 22
+
+class Histogram(object):
+    """ Counts of samples in fixed bins, which are updated chunk by chunk, and
+    can be merged.
+
+    edges: the sorted bin edges, of length num_bins + 1. The last bin includes
+        its right edge, as np.histogram().
+    log: whether the edges are log-spaced, for faster binning.
+    """
+
+    def __init__(self, edges, log=False):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        if self.edges.ndim != 1 or len(self.edges) < 2 \
+                or np.any(np.diff(self.edges) <= 0):
+            raise ValueError('[histogram] edges must be strictly increasing, '
+                             'with at least two edges')
+        if log and self.edges[0] <= 0:
+            raise ValueError('[histogram] log edges must be positive')
+        self.log = log
+        self.counts = np.zeros(len(self.edges) - 1)
+        # Equally spaced edges (in log scale if log) are binned arithmetically.
+        scaled = np.log10(self.edges) if log else self.edges
+        steps = np.diff(scaled)
+        self._uniform = np.allclose(steps, steps[0], rtol=1e-9, atol=0)
+
+    @property
+    def num_bins(self):
+        """ Number of bins. """
+        return len(self.counts)
+
+    @property
+    def total(self):
+        """ Total count (or weight) of the samples in the bins. """
+        return self.counts.sum()
+
+    def update(self, samples, weights=None):
+        """ Count samples into the bins. Samples out of the edges, or NaN, are
+        ignored.
+
+        samples: an array of values. Could be a np.memmap, which is only read
+            block by block.
+        weights: an array of the same length as samples, as the weight of each
+            sample. Could also be a np.memmap.
+
+        return: the histogram itself.
+        """
+        if weights is not None and len(weights) != len(samples):
+            raise ValueError('[histogram] weights size does not match samples')
+        for start in range(0, len(samples), BIN_CHUNK_SIZE):
+            stop = start + BIN_CHUNK_SIZE
+            self.counts += self._bin(
+                samples[start:stop],
+                None if weights is None else weights[start:stop])
+        return self
+
+    def _bin(self, samples, weights):
+        """ Count a chunk of samples into the bins. """
+        samples = np.asarray(samples, dtype=np.float64).ravel()
+        lo, hi = self.edges[0], self.edges[-1]
+        with np.errstate(invalid='ignore'):
+            valid = (samples >= lo) & (samples <= hi)
+        if valid.all():
+            valid = slice(None)
+        samples = samples[valid]
+        if self._uniform:
+            if self.log:
+                scaled, slo, shi = np.log10(samples), np.log10(lo), np.log10(hi)
+            else:
+                scaled, slo, shi = samples, lo, hi
+            indices = ((scaled - slo) * (self.num_bins / (shi - slo))) \
+                    .astype(np.intp)
+            # Correct the rounding error at the edges.
+            indices -= samples < self.edges[indices]
+            indices += samples >= self.edges[np.minimum(indices + 1,
+                                                        self.num_bins)]
+        else:
+            indices = np.searchsorted(self.edges, samples, side='right') - 1
+        # The right edge belongs to the last bin.
+        np.minimum(indices, self.num_bins - 1, out=indices)
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float64).ravel()[valid]
+        return np.bincount(indices, weights=weights, minlength=self.num_bins)
+
+    def merge(self, other):
+        """ Merge another histogram of the same edges into this histogram.
+
+        other: the other Histogram instance.
+
+        return: the histogram itself.
+        """
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError('[histogram] cannot merge histograms with '
+                             'different edges')
+        self.counts += other.counts
+        return self
+
+    def quantile(self, q):
+        """ Estimate the quantiles, assuming samples are uniform in each bin.
+
+        q: a quantile in [0, 1], or an array of quantiles.
+
+        return: the estimated value(s), NaN if the histogram is empty.
+        """
+        q = np.asarray(q, dtype=np.float64)
+        total = self.total
+        if total == 0:
+            return (np.zeros(q.shape) + np.nan)[()]
+        cumulative = np.concatenate([[0], np.cumsum(self.counts)])
+        # Skip the empty bins, so that the cumulative counts are strictly
+        # increasing.
+        keep = np.concatenate([[True], self.counts > 0])
+        return np.interp(q * total, cumulative[keep], self.edges[keep])[()]
+
+
+def histogram_edges(lo, hi, bins=100, log=False):
+    """ Get the bin edges.
+
+    lo, hi: the range of the bins.
+    bins: number of bins.
+    log: if True, the edges are log-spaced, and lo must be positive.
+    """
+    if log:
+        if lo <= 0:
+            raise ValueError('[histogram] log bins must have a positive range')
+        return np.logspace(np.log10(lo), np.log10(hi), bins + 1)
+    return np.linspace(lo, hi, bins + 1)
+
+
+def _memmap_source(data):
+    """ A picklable source to reopen the memory-mapped file in worker processes,
+    or None if data is not a whole 1-dimension file mapping.
+    """
+    if isinstance(data, np.memmap) and isinstance(data.base, mmap.mmap) \
+            and data.ndim == 1 and data.filename:
+        return ('memmap', data.filename, data.dtype.str, data.offset,
+                len(data))
+    return None
+
+
+def _bin_task(args):
+    """ Bin a chunk of samples in a worker process. """
+    edges, log, source, start, stop, weights = args
+    if source[0] == 'memmap':
+        _, fname, dtype, offset, length = source
+        samples = np.memmap(fname, dtype=np.dtype(dtype), mode='r',
+                            offset=offset, shape=(length,))[start:stop]
+    else:
+        samples = source[1]
+    return Histogram(edges, log=log).update(samples, weights).counts
+
+
+def _bin_tasks(data, weights, edges, log, chunk_size):
+    """ Generate the tasks of chunks for worker processes. """
+    source = _memmap_source(data)
+    for start in range(0, len(data), chunk_size):
+        stop = start + chunk_size
+        task_source = source if source is not None \
+                else ('array', np.asarray(data[start:stop]))
+        task_weights = None if weights is None \
+                else np.asarray(weights[start:stop])
+        yield (edges, log, task_source, start, stop, task_weights)
+
+
+def histogram(data, bins=100, range=None, log=False, weights=None,
+              processes=None):
+    """ Bin the data into a histogram, chunk by chunk with bounded memory.
+
+    data: a 1-dimension array of samples. Could be a np.memmap.
+    bins: number of bins, or the bin edges.
+    range: the (lo, hi) range of the bins. Default to be the data range, which
+        takes an extra pass over the data.
+    log: if True, use log-spaced bins.
+    weights: an array of the same length as data, as the weight of each sample.
+    processes: if more than 1, bin the chunks in a pool of worker processes,
+        and merge their counts. A memory-mapped file is reopened in the
+        workers instead of being copied.
+
+    return: a Histogram instance.
+    """
+    # pylint: disable=redefined-builtin
+    if np.ndim(bins) == 0:
+        if range is None:
+            range = data_range(data, BIN_CHUNK_SIZE)
+            if range is None:
+                raise ValueError('[histogram] no valid samples to decide the '
+                                 'range')
+        edges = histogram_edges(range[0], range[1], bins=int(bins), log=log)
+    else:
+        edges = bins
+    hist = Histogram(edges, log=log)
+    if weights is not None and len(weights) != len(data):
+        raise ValueError('[histogram] weights size does not match samples')
+
+    if processes is None or processes <= 1:
+        return hist.update(data, weights)
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        for counts in pool.imap_unordered(
+                _bin_task, _bin_tasks(data, weights, hist.edges, log,
+                                      BIN_CHUNK_SIZE)):
+            hist.counts += counts
+    finally:
+        pool.close()
+        pool.join()
+    return hist
+
+
+def draw(axes,
+         data, bins=100, range=None, log=False, weights=None,
+         density=False, color=None, edgecolor='k', linewidth=0.5,
+         logy=False, processes=None):
+    """ A histogram drawing wrapper for huge arrays.
+
+    axes: the axes instance to be drawn on.
+
+    data: a Histogram instance, or a 1-dimension array of samples (could be a
+        np.memmap) to bin with histogram().
+    bins, range, log, weights, processes: see histogram(). log also sets the
+        x-axis to log scale.
+
+    density: if True, draw the probability density instead of the counts.
+    color: the color of the bars.
+    edgecolor: the color of the bar edges.
+    linewidth: the width of the bar edges.
+
+    logy: whether the y-axis should be in log scale.
+
+    return: the histogram, and the handler of the bars.
+    """
+    # pylint: disable=redefined-builtin
+    if isinstance(data, Histogram):
+        hist = data
+    else:
+        hist = histogram(data, bins=bins, range=range, log=log,
+                         weights=weights, processes=processes)
+
+    if color is None:
+        color = COLOR_SET[0]
+    if edgecolor is None:
+        edgecolor = 'none'
+
+    widths = np.diff(hist.edges)
+    heights = hist.counts
+    if density:
+        total = hist.total
+        heights = heights / (total * widths) if total > 0 else heights
+
+    hdls = _draw_bars(axes, hist.edges[np.newaxis, :-1],
+                      np.zeros((1, hist.num_bins)), heights[np.newaxis, :],
+                      widths, colors=[color], edgecolor=edgecolor,
+                      linewidth=linewidth, hatchs=None, hatchcolor=None,
+                      log=logy)
+
+    if hist.log:
+        axes.set_xscale('log')
+    axes.set_xlim([hist.edges[0], hist.edges[-1]])
+
+    return hist, hdls[0]
@@ -0,0 +1,187 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import numpy as np
+
+from .color import COLOR_SET
+
+# Maximum number of points loaded into memory at once when decimating, so
+# that memory-mapped series are read block by block.
+DECIMATE_CHUNK_SIZE = 1 << 20
+
+def draw(axes,
+         data, xvals=None, entry_names=None,
+         colors=None, linewidth=None, linestyles=None,
+         legendloc='upper right', legendncol=1, log=False,
+         decimate=True):
+    """ A line chart drawing wrapper for long series.
+
+    axes: the axes instance to be drawn on.
+
+    data: 2-dimension, each row is the series of one entry. Could be a
+        np.memmap, which is only read block by block.
+    xvals: the x positions of the points, shared by all entries, should be
+        sorted. Default to be range(num_points).
+    entry_names: names of all entries.
+
+    colors: the colors in HEX format used for entries. Length should be equal
+        to the number of entries.
+    linewidth: the width of the lines.
+    linestyles: the line styles for entries. Length should be equal to the
+        number of entries.
+
+    legendloc: the location of the legend.
+    legendncol: number of columns of the legend.
+
+    log: whether the y-axis should be in log scale.
+
+    decimate: if True, decimate each series to the min and max points in each
+        pixel column of the axes, which keeps the peaks visible. Could also be
+        the number of x bins. If False, draw all points.
+
+    return: handlers associated with entries.
+    """
+    # pylint: disable=too-many-branches
+
+    ############################################################################
+    # data contains num_entries series, each series has num_points points
+    if not isinstance(data, np.ndarray):
+        try:
+            data = np.array(data, dtype=np.float64)
+        except ValueError:
+            raise ValueError('[linechart] data cannot be convert to an array. '
+                             'Dimension mismatch?\n{}'.format(data))
+    if data.ndim != 2:
+        raise ValueError('[linechart] data must be 2-dimension')
+    num_entries, num_points = data.shape
+
+    if xvals is None:
+        xvals = np.arange(num_points)
+    elif len(xvals) != num_points:
+        raise ValueError('[linechart] xvals size does not match data')
+    elif not isinstance(xvals, np.ndarray):
+        xvals = np.array(xvals, dtype=np.float64)
+
+    if entry_names is not None and len(entry_names) != num_entries:
+        raise ValueError('[linechart] entry names must have {} elements'
+                         .format(num_entries))
+
+    ############################################################################
+    # Parse and adjust plot parameters
+    if colors is None:
+        if num_entries > len(COLOR_SET):
+            raise ValueError('[linechart] Not enough default colors')
+        colors = COLOR_SET[:num_entries]
+    if len(colors) < num_entries:
+        raise ValueError('[linechart] Not enough colors')
+
+    if linestyles is not None:
+        if len(linestyles) != num_entries:
+            raise ValueError('[linechart] Given linestyles do not match the data')
+    else:
+        linestyles = ['-' for eid in range(num_entries)]
+
+    if decimate is True:
+        num_bins = max(int(axes.bbox.width), 1)
+    elif decimate:
+        num_bins = int(decimate)
+        if num_bins < 1:
+            raise ValueError('[linechart] decimate must be a positive number '
+                             'of bins')
+    else:
+        num_bins = None
+
+    ############################################################################
+    # Each time draw one entry
+    hdls = []
+    for eid in range(num_entries):
+        if num_bins is None:
+            xs, ys = xvals, data[eid]
+        else:
+            xs, ys = min_max_decimate(xvals, data[eid], num_bins)
+        kwargs = {}
+        if linewidth is not None:
+            kwargs['linewidth'] = linewidth
+        hdl, = axes.plot(xs, ys, color=colors[eid], linestyle=linestyles[eid],
+                         **kwargs)
+        hdls.append(hdl)
+
+    ############################################################################
+    # Axes options
+
+    if log:
+        axes.set_yscale('log')
+
+    if entry_names is not None:
+        axes.legend(hdls, entry_names, loc=legendloc, ncol=legendncol)
+
+    return hdls
+
+
+def min_max_decimate(xvals, yvals, num_bins, chunk_size=None):
+    """ Decimate a series by keeping the first and last points, and the min
+    and max points in each of the equal-width x bins, in the original order.
+    NaN values are ignored.
+
+    xvals: the sorted x positions of the points.
+    yvals: the y values of the points. Could be a np.memmap.
+    num_bins: number of x bins, e.g., the pixel width of the axes.
+    chunk_size: the maximum number of points loaded at once. Default to be
+        DECIMATE_CHUNK_SIZE.
+
+    return: the decimated x positions and y values.
+    """
+    num_points = len(yvals)
+    if num_points <= 2 * num_bins + 2:
+        return np.asarray(xvals), np.asarray(yvals)
+    if chunk_size is None:
+        chunk_size = DECIMATE_CHUNK_SIZE
+
+    # Bin boundaries as point indices. Empty bins collapse to the same start.
+    edges = np.linspace(xvals[0], xvals[-1], num_bins + 1)[:-1]
+    starts = np.unique(np.searchsorted(xvals, edges, side='left'))
+
+    indices = [np.array([0, num_points - 1])]
+    bidx = 0
+    while bidx < len(starts):
+        # A block of consecutive bins, with at least one bin.
+        bend = max(np.searchsorted(starts, starts[bidx] + chunk_size,
+                                   side='right') - 1, bidx + 1)
+        lo = starts[bidx]
+        hi = starts[bend] if bend < len(starts) else num_points
+        ys = np.asarray(yvals[lo:hi], dtype=np.float64)
+
+        offsets = starts[bidx:bend] - lo
+        bin_ids = np.repeat(np.arange(bend - bidx),
+                            np.diff(np.append(offsets, hi - lo)))
+        with np.errstate(invalid='ignore'):
+            mins = np.fmin.reduceat(ys, offsets)
+            maxs = np.fmax.reduceat(ys, offsets)
+        indices.append(_first_in_bins(ys == mins[bin_ids], bin_ids) + lo)
+        indices.append(_first_in_bins(ys == maxs[bin_ids], bin_ids) + lo)
+
+        bidx = bend
+
+    indices = np.unique(np.concatenate(indices))
+    return np.asarray(xvals[indices]), np.asarray(yvals[indices])
+
+
+def _first_in_bins(mask, bin_ids):
+    """ Get the index of the first True element of the mask in each bin. Bins
+    without True element are skipped.
+    """
+    idx = np.flatnonzero(mask)
+    _, first = np.unique(bin_ids[idx], return_index=True)
+    return idx[first]
@@ -14,26 +14,210 @@ program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
 """
 
 from contextlib import contextmanager
+from io import BytesIO
+import atexit
+import os
+import threading
+import uuid
+import weakref
+try:
+    import queue
+except ImportError:
+    import Queue as queue  # Python 2.
+import matplotlib
 import matplotlib.backends.backend_pdf
+import matplotlib.figure
 import matplotlib.pyplot
 
-from .format import paper_plot
+from .format import _PAPER_CONTEXT_LOCK
+from .format import get_fig_preset, paper_plot, paper_plot_once
 
-def plot_setup(name, figsize=None, fontsize=9, font='paper', dpi=None):
+# Standalone figures created by plot_setup(), which are not managed by pyplot.
+_STANDALONE_FIGURES = weakref.WeakSet()
+_STANDALONE_FIGURES_LOCK = threading.Lock()
+
+# Finished PDFs waiting to be written by the background writer thread.
+_WRITE_QUEUE = queue.Queue()
+_WRITE_ERRORS = []
+_WRITE_THREAD = None
+_WRITE_THREAD_LOCK = threading.Lock()
+
+def _replace_file(src, dst):
+    """ Atomically rename the src file to the dst file. """
+    try:
+        os.replace(src, dst)
+    except AttributeError:
+        # Python 2, atomic on POSIX.
+        os.rename(src, dst)
+
+
+def _temp_name(name):
+    """ Get a unique temporary file name in the same directory as name. """
+    dirname, basename = os.path.split(name)
+    return os.path.join(dirname, '.{}.{}.tmp'.format(basename,
+                                                      uuid.uuid4().hex))
+
+
+def _write_file(name, data):
+    """ Write the data to the file through a temporary file and rename. """
+    tmpname = _temp_name(name)
+    try:
+        with open(tmpname, 'wb') as fh:
+            fh.write(data)
+        _replace_file(tmpname, name)
+    except BaseException:
+        if os.path.exists(tmpname):
+            os.remove(tmpname)
+        raise
+
+
+def _writer_loop():
+    """ Main loop of the background writer thread. """
+    while True:
+        name, data = _WRITE_QUEUE.get()
+        try:
+            _write_file(name, data)
+        except Exception as e:  # pylint: disable=broad-except
+            _WRITE_ERRORS.append(e)
+        finally:
+            _WRITE_QUEUE.task_done()
+
+
+def _write_behind(name, data):
+    """ Queue the data to be written to the file by the background writer
+    thread.
+    """
+    global _WRITE_THREAD  # pylint: disable=global-statement
+    with _WRITE_THREAD_LOCK:
+        if _WRITE_THREAD is None:
+            _WRITE_THREAD = threading.Thread(target=_writer_loop,
+                                             name='easypyplot-pdf-writer')
+            _WRITE_THREAD.daemon = True
+            _WRITE_THREAD.start()
+    _WRITE_QUEUE.put((name, data))
+
+
+def flush_writes():
+    """ Wait until all PDFs queued by write-behind teardowns are written.
+
+    Raise the first error of the failed writes since the last flush, if any.
+    """
+    _WRITE_QUEUE.join()
+    if _WRITE_ERRORS:
+        errors = list(_WRITE_ERRORS)
+        del _WRITE_ERRORS[:]
+        raise errors[0]
+
+# Do not lose the pending writes of the daemon writer thread at exit.
+atexit.register(_WRITE_QUEUE.join)
+
+
+class _BufferPdfPages(matplotlib.backends.backend_pdf.PdfPages):
+    """ PDF pages written into an in-memory buffer, and then either returned
+    as bytes, or written to the file name in the background if given.
+    """
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, name=None):
+        self.buffer = BytesIO()
+        self.name = name
+        super(_BufferPdfPages, self).__init__(self.buffer)
+
+
+class _AtomicPdfPages(matplotlib.backends.backend_pdf.PdfPages):
+    """ PDF pages written into a temporary file in the same directory, which is
+    renamed to the file name only when successfully finished.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.tmpname = _temp_name(name)
+        super(_AtomicPdfPages, self).__init__(self.tmpname)
+
+    def commit(self):
+        """ Rename the finished temporary file to the file name. """
+        _replace_file(self.tmpname, self.name)
+
+    def discard(self):
+        """ Remove the temporary file. """
+        if os.path.exists(self.tmpname):
+            os.remove(self.tmpname)
+
+
+def _standalone_figure(figsize=None, dpi=None):
+    """ Create a figure with a PDF canvas not managed by pyplot.
+
+    A new figure is always created rather than reusing a cleared one, since
+    clear() does not reset the figure-level state, e.g., the layout engine and
+    the patch, and the PDF canvas holds no renderer worth reusing.
+    """
+    fig = matplotlib.figure.Figure(figsize=figsize, dpi=dpi)
+    matplotlib.backends.backend_pdf.FigureCanvasPdf(fig)
+    with _STANDALONE_FIGURES_LOCK:
+        _STANDALONE_FIGURES.add(fig)
+    return fig
+
+
+def _release_figure(fig):
+    """ Clear the figure to free its artists, if it is standalone and not yet
+    released.
+    """
+    if fig is None:
+        return
+    with _STANDALONE_FIGURES_LOCK:
+        if fig not in _STANDALONE_FIGURES:
+            return
+        _STANDALONE_FIGURES.discard(fig)
+    fig.clear()
+
+
+def plot_setup(name, figsize=None, fontsize=9, font='paper', dpi=None,
+               standalone=False, writebehind=False):
     """ Setup a PDF page for plot.
 
-    name: PDF file name. If not ending with .pdf, will automatically append.
-    figsize: dimension of the plot in inches, should be an array of length two.
+    name: PDF file name (if not ending with .pdf, will automatically append),
+    or a binary file-like object (e.g., BytesIO) to write to. If None, write
+    into memory, and plot_teardown() returns the PDF bytes. A file is first
+    written as a temporary file in the same directory, and renamed to the file
+    name only when plot_teardown() succeeds.
+    figsize: dimension of the plot in inches, should be an array of length two,
+    or a preset name in format.FIG_PRESETS, e.g., 'single', which also sets the
+    default dpi.
     fontsize: fontsize for legends and labels.
     font: font for legends and labels, 'paper' uses Times New Roman, 'default'
     uses default, a tuple of (family, font, ...) customizes font.
     dpi: resolution of the figure.
+    standalone: if True, create the figure directly with a PDF canvas rather
+    than through pyplot, so it is not registered in pyplot's global figure
+    manager. The figure is cleared at teardown to free its artists, and must
+    not be used afterwards.
+    writebehind: if True and name is a file name, render into memory, and
+    write the file in a background thread after plot_teardown(), overlapping
+    with drawing the next figure. Use flush_writes() to wait for the writes.
     """
     paper_plot(fontsize=fontsize, font=font)
-    if not name.endswith('.pdf'):
-        name += '.pdf'
-    pdfpage = matplotlib.backends.backend_pdf.PdfPages(name)
-    fig = matplotlib.pyplot.figure(figsize=figsize, dpi=dpi)
+    return _plot_setup(name, figsize=figsize, dpi=dpi, standalone=standalone,
+                       writebehind=writebehind)
+
+
+def _plot_setup(name, figsize, dpi, standalone, writebehind):
+    """ Setup a PDF page and the figure, without applying the settings. """
+    figsize, dpi = get_fig_preset(figsize, dpi)
+    if name is None:
+        pdfpage = _BufferPdfPages()
+    elif hasattr(name, 'write'):
+        pdfpage = matplotlib.backends.backend_pdf.PdfPages(name)
+    else:
+        if not name.endswith('.pdf'):
+            name += '.pdf'
+        if writebehind:
+            pdfpage = _BufferPdfPages(name)
+        else:
+            pdfpage = _AtomicPdfPages(name)
+    if standalone:
+        fig = _standalone_figure(figsize=figsize, dpi=dpi)
+    else:
+        fig = matplotlib.pyplot.figure(figsize=figsize, dpi=dpi)
     return pdfpage, fig
 
 
@@ -41,25 +225,265 @@ def plot_teardown(pdfpage, fig=None):
     """ Tear down a PDF page after plotting.
 
     pdfpage: PDF page.
-    fig: the figure to save.
+    fig: the figure to save. Must be given for standalone figures.
+
+    return: the PDF bytes if the page is set up to write into memory,
+    otherwise None.
     """
-    pdfpage.savefig(fig)
-    pdfpage.close()
+    try:
+        pdfpage.savefig(fig)
+    except BaseException:
+        _plot_abort(pdfpage, fig)
+        raise
+    return _plot_finish(pdfpage, fig)
+
+
+def _plot_finish(pdfpage, fig=None):
+    """ Close the PDF page after the figure is saved. """
+    try:
+        pdfpage.close()
+    except BaseException:
+        if isinstance(pdfpage, _AtomicPdfPages):
+            pdfpage.discard()
+        _release_figure(fig)
+        raise
+    _release_figure(fig)
+    if isinstance(pdfpage, _AtomicPdfPages):
+        pdfpage.commit()
+    elif isinstance(pdfpage, _BufferPdfPages):
+        if pdfpage.name is None:
+            return pdfpage.buffer.getvalue()
+        _write_behind(pdfpage.name, pdfpage.buffer.getvalue())
+    return None
+
+
+def _plot_abort(pdfpage, fig=None):
+    """ Abort a PDF page without saving the figure, leaving no file behind. """
+    try:
+        pdfpage.close()
+    finally:
+        if isinstance(pdfpage, _AtomicPdfPages):
+            pdfpage.discard()
+        _release_figure(fig)
 
 
 @contextmanager
-def plot_open(name, figsize=None, fontsize=9, font='paper', dpi=None):
+def plot_open(name, figsize=None, fontsize=9, font='paper', dpi=None,
+              standalone=False, writebehind=False):
     """ Open a context of PDF page for plot, used for the `with` statement.
 
-    name: PDF file name. If not ending with .pdf, will automatically append.
-    figsize: dimension of the plot in inches, should be an array of length two.
+    name: PDF file name (if not ending with .pdf, will automatically append),
+    or a binary file-like object (e.g., BytesIO) to write to.
+    figsize: dimension of the plot in inches, should be an array of length two,
+    or a preset name in format.FIG_PRESETS, e.g., 'single', which also sets the
+    default dpi.
     fontsize: fontsize for legends and labels.
     font: font for legends and labels, 'paper' uses Times New Roman, 'default'
     uses default, a tuple of (family, font, ...) customizes font.
     dpi: resolution of the figure.
+    standalone: if True, create the figure without pyplot, see plot_setup().
+    writebehind: if True, write the file in the background, see plot_setup().
+
+    If an exception is raised inside the context, the PDF page is closed
+    without saving the figure.
+
+    To get the PDF bytes, use plot_setup() with name None and plot_teardown(),
+    or plot_bytes().
     """
+    if name is None:
+        raise ValueError('[pdf] plot_open: name must not be None, since the '
+                         'PDF bytes cannot be returned from the context. Use '
+                         'plot_setup() and plot_teardown(), or plot_bytes().')
     pdfpage, fig = plot_setup(name, figsize=figsize, fontsize=fontsize,
-                              font=font, dpi=dpi)
-    yield fig
+                              font=font, dpi=dpi, standalone=standalone,
+                              writebehind=writebehind)
+    try:
+        yield fig
+    except BaseException:
+        _plot_abort(pdfpage, fig)
+        raise
     plot_teardown(pdfpage, fig)
 
+
+def plot_bytes(fig):
+    """ Render the figure into a PDF in memory, and return the PDF bytes. The
+    figure is left intact, even if it is standalone.
+
+    fig: the figure to render.
+    """
+    pdfpage = _BufferPdfPages()
+    try:
+        pdfpage.savefig(fig)
+    finally:
+        pdfpage.close()
+    return pdfpage.buffer.getvalue()
+
+
+# Executor to render and write PDFs for the asynchronous API, created lazily.
+_ASYNC_MAX_WORKERS = 2
+_ASYNC_EXECUTOR = None
+_ASYNC_EXECUTOR_LOCK = threading.Lock()
+
+def set_async_max_workers(max_workers):
+    """ Set the maximum number of PDFs processed concurrently by the
+    asynchronous API. Renders already submitted are not affected.
+
+    Rendering reads the process-global rcParams, so it holds the lock of
+    format.paper_context(), and only one PDF is rendered at a time. The other
+    workers overlap closing and writing the files.
+
+    max_workers: a positive integer.
+    """
+    global _ASYNC_MAX_WORKERS, _ASYNC_EXECUTOR  # pylint: disable=global-statement
+    if max_workers < 1:
+        raise ValueError('[pdf] max_workers must be positive')
+    with _ASYNC_EXECUTOR_LOCK:
+        executor = _ASYNC_EXECUTOR
+        _ASYNC_MAX_WORKERS = max_workers
+        _ASYNC_EXECUTOR = None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+def _async_executor():
+    """ Get the executor of the asynchronous API. """
+    global _ASYNC_EXECUTOR  # pylint: disable=global-statement
+    with _ASYNC_EXECUTOR_LOCK:
+        if _ASYNC_EXECUTOR is None:
+            import concurrent.futures
+            _ASYNC_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+                max_workers=_ASYNC_MAX_WORKERS)
+        return _ASYNC_EXECUTOR
+
+
+def _event_loop():
+    """ Get the running (or current) asyncio event loop. """
+    import asyncio
+    try:
+        return asyncio.get_running_loop()
+    except (AttributeError, RuntimeError):
+        # Before Python 3.7, or not called from a coroutine.
+        return asyncio.get_event_loop()
+
+
+def _wrap_async(cfuture):
+    """ Wrap a concurrent future as an awaitable asyncio future, which
+    propagates cancellation to the concurrent future.
+    """
+    import asyncio
+    return asyncio.wrap_future(cfuture, loop=_event_loop())
+
+
+def plot_setup_async(name, figsize=None, fontsize=9, font='paper', dpi=None,
+                     standalone=True, writebehind=False):
+    """ Asynchronous counterpart of plot_setup(). Must be called with a running
+    asyncio event loop.
+
+    The setup is cheap, and runs on the event loop thread, which also creates
+    the artists. The settings are applied by format.paper_plot_once(). With
+    unchanged settings, the setup does not wait for the renders in the
+    executor; only changing the settings waits for the render in progress, if
+    any, to finish. The figure is standalone by default, see plot_setup().
+
+    See plot_setup() for the arguments.
+
+    return: an awaitable of (pdfpage, fig).
+    """
+    future = _event_loop().create_future()
+    try:
+        paper_plot_once(fontsize=fontsize, font=font)
+        future.set_result(_plot_setup(
+            name, figsize=figsize, dpi=dpi, standalone=standalone,
+            writebehind=writebehind))
+    except Exception as e:  # pylint: disable=broad-except
+        future.set_exception(e)
+    return future
+
+
+def _plot_teardown_locked(pdfpage, fig=None):
+    """ plot_teardown() in the executor, rendering under the lock of
+    format.paper_context(), so that the settings do not change meanwhile.
+    """
+    with _PAPER_CONTEXT_LOCK:
+        try:
+            pdfpage.savefig(fig)
+        except BaseException:
+            _plot_abort(pdfpage, fig)
+            raise
+    return _plot_finish(pdfpage, fig)
+
+
+def plot_teardown_async(pdfpage, fig=None):
+    """ Asynchronous counterpart of plot_teardown(), which renders and writes
+    the PDF in the executor. Must be called with a running asyncio event loop.
+
+    If cancelled before rendering starts, the PDF page is closed without saving
+    the figure. Once started, rendering runs to completion.
+
+    pdfpage: PDF page.
+    fig: the figure to save. Must be given for standalone figures.
+
+    return: an awaitable of the result of plot_teardown().
+    """
+    executor = _async_executor()
+    cfuture = executor.submit(_plot_teardown_locked, pdfpage, fig)
+
+    def _abort_if_cancelled(cfuture):
+        if cfuture.cancelled():
+            executor.submit(_plot_abort, pdfpage, fig)
+    cfuture.add_done_callback(_abort_if_cancelled)
+    return _wrap_async(cfuture)
+
+
+class plot_open_async(object):  # pylint: disable=invalid-name
+    """ Open a context of PDF page for plot, used for the `async with`
+    statement. Asynchronous counterpart of plot_open().
+
+    If an exception is raised or the task is cancelled inside the context, the
+    PDF page is closed without saving the figure.
+
+    See plot_setup_async() for the arguments.
+    """
+
+    def __init__(self, name, figsize=None, fontsize=9, font='paper', dpi=None,
+                 standalone=True, writebehind=False):
+        if name is None:
+            raise ValueError('[pdf] plot_open_async: name must not be None, '
+                             'since the PDF bytes cannot be returned from '
+                             'the context. Use plot_setup_async() and '
+                             'plot_teardown_async().')
+        self.kwargs = dict(figsize=figsize, fontsize=fontsize, font=font,
+                           dpi=dpi, standalone=standalone,
+                           writebehind=writebehind)
+        self.name = name
+        self.pdfpage = None
+        self.fig = None
+
+    def __aenter__(self):
+        future = plot_setup_async(self.name, **self.kwargs)
+        fig_future = _event_loop().create_future()
+
+        def _enter(future):
+            if future.cancelled():
+                fig_future.cancel()
+            elif future.exception() is not None:
+                fig_future.set_exception(future.exception())
+            elif fig_future.cancelled():
+                _async_executor().submit(_plot_abort, *future.result())
+            else:
+                self.pdfpage, self.fig = future.result()
+                fig_future.set_result(self.fig)
+
+        def _cancel(fig_future):
+            if fig_future.cancelled():
+                future.cancel()
+
+        future.add_done_callback(_enter)
+        fig_future.add_done_callback(_cancel)
+        return fig_future
+
+    def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            return plot_teardown_async(self.pdfpage, self.fig)
+        return _wrap_async(_async_executor().submit(
+            _plot_abort, self.pdfpage, self.fig))
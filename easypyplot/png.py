@@ -0,0 +1,128 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from io import BytesIO
+import threading
+import matplotlib.backend_bases
+import matplotlib.figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from .format import _PAPER_CONTEXT_LOCK
+from .format import get_fig_preset, paper_plot_once
+
+# Idle Agg canvases keyed by the figure dimension in pixels and dpi. The
+# renderer of a canvas, including its RGBA buffer, is reused as long as the
+# dimension does not change.
+_CANVAS_POOL = OrderedDict()
+_CANVAS_POOL_SIZE = 4
+_CANVAS_POOL_LOCK = threading.Lock()
+
+def _canvas_key(fig):
+    """ Get the key of the figure in the canvas pool. """
+    width, height = fig.bbox.size
+    return (int(width), int(height), fig.dpi)
+
+
+def _acquire_canvas(fig):
+    """ Get an Agg canvas for the figure, reusing an idle one if possible. """
+    with _CANVAS_POOL_LOCK:
+        canvas = _CANVAS_POOL.pop(_canvas_key(fig), None)
+    if canvas is None:
+        return FigureCanvasAgg(fig)
+    canvas.figure = fig
+    fig.set_canvas(canvas)
+    return canvas
+
+
+def _release_canvas(fig, canvas):
+    """ Detach the canvas from the figure and put it back to the pool. """
+    fig.set_canvas(matplotlib.backend_bases.FigureCanvasBase(fig))
+    with _CANVAS_POOL_LOCK:
+        _CANVAS_POOL[_canvas_key(fig)] = canvas
+        while len(_CANVAS_POOL) > _CANVAS_POOL_SIZE:
+            _CANVAS_POOL.popitem(last=False)
+
+
+def plot_setup(figsize=None, fontsize=9, font='paper', dpi=None):
+    """ Setup a figure for PNG plot, without going through pyplot.
+
+    figsize: dimension of the plot in inches, should be an array of length two,
+    or a preset name in format.FIG_PRESETS, e.g., 'single', which also sets the
+    default dpi.
+    fontsize: fontsize for legends and labels.
+    font: font for legends and labels, 'paper' uses Times New Roman, 'default'
+    uses default, a tuple of (family, font, ...) customizes font.
+    dpi: resolution of the figure.
+
+    The settings are applied to the global rcParams by format.paper_plot(),
+    only when they differ from the last applied ones, see
+    format.paper_plot_once().
+    """
+    paper_plot_once(fontsize=fontsize, font=font)
+    return _figure(figsize, dpi)
+
+
+def _figure(figsize, dpi):
+    """ Create a figure not managed by pyplot. """
+    figsize, dpi = get_fig_preset(figsize, dpi)
+    return matplotlib.figure.Figure(figsize=figsize, dpi=dpi)
+
+
+def plot_teardown(fig, target=None):
+    """ Render the figure to PNG after plotting.
+
+    fig: the figure to render.
+    target: a PNG file name (if not ending with .png, will automatically
+    append), or a binary file-like object. If None, return the PNG bytes.
+    """
+    if isinstance(target, str) and not target.endswith('.png'):
+        target += '.png'
+    canvas = _acquire_canvas(fig)
+    try:
+        if target is None:
+            buf = BytesIO()
+            canvas.print_png(buf)
+            return buf.getvalue()
+        canvas.print_png(target)
+        return None
+    finally:
+        _release_canvas(fig, canvas)
+
+
+@contextmanager
+def plot_open(target, figsize=None, fontsize=9, font='paper', dpi=None):
+    """ Open a context of PNG figure for plot, used for the `with` statement.
+
+    target: a PNG file name (if not ending with .png, will automatically
+    append), or a binary file-like object.
+    figsize: dimension of the plot in inches, should be an array of length two,
+    or a preset name in format.FIG_PRESETS, e.g., 'single', which also sets the
+    default dpi.
+    fontsize: fontsize for legends and labels.
+    font: font for legends and labels, 'paper' uses Times New Roman, 'default'
+    uses default, a tuple of (family, font, ...) customizes font.
+    dpi: resolution of the figure.
+
+    The settings are applied as in plot_setup(). The lock of
+    format.paper_context() is only held while applying changed settings and
+    while rendering, so that other threads can draw meanwhile, and the
+    settings do not change during rendering.
+    """
+    fig = plot_setup(figsize=figsize, fontsize=fontsize, font=font, dpi=dpi)
+    yield fig
+    with _PAPER_CONTEXT_LOCK:
+        plot_teardown(fig, target)
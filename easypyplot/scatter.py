@@ -0,0 +1,182 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import numpy as np
+import matplotlib.colors
+
+from .color import COLOR_SET, color_scale
+from .util import data_range
+
+# Maximum number of points loaded into memory at once, so that memory-mapped
+# arrays are read block by block.
+POINT_CHUNK_SIZE = 1 << 22
+
+def draw(axes,
+         xvals, yvals, xrange=None, yrange=None, bins=True,
+         color=None, logscale=True, sparse=1, markersize=2,
+         colorbar=False):
+    """ A scatter plot drawing wrapper for huge point clouds, drawn as a
+    single density image.
+
+    axes: the axes instance to be drawn on.
+
+    xvals, yvals: 1-dimension arrays of the point coordinates. Could be
+        np.memmap, which are only read block by block.
+    xrange, yrange: the (lo, hi) ranges of the grid. Default to be the data
+        ranges, which takes an extra pass over the data.
+    bins: if True, the grid matches the pixel resolution of the axes. Could
+        also be a tuple of the (columns, rows) of the grid.
+
+    color: the reference color of the density color scale, see
+        color.color_scale(). Denser cells are darker.
+    logscale: whether to use log scale for the density colors.
+    sparse: the cells with no more than this number of points are not
+        colored, but their individual points are drawn instead. 0 to disable.
+    markersize: the size of the individual points.
+
+    colorbar: whether to add a colorbar of the density next to the axes.
+
+    return: the image instance, and the collection of the individual points
+        (None if there is no sparse cell).
+    """
+    # pylint: disable=too-many-locals
+
+    if len(xvals) != len(yvals):
+        raise ValueError('[scatter] xvals and yvals must have the same size')
+
+    if bins is True:
+        num_cols = max(int(axes.bbox.width), 1)
+        num_rows = max(int(axes.bbox.height), 1)
+    else:
+        try:
+            num_cols, num_rows = (int(v) for v in bins)
+        except (TypeError, ValueError):
+            raise ValueError('[scatter] bins must be True or a tuple of '
+                             '(columns, rows)')
+        if num_cols < 1 or num_rows < 1:
+            raise ValueError('[scatter] bins must be positive')
+
+    if xrange is None:
+        xrange = _data_range(xvals)
+    if yrange is None:
+        yrange = _data_range(yvals)
+
+    if color is None:
+        color = COLOR_SET[0]
+
+    ############################################################################
+    # Aggregate points into the density grid
+    grid = density_grid(xvals, yvals, xrange, yrange, num_cols, num_rows)
+
+    # Empty and sparse cells are transparent.
+    image = np.ma.masked_less_equal(grid, max(sparse, 0))
+
+    cmap = matplotlib.colors.ListedColormap(color_scale(color, 256)[::-1])
+    vmax = max(grid.max(), 1)
+    if logscale:
+        norm = matplotlib.colors.LogNorm(vmin=1, vmax=vmax)
+    else:
+        norm = matplotlib.colors.Normalize(vmin=0, vmax=vmax)
+
+    img = axes.imshow(image, cmap=cmap, norm=norm, aspect='auto',
+                      interpolation='nearest', origin='lower',
+                      extent=(xrange[0], xrange[1], yrange[0], yrange[1]))
+
+    ############################################################################
+    # Overlay the individual points in the sparse cells
+    points = None
+    if sparse > 0 and np.any((grid > 0) & (grid <= sparse)):
+        sparse_xs, sparse_ys = _sparse_points(
+            xvals, yvals, xrange, yrange, grid, sparse)
+        points = axes.scatter(sparse_xs, sparse_ys, s=markersize,
+                              c=[cmap(0)], marker='.', linewidths=0)
+
+    ############################################################################
+    # Axes options
+
+    axes.set_xlim(xrange)
+    axes.set_ylim(yrange)
+
+    if colorbar:
+        axes.figure.colorbar(img, ax=axes)
+
+    return img, points
+
+
+def density_grid(xvals, yvals, xrange, yrange, num_cols, num_rows):
+    """ Count the points in each cell of an equal-spaced grid, chunk by chunk.
+    Points out of the ranges, or NaN, are ignored.
+
+    xvals, yvals: 1-dimension arrays of the point coordinates.
+    xrange, yrange: the (lo, hi) ranges of the grid.
+    num_cols, num_rows: the shape of the grid.
+
+    return: the counts, as an array of shape (num_rows, num_cols).
+    """
+    counts = np.zeros(num_rows * num_cols)
+    for start in range(0, len(xvals), POINT_CHUNK_SIZE):
+        stop = start + POINT_CHUNK_SIZE
+        cells, _ = _cell_indices(xvals[start:stop], yvals[start:stop],
+                                 xrange, yrange, num_cols, num_rows)
+        counts += np.bincount(cells, minlength=num_rows * num_cols)
+    return counts.reshape(num_rows, num_cols)
+
+
+def _cell_indices(xs, ys, xrange, yrange, num_cols, num_rows):
+    """ The flat grid cell indices of the valid points, and the mask of the
+    valid points.
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        valid = (xs >= xrange[0]) & (xs <= xrange[1]) \
+                & (ys >= yrange[0]) & (ys <= yrange[1])
+    xspan = float(xrange[1] - xrange[0]) or 1.
+    yspan = float(yrange[1] - yrange[0]) or 1.
+    cols = ((xs[valid] - xrange[0]) * (num_cols / xspan)).astype(np.intp)
+    rows = ((ys[valid] - yrange[0]) * (num_rows / yspan)).astype(np.intp)
+    # The upper edges belong to the last cells.
+    np.minimum(cols, num_cols - 1, out=cols)
+    np.minimum(rows, num_rows - 1, out=rows)
+    return rows * num_cols + cols, valid
+
+
+def _sparse_points(xvals, yvals, xrange, yrange, grid, sparse):
+    """ Collect the points in the cells with no more than sparse points. """
+    num_rows, num_cols = grid.shape
+    is_sparse = (grid <= sparse).ravel()
+    sparse_xs = []
+    sparse_ys = []
+    for start in range(0, len(xvals), POINT_CHUNK_SIZE):
+        stop = start + POINT_CHUNK_SIZE
+        xs = np.asarray(xvals[start:stop], dtype=np.float64)
+        ys = np.asarray(yvals[start:stop], dtype=np.float64)
+        cells, valid = _cell_indices(xs, ys, xrange, yrange,
+                                     num_cols, num_rows)
+        selected = is_sparse[cells]
+        sparse_xs.append(xs[valid][selected])
+        sparse_ys.append(ys[valid][selected])
+    return np.concatenate(sparse_xs), np.concatenate(sparse_ys)
+
+
+def _data_range(data):
+    """ The data range of the points, widened if all points are the same. """
+    lo_hi = data_range(data, POINT_CHUNK_SIZE)
+    if lo_hi is None:
+        raise ValueError('[scatter] no valid points to decide the range')
+    lo, hi = lo_hi
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    return lo, hi
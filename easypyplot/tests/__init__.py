@@ -15,17 +15,26 @@ program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
 
 from collections import OrderedDict
 import functools
+import hashlib
+import inspect
+import json
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 import os
 import re
 import shutil
 import subprocess
 import sys
+import tempfile
+import threading
 import unittest
 import warnings
 
 import numpy as np
 import matplotlib
+import matplotlib.colors
 import matplotlib.font_manager as mlpfm
+import matplotlib.patches
 import matplotlib.pyplot as plt
 import matplotlib.testing
 import matplotlib.testing.compare as mplcmp
@@ -172,6 +181,269 @@ def mpl_testing_teardown(origs):
     warnings.resetwarnings()
 
 
+# Persistent cache of the baseline images converted to PNG. Override the
+# location with the environment variable EASYPYPLOT_BASELINE_CACHE. The default
+# location is not under the matplotlib cache directory, which
+# format.paper_plot() clears.
+_BASELINE_CACHE_ENV = 'EASYPYPLOT_BASELINE_CACHE'
+
+# Versions of the external converters, keyed by extension.
+_CONVERTER_VERSIONS = {}
+
+# Locks of the external converters, keyed by the converter instance.
+_CONVERTER_LOCKS = {}
+_CONVERTER_LOCKS_LOCK = threading.Lock()
+
+def _baseline_cache_dir():
+    ''' Get the directory of the converted baseline cache. '''
+    cache_dir = os.environ.get(_BASELINE_CACHE_ENV)
+    if not cache_dir:
+        cache_home = os.environ.get('XDG_CACHE_HOME') \
+                or os.path.join(os.path.expanduser('~'), '.cache')
+        cache_dir = os.path.join(cache_home, 'easypyplot', 'baseline')
+    try:
+        os.makedirs(cache_dir)
+    except OSError:
+        if not os.path.isdir(cache_dir):
+            raise
+    return cache_dir
+
+
+def _converter_version(extension):
+    ''' Get the version string of the converter for the extension, including
+    matplotlib which drives the converter. '''
+    try:
+        return _CONVERTER_VERSIONS[extension]
+    except KeyError:
+        pass
+    cmd = {'pdf': ['gs', '--version'],
+           'eps': ['gs', '--version'],
+           'svg': ['inkscape', '-V']}.get(extension)
+    ver = 'none'
+    if cmd:
+        try:
+            with open(os.devnull, 'w') as fnull:  # pylint: disable=unspecified-encoding
+                ver = subprocess.check_output(
+                    cmd, stderr=fnull, universal_newlines=True).strip()
+        except (OSError, subprocess.CalledProcessError):
+            ver = 'unknown'
+    ver = '{}-{}'.format(matplotlib.__version__, ver)
+    _CONVERTER_VERSIONS[extension] = ver
+    return ver
+
+
+def _converter_lock(extension):
+    ''' Get the lock to serialize the conversions of the extension.
+
+    matplotlib keeps one long-lived converter process (e.g., gs or inkscape)
+    per converter and talks to it through pipes without locking, so
+    concurrent conversions by the same converter would mix up its input and
+    output. Extensions sharing a converter share the lock. '''
+    key = id(mplcmp.converter.get(extension))
+    with _CONVERTER_LOCKS_LOCK:
+        return _CONVERTER_LOCKS.setdefault(key, threading.Lock())
+
+
+def _convert(fname, extension):
+    ''' Convert the image to PNG, one at a time per converter. '''
+    with _converter_lock(extension):
+        return mplcmp.convert(fname, False)
+
+
+def _converted_fname(fname):
+    ''' The name of the PNG file converted from fname by matplotlib. '''
+    base, extension = os.path.splitext(fname)
+    return '{}_{}.png'.format(base, extension[1:])
+
+
+def _convert_baseline(expected_fname, extension):
+    ''' Convert the copied baseline image to PNG, reusing the cached result
+    keyed by the file content hash and the converter version. '''
+    hasher = hashlib.sha256()
+    with open(expected_fname, 'rb') as fh:
+        hasher.update(fh.read())
+    hasher.update(_converter_version(extension).encode('utf-8'))
+    cached_fname = os.path.join(_baseline_cache_dir(),
+                                hasher.hexdigest() + '.png')
+    converted_fname = _converted_fname(expected_fname)
+
+    if os.path.exists(cached_fname):
+        # Newer than the copied baseline, so matplotlib does not convert again.
+        shutil.copyfile(cached_fname, converted_fname)
+        return converted_fname
+
+    converted_fname = _convert(expected_fname, extension)
+    # Write to a temporary file and rename, for concurrent test processes.
+    fd, tmp_fname = tempfile.mkstemp(suffix='.png', dir=_baseline_cache_dir())
+    os.close(fd)
+    shutil.copyfile(converted_fname, tmp_fname)
+    os.rename(tmp_fname, cached_fname)
+    return converted_fname
+
+
+def _convert_images(jobs):
+    ''' Convert the images to PNG in parallel. Each job is a tuple of file name,
+    extension, and whether it is a baseline image. Conversions by the same
+    converter are serialized, but they overlap with the cache lookups and the
+    conversions by other converters. '''
+    def _convert_job(job):
+        fname, extension, is_baseline = job
+        if is_baseline:
+            return _convert_baseline(fname, extension)
+        return _convert(fname, extension)
+
+    if len(jobs) <= 1:
+        return [_convert_job(job) for job in jobs]
+    # Converters are external processes, so threads are enough.
+    pool = ThreadPool(min(len(jobs), multiprocessing.cpu_count()))
+    try:
+        return pool.map(_convert_job, jobs)
+    finally:
+        pool.close()
+        pool.join()
+
+
+# Test mode, from the environment variable EASYPYPLOT_TEST_MODE. 'snapshot'
+# only compares geometry snapshots for the tests that have them, and skips
+# their pixel comparison. 'full' (default) runs both.
+_TEST_MODE_ENV = 'EASYPYPLOT_TEST_MODE'
+
+# If set, write the geometry snapshots as the new baselines instead of
+# comparing.
+_UPDATE_SNAPSHOTS_ENV = 'EASYPYPLOT_UPDATE_SNAPSHOTS'
+
+def _snapshot_only():
+    ''' Whether to skip pixel comparison for tests with snapshots. '''
+    return os.environ.get(_TEST_MODE_ENV, 'full') == 'snapshot'
+
+
+def _to_rgba(color):
+    ''' Convert the color to an RGBA tuple. '''
+    if easypyplot.util.mpl_supports('colors.to_rgb'):
+        return matplotlib.colors.to_rgba(color)
+    return matplotlib.colors.ColorConverter().to_rgba(color)
+
+
+def _snapshot_text(text):
+    ''' Snapshot of a text artist. '''
+    return {'text': text.get_text(),
+            'position': [float(v) for v in text.get_position()],
+            'fontsize': float(text.get_fontsize()),
+            'style': text.get_style(),
+            'weight': str(text.get_weight()),
+            'rotation': float(text.get_rotation()),
+            'color': list(_to_rgba(text.get_color())),
+           }
+
+
+def _snapshot_axes(axes):
+    ''' Snapshot of the geometry and properties of the artists in the axes. '''
+    rects = [p for p in axes.patches
+             if isinstance(p, matplotlib.patches.Rectangle)]
+    # Hatches drawn as separate polygons, e.g., by barchart.
+    hatches = [p for p in axes.patches
+               if isinstance(p, matplotlib.patches.Polygon) and p.get_hatch()]
+    snapshot = {
+        'position': list(axes.get_position().bounds),
+        'xlim': list(axes.get_xlim()),
+        'ylim': list(axes.get_ylim()),
+        'xscale': axes.get_xscale(),
+        'yscale': axes.get_yscale(),
+        'rects': [[p.get_x(), p.get_y(), p.get_width(), p.get_height()]
+                  for p in rects],
+        'rect_facecolors': [list(p.get_facecolor()) for p in rects],
+        'rect_edgecolors': [list(p.get_edgecolor()) for p in rects],
+        'rect_linewidths': [p.get_linewidth() for p in rects],
+        'rect_hatches': [p.get_hatch() or '' for p in rects],
+        'hatch_polygons': [np.asarray(p.get_xy()).tolist() for p in hatches],
+        'hatch_patterns': [p.get_hatch() for p in hatches],
+        'hatch_colors': [list(p.get_edgecolor()) for p in hatches],
+        'lines': [np.asarray(l.get_xydata()).tolist() for l in axes.lines],
+        'texts': [_snapshot_text(t) for t in axes.texts],
+        'xticks': list(axes.get_xticks()),
+        'xticklabels': [_snapshot_text(t) for t in axes.get_xticklabels()],
+        'yticks': list(axes.get_yticks()),
+    }
+    legend = axes.get_legend()
+    if legend is not None:
+        snapshot['legend'] = [_snapshot_text(t) for t in legend.get_texts()]
+    return snapshot
+
+
+def _jsonable(obj):
+    ''' Convert numpy scalars and tuples to built-in JSON types. '''
+    if isinstance(obj, dict):
+        return {k: _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple, np.ndarray)):
+        return [_jsonable(v) for v in obj]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
+def figure_snapshot(figure):
+    ''' Serialize the artist geometry and properties of the figure into a
+    JSON-compatible structure, used to compare layouts without rendering. '''
+    return _jsonable({'size': figure.get_size_inches(),
+                      'axes': [_snapshot_axes(ax) for ax in figure.get_axes()]})
+
+
+def compare_snapshots(expected, actual, rtol=1e-6, atol=1e-6, path='figure'):
+    ''' Compare two snapshots numerically with tolerances.
+
+    Return None if they are close, otherwise a message of the first
+    difference.
+    '''
+    if isinstance(expected, dict):
+        if not isinstance(actual, dict) or sorted(expected) != sorted(actual):
+            return '{}: keys differ, {} vs. {}'.format(
+                path, sorted(expected), sorted(actual) if isinstance(actual, dict)
+                else actual)
+        for key in sorted(expected):
+            err = compare_snapshots(expected[key], actual[key], rtol, atol,
+                                    '{}.{}'.format(path, key))
+            if err:
+                return err
+        return None
+    if isinstance(expected, list):
+        if not isinstance(actual, list) or len(expected) != len(actual):
+            return '{}: lengths differ, {} vs. {}'.format(path, expected, actual)
+        for idx, (exp, act) in enumerate(zip(expected, actual)):
+            err = compare_snapshots(exp, act, rtol, atol,
+                                    '{}[{}]'.format(path, idx))
+            if err:
+                return err
+        return None
+    if isinstance(expected, (int, float)) and not isinstance(expected, bool) \
+            and isinstance(actual, (int, float)) and not isinstance(actual, bool):
+        if np.isclose(expected, actual, rtol=rtol, atol=atol, equal_nan=True):
+            return None
+        return '{}: values differ, {} vs. {}'.format(path, expected, actual)
+    if expected != actual:
+        return '{}: values differ, {!r} vs. {!r}'.format(path, expected, actual)
+    return None
+
+
+def _snapshot_directory(func):
+    ''' The baseline snapshot directory for the test function.
+
+    Snapshots depend on the matplotlib version, e.g., ticks and tick label
+    texts, so the baselines are kept per matplotlib major and minor version.
+    '''
+    module_path = os.path.abspath(inspect.getfile(func))
+    module_name = os.path.splitext(os.path.basename(module_path))[0]
+    mpl_version = 'mpl{}.{}'.format(
+        *easypyplot.util.matplotlib_version_tuple()[:2])
+    return os.path.join(os.path.dirname(module_path), 'baseline_snapshots',
+                        module_name, mpl_version)
+
+
+def _has_snapshots(func):
+    ''' Whether there are baseline snapshots of the test function for the
+    current matplotlib version. '''
+    return os.path.isdir(_snapshot_directory(func))
+
+
 class _ImageComparisonBase(unittest.TestCase):
     '''
     Base TestCase class used to replace original test function.
@@ -241,21 +513,58 @@ class _ImageComparisonBase(unittest.TestCase):
                                         'gs {} command line interface change of '
                                         '-dNOSAFER.'.format(gs_ver_str))
 
-    def compare(self, baseline_images, actual_suffix, extension, tol):
+    @classmethod
+    def prepare(cls, save_figures, baseline_images, actual_suffix, extensions):
+        ''' Save the images of all extensions by save_figures(extension), copy
+        the baseline images, and convert them all to PNG up front, so that the
+        conversions of different extensions (i.e., different converters) run in
+        parallel. compare_images() then finds the converted files up to date.
+
+        Errors are kept and raised by the test of the extension. '''
+        cls.fname_pairs = {}
+        cls.prepare_errors = {}
+        jobs = []
+        for extension in extensions:
+            try:
+                cls.mark_extension(extension)
+            except unittest.SkipTest:
+                continue
+            try:
+                save_figures(extension)
+                pairs = [cls._fname_pair(baseline, actual_suffix, extension)
+                         for baseline in baseline_images]
+            except Exception as e:  # pylint: disable=broad-except
+                cls.prepare_errors[extension] = e
+                continue
+            cls.fname_pairs[extension] = pairs
+            if extension == 'png':
+                continue
+            for _, expected_fname, actual_fname in pairs:
+                if os.path.exists(expected_fname) \
+                        and os.path.exists(actual_fname):
+                    jobs.append((expected_fname, extension, True))
+                    jobs.append((actual_fname, extension, False))
+        try:
+            _convert_images(jobs)
+        except Exception:  # pylint: disable=broad-except
+            # compare_images() converts again, and reports the error in the
+            # test of the extension.
+            pass
+
+    def compare(self, extension, tol):
         ''' Compare actual images with baseline images. '''
         __tracebackhide__ = True  # pylint: disable=unused-variable
 
         cls = self.__class__
 
-        for baseline in baseline_images:
-            actual_fname = os.path.join(
-                cls.result_dir, baseline + actual_suffix + '.' + extension)
+        for baseline_fname, expected_fname, actual_fname \
+                in cls.fname_pairs[extension]:
             self.assertTrue(os.path.exists(actual_fname),
                             'Image does not exist: {}'.format(actual_fname))
-
-            expected_fname = self._copy_baseline(baseline, extension)
             self.assertTrue(os.path.exists(expected_fname),
-                            'Image does not exist: {}'.format(expected_fname))
+                            'Do not have baseline image {0} '
+                            'because this file does not exist: {1}'
+                            .format(expected_fname, baseline_fname))
 
             err = mplcmp.compare_images(expected_fname, actual_fname, tol)
             self.assertFalse(err, 'Images are not close\n{}'.format(err))
@@ -265,12 +574,12 @@ class _ImageComparisonBase(unittest.TestCase):
         raise NotImplementedError('{}: _image_directories'
                                   .format(cls.__name__))
 
-    def _copy_baseline(self, baseline, extension):
-        ''' Copy baseline image with given extension to result directory. '''
-        __tracebackhide__ = True  # pylint: disable=unused-variable
-
-        cls = self.__class__
+    @classmethod
+    def _fname_pair(cls, baseline, actual_suffix, extension):
+        ''' Copy baseline image with given extension to result directory.
 
+        Return the original baseline file name, the copied expected file name,
+        and the actual file name. '''
         base_ext = baseline + '.' + extension
 
         # Original baseline file.
@@ -281,18 +590,18 @@ class _ImageComparisonBase(unittest.TestCase):
         # Copied expected file.
         expected_fname = mplcmp.make_test_filename(os.path.join(
             cls.result_dir, os.path.basename(baseline_fname)), 'expected')
+        if os.path.exists(baseline_fname):
+            shutil.copyfile(baseline_fname, expected_fname)
 
-        self.assertTrue(os.path.exists(baseline_fname),
-                        'Do not have baseline image {0} '
-                        'because this file does not exist: {1}'
-                        .format(expected_fname, baseline_fname))
-        shutil.copyfile(baseline_fname, expected_fname)
-        return expected_fname
+        actual_fname = os.path.join(
+            cls.result_dir, baseline + actual_suffix + '.' + extension)
+        return baseline_fname, expected_fname, actual_fname
 
 
 def image_comparison(baseline_images, extensions=None, tol=0,
                      remove_text=True, savefig_kwargs=None,
-                     saved_as=None, save_suffix=''):
+                     saved_as=None, save_suffix='', snapshot=False,
+                     snapshot_tol=1e-6):
     '''
     Compare images generated by the test with those specified in
     `baseline_images`.
@@ -305,6 +614,15 @@ def image_comparison(baseline_images, extensions=None, tol=0,
     Add `save_suffix` option, which is added to the baseline name before the
     extension to be used as the actual file name, so that multiple tests can
     share the same baseline image and still be stored as different files.
+
+    Add `snapshot` option, which also compares the artist geometry and
+    properties of the figures with the baseline snapshots in
+    `baseline_snapshots/<test module>/mpl<major>.<minor>/<baseline>.json`, with
+    tolerance `snapshot_tol`. Baseline snapshots are kept per matplotlib
+    version, and the comparison is skipped if the current version has none.
+    With EASYPYPLOT_TEST_MODE=snapshot, the pixel comparison of such tests is
+    skipped when the snapshots can be compared. Set
+    EASYPYPLOT_UPDATE_SNAPSHOTS=1 to write new baseline snapshots.
     '''
     __tracebackhide__ = True  # pylint: disable=unused-variable
 
@@ -333,18 +651,25 @@ def image_comparison(baseline_images, extensions=None, tol=0,
             def setUpClass(cls):
                 super(ImageComparisonTest, cls).setUpClass()
                 func()
+                if snapshot and (_has_snapshots(func)
+                                 or os.environ.get(_UPDATE_SNAPSHOTS_ENV)):
+                    # Take snapshots before the figures are modified for
+                    # saving.
+                    cls.snapshots = [figure_snapshot(plt.figure(num))
+                                     for num in plt.get_fignums()]
+                if snapshot and _snapshot_only() and _has_snapshots(func):
+                    # Skip pixel comparison in snapshot mode.
+                    return
+                cls.prepare(save_figures, baseline_images, save_suffix,
+                            extensions)
 
             __doc__ = func.__doc__  # __doc__ must be assigned at define time.
         # __name__ and __module__ are assigned after definition.
         ImageComparisonTest.__name__ = func.__name__
         ImageComparisonTest.__module__ = func.__module__
 
-        def test(self, extension):
-            ''' Common method to compare an image with extension. '''
-
-            self.mark_extension(extension)
-
-            # Save figures.
+        def save_figures(extension):
+            ''' Save the figures with extension to the result directory. '''
             kwargs = savefig_kwargs.copy()
             if extension == 'pdf':
                 kwargs.setdefault('metadata',
@@ -352,7 +677,7 @@ def image_comparison(baseline_images, extensions=None, tol=0,
                                    'Producer': None,
                                    'CreationDate': None})
 
-            result_dir = self.__class__.result_dir
+            result_dir = ImageComparisonTest.result_dir
 
             if len(plt.get_fignums()) != len(baseline_images):
                 raise ValueError('image_comparison: `baseline_images` should '
@@ -378,6 +703,17 @@ def image_comparison(baseline_images, extensions=None, tol=0,
                         remove_ticks_and_titles(figure)
                     figure.savefig(actual_fname, **kwargs)
 
+        def test(self, extension):
+            ''' Common method to compare an image with extension. '''
+
+            if snapshot and _snapshot_only() and _has_snapshots(func):
+                raise unittest.SkipTest('Skip pixel comparison in snapshot mode.')
+
+            self.mark_extension(extension)
+
+            if extension in self.prepare_errors:
+                raise self.prepare_errors[extension]
+
             # Decide the extra tolerance.
             extra_tol = 0.5
 
@@ -385,6 +721,7 @@ def image_comparison(baseline_images, extensions=None, tol=0,
                 ''' Aggregate all ticklabels as a string. '''
                 return ''.join(str(tl) for tl in ticklabels)
 
+            figure = plt.figure(plt.get_fignums()[-1])
             for ax in figure.get_axes():
                 xticklabels = aggr_ticklabel(ax.get_xticklabels()
                                              + ax.get_xticklabels(minor=True))
@@ -403,7 +740,46 @@ def image_comparison(baseline_images, extensions=None, tol=0,
                                                             + yticklabels))
 
             # Compare images.
-            self.compare(baseline_images, save_suffix, extension, tol + extra_tol)
+            self.compare(extension, tol + extra_tol)
+
+        def test_snapshot(self):
+            ''' Compare geometry snapshots. '''
+            __tracebackhide__ = True  # pylint: disable=unused-variable
+
+            snapshot_dir = _snapshot_directory(func)
+            if not os.environ.get(_UPDATE_SNAPSHOTS_ENV) \
+                    and not _has_snapshots(func):
+                raise unittest.SkipTest(
+                    'No baseline snapshots for this matplotlib version in {}. '
+                    'Set {}=1 to create them.'
+                    .format(snapshot_dir, _UPDATE_SNAPSHOTS_ENV))
+
+            snapshots = self.__class__.snapshots
+            self.assertEqual(len(snapshots), len(baseline_images),
+                             'image_comparison: `baseline_images` should '
+                             'have the same length as the number of '
+                             'figures generated')
+            for baseline, actual in zip(baseline_images, snapshots):
+                fname = os.path.join(snapshot_dir, baseline + '.json')
+                if os.environ.get(_UPDATE_SNAPSHOTS_ENV):
+                    if not os.path.isdir(snapshot_dir):
+                        os.makedirs(snapshot_dir)
+                    with open(fname, 'w') as fh:  # pylint: disable=unspecified-encoding
+                        json.dump(actual, fh, sort_keys=True)
+                        fh.write('\n')
+                    continue
+                self.assertTrue(os.path.exists(fname),
+                                'Do not have baseline snapshot {}. Set {}=1 '
+                                'to create it.'
+                                .format(fname, _UPDATE_SNAPSHOTS_ENV))
+                with open(fname) as fh:  # pylint: disable=unspecified-encoding
+                    expected = json.load(fh)
+                err = compare_snapshots(expected, actual, rtol=snapshot_tol,
+                                        atol=snapshot_tol, path=baseline)
+                self.assertFalse(err, 'Snapshots are not close\n{}'.format(err))
+
+        if snapshot:
+            ImageComparisonTest.test_snapshot = test_snapshot
 
         # Dynamically add test methods for each image extension.
         for extension in extensions:
@@ -0,0 +1,139 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import io
+import unittest
+import numpy as np
+import matplotlib.figure
+from matplotlib.backends.backend_pdf import FigureCanvasPdf
+from matplotlib import pyplot as plt
+
+from easypyplot import areachart
+
+from . import image_comparison
+from . import mpl_testing_setup, mpl_testing_teardown
+
+def _data():
+    return [[1, 3, 2], [2, 4, 1], [3.5, 1.5, 2], [2, 2, 3]]
+
+
+@image_comparison(baseline_images=['areachart_base'])
+def test_areachart_base():
+    ''' area chart base. '''
+    fig = plt.figure()
+    ax = fig.gca()
+
+    areachart.draw(ax, _data())
+
+
+@image_comparison(baseline_images=['areachart_hatchs'])
+def test_areachart_hatchs():
+    ''' area chart hatchs. '''
+    fig = plt.figure()
+    ax = fig.gca()
+
+    areachart.draw(ax, _data(), hatchs=['/', 'x', '.'], hatchcolor='r')
+
+
+class TestAreachart(unittest.TestCase):
+    ''' Tests for areachart module. '''
+
+    def setUp(self):
+        self.origs = mpl_testing_setup()
+        self.fig = matplotlib.figure.Figure(figsize=(4, 3), dpi=100)
+        self.axes = self.fig.add_subplot(111)
+
+    def tearDown(self):
+        mpl_testing_teardown(self.origs)
+
+    def _polygons(self, hdl):
+        paths = hdl.get_paths()
+        self.assertEqual(len(paths), 1)
+        return paths[0].vertices
+
+    def test_draw(self):
+        ''' draw() stacks entries as single polygons. '''
+        data = [[1, 2, 3], [4, 5, 6]]
+        hdls = areachart.draw(self.axes, data, group_names=['a', 'b'],
+                              entry_names=['x', 'y', 'z'],
+                              colors=['#ff0000', '#00ff00', '#0000ff'])
+        self.assertEqual(len(hdls), 3)
+        tops = [[1, 4], [3, 9], [6, 15]]
+        bottoms = [[0, 0], [1, 4], [3, 9]]
+        for eid, hdl in enumerate(hdls):
+            verts = self._polygons(hdl)
+            self.assertAlmostEqual(verts[:, 1].max(), max(tops[eid]))
+            self.assertAlmostEqual(verts[:, 1].min(), min(bottoms[eid]))
+            for gid in range(2):
+                ys = verts[verts[:, 0] == gid, 1]
+                self.assertIn(tops[eid][gid], ys)
+                self.assertIn(bottoms[eid][gid], ys)
+        np.testing.assert_array_almost_equal(
+            hdls[2].get_facecolor()[0], [0, 0, 1, 1])
+        self.assertListEqual(
+            [t.get_text() for t in self.axes.get_legend().get_texts()],
+            ['x', 'y', 'z'])
+        self.assertListEqual([t.get_text() for t in self.axes.get_xticklabels()],
+                             ['a', 'b'])
+        self.assertTupleEqual(tuple(self.axes.get_xlim()), (0, 1))
+
+    def test_draw_exact_stack(self):
+        ''' draw() bottoms match the tops of the previous entries exactly. '''
+        data = np.random.RandomState(0).rand(1000, 5)
+        hdls = areachart.draw(self.axes, data)
+        tops = np.cumsum(data, axis=1)
+        for eid in range(1, len(hdls)):
+            verts = self._polygons(hdls[eid])
+            # The exact top of the previous entry is a vertex at each group.
+            for gid in range(0, 1000, 7):
+                ys = verts[verts[:, 0] == gid, 1]
+                self.assertIn(tops[gid, eid - 1], ys)
+
+    def test_draw_hatchs(self):
+        ''' draw() with hatchs. '''
+        data = [[1, 2], [4, 5], [2, 2]]
+        hdls = areachart.draw(self.axes, data, xticks=[1, 3, 4],
+                              hatchs=['//', None], hatchcolor='r')
+        # One extra hatch polygon for the first entry only.
+        self.assertEqual(len(self.axes.collections), 3)
+        hatch = [c for c in self.axes.collections if c not in hdls]
+        self.assertEqual(hatch[0].get_hatch(), '//')
+        self.assertTupleEqual(tuple(self.axes.get_xlim()), (1, 4))
+
+    def test_draw_size(self):
+        ''' draw() PDF size is linear in the number of groups. '''
+        def pdf_size(num_groups):
+            fig = matplotlib.figure.Figure(figsize=(4, 3))
+            FigureCanvasPdf(fig)
+            axes = fig.add_subplot(111)
+            data = np.random.RandomState(0).rand(num_groups, 4)
+            areachart.draw(axes, data)
+            buf = io.BytesIO()
+            fig.savefig(buf, format='pdf')
+            return len(buf.getvalue())
+        base = pdf_size(10)
+        self.assertLess(pdf_size(1010) - base, 1000 * 4 * 2 * 40)
+
+    def test_draw_invalid(self):
+        ''' draw() invalid arguments. '''
+        with self.assertRaisesRegex(ValueError, r'^\[areachart\] .*2-dim'):
+            areachart.draw(self.axes, [1, 2])
+        with self.assertRaisesRegex(ValueError, r'^\[areachart\] .*xticks'):
+            areachart.draw(self.axes, [[1, 2]], xticks=[0, 1])
+        with self.assertRaisesRegex(ValueError, r'^\[areachart\] .*hatchs'):
+            areachart.draw(self.axes, [[1, 2]], hatchs=['/'])
+        with self.assertRaisesRegex(ValueError, r'^\[areachart\] .*colors'):
+            areachart.draw(self.axes, [[1, 2]], colors=['r'])
+
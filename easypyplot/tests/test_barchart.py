@@ -42,7 +42,7 @@ def test_barchart_base():
 
 
 @image_comparison(baseline_images=['barchart_nparray'],
-                  remove_text=False)
+                  remove_text=False, snapshot=True)
 def test_barchart_nparray():
     ''' bar chart with data np.array. '''
     fig = plt.figure()
@@ -56,7 +56,7 @@ def test_barchart_nparray():
                    reason='Python 3.4 with 2.2 has legend box position issue.'
                   )
 @image_comparison(baseline_images=['barchart_hdls'],
-                  remove_text=False)
+                  remove_text=False, snapshot=True)
 def test_barchart_hdls():
     ''' bar chart handlers. '''
     fig = plt.figure()
@@ -68,7 +68,7 @@ def test_barchart_hdls():
 
 
 @image_comparison(baseline_images=['barchart_group_names'],
-                  remove_text=False)
+                  remove_text=False, snapshot=True)
 def test_barchart_group_names():
     ''' bar chart group names. '''
     fig = plt.figure()
@@ -82,7 +82,7 @@ def test_barchart_group_names():
                    reason='Python 3.4 with 2.2 has legend box position issue.'
                   )
 @image_comparison(baseline_images=['barchart_entry_names'],
-                  remove_text=False)
+                  remove_text=False, snapshot=True)
 def test_barchart_entry_names():
     ''' bar chart entry names. '''
     fig = plt.figure()
@@ -92,7 +92,7 @@ def test_barchart_entry_names():
 
 
 @image_comparison(baseline_images=['barchart_nobkdn'],
-                  remove_text=False)
+                  remove_text=False, snapshot=True)
 def test_barchart_nobkdn():
     ''' bar chart without breakdown. '''
     fig = plt.figure()
@@ -102,7 +102,7 @@ def test_barchart_nobkdn():
 
 
 @image_comparison(baseline_images=['barchart_width'],
-                  remove_text=False)
+                  remove_text=False, snapshot=True)
 def test_barchart_width():
     ''' bar chart width. '''
     fig = plt.figure()
@@ -112,7 +112,7 @@ def test_barchart_width():
 
 
 @image_comparison(baseline_images=['barchart_width_nobkdn'],
-                  remove_text=False)
+                  remove_text=False, snapshot=True)
 def test_barchart_width_nobkdn():
     ''' bar chart width without breakdown. '''
     fig = plt.figure()
@@ -122,7 +122,7 @@ def test_barchart_width_nobkdn():
 
 
 @image_comparison(baseline_images=['barchart_cbshrk'],
-                  remove_text=False)
+                  remove_text=False, snapshot=True)
 def test_barchart_cbshrk():
     ''' bar chart cluster_bar_shrink. '''
     fig = plt.figure()
@@ -132,7 +132,7 @@ def test_barchart_cbshrk():
 
 
 @image_comparison(baseline_images=['barchart_cbshrk_nobkdn'],
-                  remove_text=False)
+                  remove_text=False, snapshot=True)
 def test_barchart_cbshrk_nobkdn():
     ''' bar chart cluster_bar_shrink without breakdown. '''
     fig = plt.figure()
@@ -142,7 +142,7 @@ def test_barchart_cbshrk_nobkdn():
 
 
 @image_comparison(baseline_images=['barchart_xticks'],
-                  remove_text=False)
+                  remove_text=False, snapshot=True)
 def test_barchart_xticks():
     ''' bar chart xticks. '''
     fig = plt.figure()
@@ -152,7 +152,7 @@ def test_barchart_xticks():
 
 
 @image_comparison(baseline_images=['barchart_xticks_nobkdn'],
-                  remove_text=False)
+                  remove_text=False, snapshot=True)
 def test_barchart_xticks_nobkdn():
     ''' bar chart xticks without breakdown. '''
     fig = plt.figure()
@@ -161,7 +161,8 @@ def test_barchart_xticks_nobkdn():
     barchart.draw(ax, _data(), xticks=[0, 2, 3], breakdown=False)
 
 
-@image_comparison(baseline_images=['barchart_colors'])
+@image_comparison(baseline_images=['barchart_colors'],
+                  snapshot=True)
 def test_barchart_colors():
     ''' bar chart colors. '''
     fig = plt.figure()
@@ -170,7 +171,8 @@ def test_barchart_colors():
     barchart.draw(ax, _data(), colors=['r', 'b'])
 
 
-@image_comparison(baseline_images=['barchart_colors_nobkdn'])
+@image_comparison(baseline_images=['barchart_colors_nobkdn'],
+                  snapshot=True)
 def test_barchart_colors_nobkdn():
     ''' bar chart colors without breakdown. '''
     fig = plt.figure()
@@ -179,7 +181,8 @@ def test_barchart_colors_nobkdn():
     barchart.draw(ax, _data(), colors=['r', 'b'], breakdown=False)
 
 
-@image_comparison(baseline_images=['barchart_edgecolor'])
+@image_comparison(baseline_images=['barchart_edgecolor'],
+                  snapshot=True)
 def test_barchart_edgecolor():
     ''' bar chart edgecolor. '''
     fig = plt.figure()
@@ -188,7 +191,8 @@ def test_barchart_edgecolor():
     barchart.draw(ax, _data(), edgecolor='y')
 
 
-@image_comparison(baseline_images=['barchart_edgecolor_none'])
+@image_comparison(baseline_images=['barchart_edgecolor_none'],
+                  snapshot=True)
 def test_barchart_edgecolor_none():
     ''' bar chart edgecolor. '''
     fig = plt.figure()
@@ -197,7 +201,8 @@ def test_barchart_edgecolor_none():
     barchart.draw(ax, _data(), edgecolor=None)
 
 
-@image_comparison(baseline_images=['barchart_hatchs'])
+@image_comparison(baseline_images=['barchart_hatchs'],
+                  snapshot=True)
 def test_barchart_hatchs():
     ''' bar chart hatchs. '''
     fig = plt.figure()
@@ -206,7 +211,8 @@ def test_barchart_hatchs():
     barchart.draw(ax, _data(), hatchs=['/', '//'])
 
 
-@image_comparison(baseline_images=['barchart_linewidth'])
+@image_comparison(baseline_images=['barchart_linewidth'],
+                  snapshot=True)
 def test_barchart_linewidth():
     ''' bar chart linewidth. '''
     fig = plt.figure()
@@ -229,7 +235,7 @@ def test_barchart_hatchcolor():
                    reason='Python 3.4 with 2.2 has legend box position issue.'
                   )
 @image_comparison(baseline_images=['barchart_legend_opts'],
-                  remove_text=False)
+                  remove_text=False, snapshot=True)
 def test_barchart_legend_opts():
     ''' bar chart legend options. '''
     fig = plt.figure()
@@ -240,7 +246,7 @@ def test_barchart_legend_opts():
 
 
 @image_comparison(baseline_images=['barchart_yaxis_log'],
-                  remove_text=False)
+                  remove_text=False, snapshot=True)
 def test_barchart_yaxis_log():
     ''' bar chart yaxis log. '''
     fig = plt.figure()
@@ -250,7 +256,7 @@ def test_barchart_yaxis_log():
 
 
 @image_comparison(baseline_images=['barchart_xticklabelfontsize'],
-                  remove_text=False)
+                  remove_text=False, snapshot=True)
 def test_barchart_xtlfontsize():
     ''' bar chart xticklabel fontsize. '''
     fig = plt.figure()
@@ -261,7 +267,7 @@ def test_barchart_xtlfontsize():
 
 
 @image_comparison(baseline_images=['barchart_xticklabelfontsize_fontprop'],
-                  remove_text=False)
+                  remove_text=False, snapshot=True)
 def test_barchart_xtlfontsize_xtlfontprop():
     ''' bar chart xticklabel fontsize overwriting fontproperties. '''
     fig = plt.figure()
@@ -273,7 +279,7 @@ def test_barchart_xtlfontsize_xtlfontprop():
 
 
 @image_comparison(baseline_images=['barchart_xticklabelfontprop'],
-                  remove_text=False)
+                  remove_text=False, snapshot=True)
 def test_barchart_xtlfontprop():
     ''' bar chart xticklabel fontproperties. '''
     fig = plt.figure()
@@ -285,7 +291,7 @@ def test_barchart_xtlfontprop():
 
 
 @image_comparison(baseline_images=['barchart_xticklabelfontprop_italic'],
-                  remove_text=False)
+                  remove_text=False, snapshot=True)
 def test_barchart_xtlfontprop_italic():
     ''' bar chart xticklabel fontproperties, italic. '''
     fig = plt.figure()
@@ -324,7 +330,7 @@ def test_barchart_xtlfontprop_str_italic():
 
 
 @image_comparison(baseline_images=['barchart_xticklabelrotation'],
-                  remove_text=False)
+                  remove_text=False, snapshot=True)
 def test_barchart_xtlrotation():
     ''' bar chart xticklabelrotation. '''
     fig = plt.figure()
@@ -406,3 +412,125 @@ class TestBarchart(unittest.TestCase):
             barchart.draw(self.axes, _data(), group_names=['a', 'b', 'c'],
                           xticklabelfontproperties=10)
 
+
+    def test_annotate(self):
+        ''' Annotate values. '''
+        barchart.draw(self.axes, _data(), annotate=True)
+        texts = [t.get_text() for t in self.axes.texts]
+        self.assertListEqual(texts, ['1', '2', '3.5', '3', '4', '1.5'])
+
+    def test_annotate_fmt(self):
+        ''' Annotate values with format. '''
+        barchart.draw(self.axes, _data(), breakdown=False, annotate=True,
+                      annotatefmt=lambda v: '{:.1f}x'.format(v))
+        texts = [t.get_text() for t in self.axes.texts]
+        self.assertListEqual(texts, ['1.0x', '2.0x', '3.5x', '3.0x', '4.0x', '1.5x'])
+        for t in self.axes.texts:
+            self.assertEqual(t.get_va(), 'bottom')
+
+    def test_annotate_cull_not_fit(self):
+        ''' Annotate values skips labels not fitting in bars. '''
+        barchart.draw(self.axes, [[1, 1e-3, 1]], annotate=True)
+        texts = [t.get_text() for t in self.axes.texts]
+        self.assertListEqual(texts, ['1', '1'])
+
+    def test_annotate_cull_overlap(self):
+        ''' Annotate values skips overlapping labels. '''
+        barchart.draw(self.axes, [[1, 0.01], [2, 2]], annotate=True,
+                      annotateloc='top')
+        self.assertEqual(len(self.axes.texts), 3)
+
+    def test_invalid_annotateloc(self):
+        ''' Invalid annotateloc. '''
+        with self.assertRaisesRegex(ValueError, r'\[barchart\] .*annotateloc.*'):
+            barchart.draw(self.axes, _data(), annotate=True, annotateloc='left')
+
+    def test_clip(self):
+        ''' Clip outlier bars. '''
+        data = [[1, 2], [2, 1], [100, 200], [1.5, 1.5]]
+        hdls = barchart.draw(self.axes, data, clip=75)
+        tops = np.array([[r.get_y() + r.get_height() for r in h] for h in hdls])
+        np.testing.assert_allclose(tops.max(axis=0), [3, 3, 3, 3])
+        texts = [t.get_text() for t in self.axes.texts]
+        self.assertListEqual(texts, ['300'])
+
+    def test_clip_nobkdn(self):
+        ''' Clip outlier bars without breakdown. '''
+        data = [[1, 2], [2, 1], [100, 2], [1.5, 1.5]]
+        hdls = barchart.draw(self.axes, data, breakdown=False, clip=80,
+                             annotate=True)
+        heights = np.array([[r.get_height() for r in h] for h in hdls])
+        np.testing.assert_allclose(heights.max(), 2)
+        self.assertIn('100', [t.get_text() for t in self.axes.texts])
+
+    def test_clip_broken(self):
+        ''' Clip outlier bars with broken axes. '''
+        data = [[1, 2], [2, 1], [100, 200], [1.5, 1.5]]
+        barchart.draw(self.axes, data, clip=75, clipbroken=True,
+                      entry_names=['x', 'y'])
+        fig = self.axes.get_figure()
+        self.assertEqual(len(fig.get_axes()), 2)
+        upper_axes = fig.get_axes()[1]
+        self.assertLessEqual(self.axes.get_ylim()[1], upper_axes.get_ylim()[0])
+        self.assertGreaterEqual(upper_axes.get_ylim()[1], 300)
+        self.assertIsNotNone(upper_axes.get_legend())
+
+    def test_clip_broken_annotate(self):
+        ''' Annotate values with broken axes. '''
+        data = [[1, 2], [2, 1], [100, 200], [1.5, 1.5]]
+        barchart.draw(self.axes, data, breakdown=False, clip=75,
+                      clipbroken=True, annotate=True, annotateloc='top')
+        upper_axes = self.axes.get_figure().get_axes()[1]
+        lower_texts = [t.get_text() for t in self.axes.texts]
+        upper_texts = [t.get_text() for t in upper_axes.texts]
+        self.assertListEqual(sorted(upper_texts), ['100', '200'])
+        self.assertNotIn('100', lower_texts)
+        self.assertNotIn('200', lower_texts)
+        self.assertIn('1.5', lower_texts)
+        # All labels are inside the figure.
+        for axes in (self.axes, upper_axes):
+            for t in axes.texts:
+                ypos = axes.transLimits.transform(t.get_position())[1]
+                self.assertGreaterEqual(ypos, 0)
+                self.assertLessEqual(ypos, 1)
+
+    def test_clip_negative(self):
+        ''' Clip never shrinks bars below zero. '''
+        data = [[-1, -1], [-2, -3], [-50, -60]]
+        hdls = barchart.draw(self.axes, data, breakdown=False, clip=50)
+        heights = np.array([[r.get_height() for r in h] for h in hdls])
+        np.testing.assert_allclose(heights, np.array(data).T)
+        bottoms = np.array([[r.get_y() for r in h] for h in hdls])
+        np.testing.assert_allclose(bottoms, 0)
+        self.assertEqual(len(self.axes.texts), 0)
+        self.assertEqual(len(self.axes.collections), 0)
+
+    def test_clip_mixed(self):
+        ''' Clip only bars above a positive clipped top with mixed data. '''
+        data = [[-1, 2], [2, -3], [100, -5], [1.5, 1.5]]
+        hdls = barchart.draw(self.axes, data, breakdown=False, clip=80)
+        heights = np.array([[r.get_height() for r in h] for h in hdls])
+        bottoms = np.array([[r.get_y() for r in h] for h in hdls])
+        np.testing.assert_allclose(bottoms, 0)
+        np.testing.assert_allclose(heights, [[-1, 2, 2, 1.5],
+                                             [2, -3, -5, 1.5]])
+        self.assertListEqual([t.get_text() for t in self.axes.texts], ['100'])
+
+    def test_clip_marker_size(self):
+        ''' Clip break markers are sized in points below the clipped top. '''
+        data = [[1, 2], [2, 1], [1000, 2000], [1.5, 1.5]]
+        for log in (False, True):
+            fig = plt.figure()
+            axes = fig.gca()
+            barchart.draw(axes, data, clip=75, log=log)
+            band, = axes.collections
+            cliptop = axes.transData.transform([[0, 3]])[0, 1]
+            ys = band.get_transform().transform(band.get_paths()[0].vertices)
+            ys = (ys[:, 1] - cliptop) * 72. / fig.dpi
+            self.assertLess(ys.max(), 0)
+            self.assertGreater(ys.min(), -12)
+
+    def test_invalid_clip(self):
+        ''' Invalid clip. '''
+        with self.assertRaisesRegex(ValueError, r'\[barchart\] .*clip.*'):
+            barchart.draw(self.axes, _data(), clip=0)
@@ -0,0 +1,131 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import matplotlib
+
+import easypyplot.tests as harness
+
+class TestBaselineCache(unittest.TestCase):
+    ''' Tests for the cache of the converted baseline images. '''
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmpdir, 'cache')
+        self.orig_env = os.environ.get(harness._BASELINE_CACHE_ENV)
+        os.environ[harness._BASELINE_CACHE_ENV] = self.cache_dir
+        self.orig_versions = dict(harness._CONVERTER_VERSIONS)
+        harness._CONVERTER_VERSIONS['pdf'] = 'v1'
+        self.orig_convert = harness._convert
+        self.converted = []
+        harness._convert = self._fake_convert
+
+    def tearDown(self):
+        harness._convert = self.orig_convert
+        harness._CONVERTER_VERSIONS.clear()
+        harness._CONVERTER_VERSIONS.update(self.orig_versions)
+        if self.orig_env is None:
+            del os.environ[harness._BASELINE_CACHE_ENV]
+        else:
+            os.environ[harness._BASELINE_CACHE_ENV] = self.orig_env
+        shutil.rmtree(self.tmpdir)
+
+    def _fake_convert(self, fname, extension):
+        ''' Convert by copying the content, and record the conversion. '''
+        self.converted.append((fname, extension))
+        converted_fname = harness._converted_fname(fname)
+        shutil.copyfile(fname, converted_fname)
+        return converted_fname
+
+    def _baseline(self, content):
+        ''' Write a baseline image with the content. '''
+        fname = os.path.join(self.tmpdir, 'baseline-expected.pdf')
+        with open(fname, 'wb') as fh:
+            fh.write(content)
+        return fname
+
+    def _read(self, fname):
+        ''' Read the content of the file. '''
+        with open(fname, 'rb') as fh:
+            return fh.read()
+
+    def test_converter_version(self):
+        ''' Converter version includes matplotlib, and is memoized. '''
+        del harness._CONVERTER_VERSIONS['pdf']
+        ver = harness._converter_version('pdf')
+        self.assertTrue(ver.startswith(matplotlib.__version__ + '-'))
+        self.assertIs(harness._converter_version('pdf'), ver)
+        self.assertEqual(harness._converter_version('png'),
+                         matplotlib.__version__ + '-none')
+
+    def test_cache_dir(self):
+        ''' Cache directory from the environment variable. '''
+        self.assertEqual(harness._baseline_cache_dir(), self.cache_dir)
+        self.assertTrue(os.path.isdir(self.cache_dir))
+
+    def test_miss_hit(self):
+        ''' Convert on a miss, and reuse the cached result on a hit. '''
+        fname = self._baseline(b'baseline')
+        converted_fname = harness._convert_baseline(fname, 'pdf')
+        self.assertListEqual(self.converted, [(fname, 'pdf')])
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        os.remove(converted_fname)
+        self.assertEqual(harness._convert_baseline(fname, 'pdf'),
+                         converted_fname)
+        self.assertEqual(len(self.converted), 1)
+        self.assertEqual(self._read(converted_fname), b'baseline')
+        # Not older than the baseline, so matplotlib does not convert again.
+        self.assertGreaterEqual(os.stat(converted_fname).st_mtime,
+                                os.stat(fname).st_mtime)
+
+    def test_invalidate_content(self):
+        ''' Changed baseline content misses the cache. '''
+        fname = self._baseline(b'baseline')
+        harness._convert_baseline(fname, 'pdf')
+        fname = self._baseline(b'new baseline')
+        converted_fname = harness._convert_baseline(fname, 'pdf')
+        self.assertEqual(len(self.converted), 2)
+        self.assertEqual(self._read(converted_fname), b'new baseline')
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+    def test_invalidate_version(self):
+        ''' Changed converter version misses the cache. '''
+        fname = self._baseline(b'baseline')
+        harness._convert_baseline(fname, 'pdf')
+        harness._CONVERTER_VERSIONS['pdf'] = 'v2'
+        harness._convert_baseline(fname, 'pdf')
+        self.assertEqual(len(self.converted), 2)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+    def test_convert_images(self):
+        ''' Convert the images of different extensions together. '''
+        harness._CONVERTER_VERSIONS['svg'] = 'v1'
+        jobs = []
+        for extension in ['pdf', 'svg']:
+            fname = os.path.join(self.tmpdir, 'actual.' + extension)
+            with open(fname, 'wb') as fh:
+                fh.write(extension.encode('utf-8'))
+            jobs.append((fname, extension, False))
+        fname = self._baseline(b'baseline')
+        jobs.append((fname, 'pdf', True))
+        converted_fnames = harness._convert_images(jobs)
+        self.assertListEqual(converted_fnames,
+                             [harness._converted_fname(job[0]) for job in jobs])
+        self.assertEqual(len(self.converted), 3)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
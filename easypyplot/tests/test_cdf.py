@@ -0,0 +1,82 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import unittest
+import numpy as np
+import matplotlib.figure
+
+from easypyplot import cdf
+from easypyplot import distribution
+
+class TestCdf(unittest.TestCase):
+    ''' Tests for cdf module. '''
+
+    def setUp(self):
+        self.rng = np.random.RandomState(0)
+        self.fig = matplotlib.figure.Figure()
+        self.axes = self.fig.add_subplot(111)
+
+    def test_default_quantiles(self):
+        ''' default_quantiles(). '''
+        qs = cdf.default_quantiles(maxnines=4, num=100)
+        self.assertEqual(len(qs), 100)
+        self.assertTrue(np.all(np.diff(qs) > 0))
+        self.assertEqual(qs[0], 0)
+        self.assertAlmostEqual(qs[-1], 0.9999)
+        self.assertIn(0.5, qs)
+
+    def test_draw(self):
+        ''' draw() bounded vertices. '''
+        data = [self.rng.rand(100000), self.rng.rand(100000) * 2]
+        hdls = cdf.draw(self.axes, data, entry_names=['a', 'b'])
+        self.assertEqual(len(hdls), 2)
+        for hdl in hdls:
+            self.assertEqual(len(hdl.get_xdata()), len(cdf.default_quantiles()))
+        idx = np.argmin(np.abs(cdf.default_quantiles() - 0.25))
+        np.testing.assert_allclose(hdls[1].get_xdata()[idx], 2 * 0.25, atol=0.02)
+        self.assertTupleEqual(tuple(self.axes.get_ylim()), (0, 1))
+        self.assertListEqual([t.get_text() for t in self.axes.get_legend().get_texts()],
+                             ['a', 'b'])
+
+    def test_draw_sketch(self):
+        ''' draw() existing sketches are not rebuilt. '''
+        sketch = distribution.QuantileSketch().update(self.rng.rand(1000))
+        hdls = cdf.draw(self.axes, [sketch, [1, 2, 3]], quantiles=[0, 0.5, 1])
+        self.assertAlmostEqual(hdls[0].get_xdata()[1], sketch.quantile(0.5))
+        self.assertListEqual(list(hdls[1].get_xdata()), [1, 2, 3])
+
+    def test_draw_nines(self):
+        ''' draw() nines y axis. '''
+        hdls = cdf.draw(self.axes, [self.rng.exponential(size=10000)],
+                        nines=True, logx=True,
+                        quantiles=cdf.default_quantiles(maxnines=3))
+        self.assertAlmostEqual(hdls[0].get_ydata()[-1], 3)
+        self.assertTupleEqual(tuple(self.axes.get_ylim()), (0, 3))
+        self.assertEqual(self.axes.get_xscale(), 'log')
+        formatter = self.axes.yaxis.get_major_formatter()
+        self.assertListEqual([formatter(t, i) for i, t in enumerate(range(4))],
+                             ['0%', '90%', '99%', '99.9%'])
+
+    def test_draw_invalid(self):
+        ''' draw() invalid arguments. '''
+        data = [[1, 2, 3]]
+        with self.assertRaisesRegex(ValueError, r'\[cdf\] .*entry names.*'):
+            cdf.draw(self.axes, data, entry_names=['a', 'b'])
+        with self.assertRaisesRegex(ValueError, r'\[cdf\] .*colors.*'):
+            cdf.draw(self.axes, data * 2, colors=['r'])
+        with self.assertRaisesRegex(ValueError, r'\[cdf\] .*linestyles.*'):
+            cdf.draw(self.axes, data, linestyles=['-', ':'])
+        with self.assertRaisesRegex(ValueError, r'\[cdf\] .*quantiles.*'):
+            cdf.draw(self.axes, data, quantiles=[0.5, 1], nines=True)
@@ -0,0 +1,151 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import matplotlib.figure
+
+from easypyplot import distribution
+
+class TestQuantileSketch(unittest.TestCase):
+    ''' Tests for distribution.QuantileSketch. '''
+
+    def setUp(self):
+        self.rng = np.random.RandomState(0)
+
+    def test_quantile(self):
+        ''' quantile() accuracy. '''
+        samples = self.rng.lognormal(size=200000)
+        sketch = distribution.QuantileSketch().update(samples)
+        qs = np.array([0.001, 0.01, 0.25, 0.5, 0.75, 0.99, 0.999])
+        np.testing.assert_allclose(sketch.quantile(qs),
+                                   np.percentile(samples, qs * 100), rtol=0.03)
+        self.assertEqual(sketch.quantile(0), samples.min())
+        self.assertEqual(sketch.quantile(1), samples.max())
+        self.assertEqual(sketch.count, samples.size)
+        self.assertAlmostEqual(sketch.mean(), samples.mean())
+
+    def test_bounded(self):
+        ''' Bounded number of centroids. '''
+        sketch = distribution.QuantileSketch(compression=100)
+        for _ in range(10):
+            sketch.update(self.rng.randn(100000))
+        sketch.quantile(0.5)
+        self.assertLessEqual(len(sketch._means), 100)  # pylint: disable=protected-access
+
+    def test_cdf(self):
+        ''' cdf(). '''
+        samples = self.rng.rand(100000)
+        sketch = distribution.QuantileSketch().update(samples)
+        np.testing.assert_allclose(sketch.cdf([0.1, 0.5, 0.9]), [0.1, 0.5, 0.9],
+                                   atol=0.01)
+        self.assertEqual(sketch.cdf(-1), 0)
+        self.assertEqual(sketch.cdf(2), 1)
+
+    def test_nan_empty(self):
+        ''' NaN samples and empty sketch. '''
+        sketch = distribution.QuantileSketch()
+        self.assertTrue(np.isnan(sketch.quantile(0.5)))
+        self.assertTrue(np.isnan(sketch.mean()))
+        sketch.update([np.nan, 1, 2, np.nan, 3])
+        self.assertEqual(sketch.count, 3)
+        self.assertEqual(sketch.quantile(0.5), 2)
+
+    def test_merge(self):
+        ''' merge() of sketches from parallel workers. '''
+        samples = self.rng.exponential(size=300000)
+        parts = [distribution.QuantileSketch().update(part)
+                 for part in np.split(samples, 3)]
+        # Sketches are sent across processes.
+        parts = [pickle.loads(pickle.dumps(part)) for part in parts]
+        merged = parts[0].merge(parts[1]).merge(parts[2])
+        self.assertEqual(merged.count, samples.size)
+        self.assertEqual(merged.max, samples.max())
+        qs = np.array([0.01, 0.5, 0.99])
+        np.testing.assert_allclose(merged.quantile(qs),
+                                   np.percentile(samples, qs * 100), rtol=0.03)
+
+    def test_invalid(self):
+        ''' Invalid compression. '''
+        with self.assertRaisesRegex(ValueError, r'\[distribution\] .*compression.*'):
+            distribution.QuantileSketch(compression=0)
+
+
+class TestDistribution(unittest.TestCase):
+    ''' Tests for distribution module. '''
+
+    def setUp(self):
+        self.rng = np.random.RandomState(0)
+        self.fig = matplotlib.figure.Figure()
+        self.axes = self.fig.add_subplot(111)
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_sketch_groups(self):
+        ''' sketch_groups() of different sources. '''
+        fname = os.path.join(self.tmpdir, 'samples.bin')
+        mm = np.memmap(fname, dtype=np.float32, mode='w+', shape=(1000,))
+        mm[:] = np.arange(1000)
+        mm.flush()
+        del mm
+        mm = np.memmap(fname, dtype=np.float32, mode='r', shape=(1000,))
+
+        existing = distribution.QuantileSketch().update([1, 2])
+        sketches = distribution.sketch_groups(
+            [mm, iter(range(10)), (np.ones(5) * i for i in range(3)), existing])
+        self.assertListEqual([s.count for s in sketches], [1000, 10, 15, 2])
+        self.assertIs(sketches[3], existing)
+        self.assertEqual(sketches[0].max, 999)
+        self.assertEqual(sketches[1].quantile(1), 9)
+        del mm
+
+    def test_draw_box(self):
+        ''' draw() box glyphs. '''
+        data = [self.rng.randn(1000), self.rng.randn(1000) + 2]
+        hdls = distribution.draw(self.axes, data, group_names=['a', 'b'],
+                                 colors=['r', 'b'], whiskers=(0, 100))
+        self.assertEqual(len(hdls['boxes']), 2)
+        self.assertEqual(len(hdls['sketches']), 2)
+        # Whiskers at the min and max.
+        ys = hdls['whiskers'][1].get_ydata()
+        self.assertAlmostEqual(max(ys), data[0].max())
+        self.assertListEqual([t.get_text() for t in self.axes.get_xticklabels()],
+                             ['a', 'b'])
+
+    def test_draw_violin(self):
+        ''' draw() violin glyphs. '''
+        data = [self.rng.randn(1000), self.rng.randn(1000) + 2]
+        hdls = distribution.draw(self.axes, data, kind='violin')
+        self.assertEqual(len(hdls['bodies']), 2)
+
+    def test_draw_invalid(self):
+        ''' draw() invalid arguments. '''
+        data = [[1, 2, 3]]
+        with self.assertRaisesRegex(ValueError, r'\[distribution\] .*group names.*'):
+            distribution.draw(self.axes, data, group_names=['a', 'b'])
+        with self.assertRaisesRegex(ValueError, r'\[distribution\] .*kind.*'):
+            distribution.draw(self.axes, data, kind='bar')
+        with self.assertRaisesRegex(ValueError, r'\[distribution\] .*xticks.*'):
+            distribution.draw(self.axes, data, xticks=[0, 1])
+        with self.assertRaisesRegex(ValueError, r'\[distribution\] .*colors.*'):
+            distribution.draw(self.axes, data * 2, colors=['r'])
+        with self.assertRaisesRegex(ValueError, r'\[distribution\] .*whiskers.*'):
+            distribution.draw(self.axes, data, whiskers=(30, 70))
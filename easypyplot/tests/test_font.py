@@ -0,0 +1,65 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import unittest
+import matplotlib
+import matplotlib.font_manager
+
+from easypyplot import font
+
+class TestFont(unittest.TestCase):
+    ''' Tests for font module. '''
+
+    def setUp(self):
+        self.orig_settings = matplotlib.rcParams.copy()
+
+    def tearDown(self):
+        matplotlib.rcParams.update(self.orig_settings)
+
+    def test_font_properties(self):
+        ''' font_properties() of different specs. '''
+        fp = font.font_properties()
+        self.assertIsInstance(fp, matplotlib.font_manager.FontProperties)
+        self.assertEqual(fp, matplotlib.font_manager.FontProperties())
+
+        fp = font.font_properties('serif:italic')
+        self.assertEqual(fp.get_style(), 'italic')
+
+        fp = font.font_properties({'style': 'italic', 'size': 7})
+        self.assertEqual(fp.get_style(), 'italic')
+        self.assertEqual(fp.get_size(), 7)
+
+    def test_font_properties_copy(self):
+        ''' font_properties() copies a FontProperties instance. '''
+        orig = matplotlib.font_manager.FontProperties(size=5)
+        fp = font.font_properties(orig)
+        self.assertIsNot(fp, orig)
+        self.assertEqual(fp, orig)
+        fp.set_size(20)
+        self.assertEqual(orig.get_size(), 5)
+
+    def test_font_properties_rc(self):
+        ''' font_properties() follows rcParams. '''
+        matplotlib.rcParams['font.size'] = 7
+        self.assertEqual(font.font_properties().get_size(), 7)
+        matplotlib.rcParams['font.size'] = 11
+        self.assertEqual(font.font_properties().get_size(), 11)
+
+    def test_font_properties_invalid(self):
+        ''' font_properties() invalid spec. '''
+        with self.assertRaisesRegex(TypeError, r'\[font\] .*spec.*'):
+            font.font_properties(10)
+        with self.assertRaisesRegex(TypeError, r'\[font\] .*spec.*'):
+            font.font_properties({'color': 'r'})
@@ -13,9 +13,18 @@ You should have received a copy of the Modified BSD-3 License along with this
 program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
 """
 
+from io import BytesIO
+from multiprocessing.pool import ThreadPool
+import locale
+import os
+import pickle
+import shutil
+import tempfile
 import unittest
 import numpy as np
 import matplotlib
+import matplotlib.figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib import pyplot as plt
 
 from easypyplot import format as fmt  # avoid conflict with built-in.
@@ -280,6 +289,36 @@ class TestFormat(unittest.TestCase):
         self.assertAlmostEqual(figsize[0], 3.4722, places=4)
         self.assertAlmostEqual(figsize[1] / figsize[0], 0.618, places=3)
 
+    def test_get_fig_dims_aspect(self):
+        ''' get_fig_dims() with aspect. '''
+        figsize = fmt.get_fig_dims(144, aspect=0.5)
+        self.assertListEqual(figsize, [2, 1])
+
+    def test_get_fig_preset(self):
+        ''' get_fig_preset(). '''
+        figsize, dpi = fmt.get_fig_preset('single')
+        self.assertListEqual(figsize, fmt.get_fig_dims(241))
+        self.assertEqual(dpi, 300)
+
+        figsize, dpi = fmt.get_fig_preset('slide', dpi=100)
+        self.assertAlmostEqual(figsize[1] / figsize[0], 9. / 16)
+        self.assertEqual(dpi, 100)
+
+        self.assertTupleEqual(fmt.get_fig_preset((3, 2)), ((3, 2), None))
+
+        with self.assertRaisesRegex(ValueError, r'\[format\] .*preset.*'):
+            fmt.get_fig_preset('poster')
+
+    def test_register_fig_preset(self):
+        ''' register_fig_preset(). '''
+        fmt.register_fig_preset('test_poster', 1440, aspect=1, dpi=200)
+        try:
+            figsize, dpi = fmt.get_fig_preset('test_poster')
+            self.assertListEqual(figsize, [20, 20])
+            self.assertEqual(dpi, 200)
+        finally:
+            del fmt.FIG_PRESETS['test_poster']
+
     def test_paper_plot_invalid_font(self):
         ''' paper_plot invalid font. '''
         with self.assertRaisesRegex(ValueError, r'\[format\] .*font.*'):
@@ -294,3 +333,221 @@ class TestFormat(unittest.TestCase):
         with self.assertRaisesRegex(ValueError, r'\[format\] .*xvals.*'):
             fmt.set_group_xticklabels(ax, ['a', 'b'], [0, 1, 2], -1)
 
+    def test_resize_ax_box_auto(self):
+        ''' resize_ax_box auto ratios. '''
+        # pylint: disable=invalid-name
+        fig = matplotlib.figure.Figure(figsize=(4, 3))
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        ax.plot([0, 1], [0, 1], label='a long legend entry')
+        ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
+
+        box = ax.get_position()
+        wratio, hratio = fmt.resize_ax_box(ax, wratio='auto', hratio='auto')
+        self.assertLess(wratio, 1)
+        self.assertGreater(wratio, 0)
+        self.assertEqual(hratio, 1)
+        new_box = ax.get_position()
+        self.assertAlmostEqual(new_box.x0, box.x0)
+        self.assertAlmostEqual(new_box.width, box.width * wratio)
+
+        # Legend now fits in the figure.
+        renderer = fig.canvas.get_renderer()
+        extent = ax.get_legend().get_window_extent(renderer)
+        self.assertLessEqual(extent.x1, fig.bbox.x1)
+
+    def test_resize_ax_box_auto_fit(self):
+        ''' resize_ax_box auto ratios when already fit. '''
+        # pylint: disable=invalid-name
+        fig = matplotlib.figure.Figure()
+        ax = fig.add_subplot(111)
+        self.assertTupleEqual(fmt.resize_ax_box(ax, wratio='auto', hratio='auto'),
+                              (1, 1))
+
+    def test_percent_formatter(self):
+        ''' PercentFormatter. '''
+        formatter = fmt.PercentFormatter(precision=1)
+        self.assertEqual(formatter(0.123), r'$12.3\%$')
+        self.assertEqual(formatter(-0.5), r'$-50.0\%$')
+
+        formatter = fmt.PercentFormatter(mathtext=False)
+        self.assertEqual(formatter(0.25), '25%')
+        self.assertEqual(formatter(-0.25), u'\u221225%')
+        # Cached.
+        self.assertIn(0.25, formatter._cache)  # pylint: disable=protected-access
+        self.assertEqual(formatter(0.25), '25%')
+
+    def test_percent_formatter_set(self):
+        ''' PercentFormatter options changed after creation. '''
+        formatter = fmt.PercentFormatter(mathtext=False)
+        self.assertEqual(formatter(0.25), '25%')
+        formatter.precision = 2
+        self.assertEqual(formatter.precision, 2)
+        self.assertEqual(formatter(0.25), '25.00%')
+        formatter.mathtext = True
+        self.assertTrue(formatter.mathtext)
+        self.assertEqual(formatter(0.25), r'$25.00\%$')
+
+    def test_percent_formatter_pickle(self):
+        ''' PercentFormatter pickle. '''
+        fig = matplotlib.figure.Figure()
+        ax = fig.add_subplot(111)
+        fmt.set_axis_to_percent(ax.yaxis, precision=2, mathtext=False)
+        formatter = ax.yaxis.get_major_formatter()
+        self.assertIsInstance(formatter, fmt.PercentFormatter)
+        formatter(0.5)
+
+        formatter2 = pickle.loads(pickle.dumps(formatter))
+        self.assertEqual(formatter2.precision, 2)
+        self.assertFalse(formatter2.mathtext)
+        self.assertEqual(formatter2(0.5), '50.00%')
+
+    def test_set_group_xticklabels_array(self):
+        ''' set_group_xticklabels numpy array xvals. '''
+        # pylint: disable=invalid-name
+        fig = matplotlib.figure.Figure()
+        ax = fig.add_subplot(111)
+
+        fmt.set_group_xticklabels(ax, ['a', 'b', 'c'], np.arange(6), -1)
+        xs = [t.get_position()[0] for t in ax.texts]
+        self.assertListEqual(xs, [0.5, 2.5, 4.5])
+
+    def test_set_group_xticklabels_tiers(self):
+        ''' set_group_xticklabels hierarchical tiers. '''
+        # pylint: disable=invalid-name
+        fig = matplotlib.figure.Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+
+        fmt.set_group_xticklabels(ax, [['A', 'B'], ['a', 'b', 'c', 'd']],
+                                  range(8), -1)
+        self.assertEqual(len(ax.texts), 6)
+        inner = ax.texts[:4]
+        outer = ax.texts[4:]
+        self.assertListEqual([t.get_text() for t in inner], ['a', 'b', 'c', 'd'])
+        self.assertListEqual([t.get_text() for t in outer], ['A', 'B'])
+        self.assertListEqual([t.get_position()[0] for t in inner],
+                             [0.5, 2.5, 4.5, 6.5])
+        self.assertListEqual([t.get_position()[0] for t in outer], [1.5, 5.5])
+
+        # Outer tier is placed below the inner tier.
+        y_inner = inner[0].get_transform().transform((0, -1))[1]
+        y_outer = outer[0].get_transform().transform((0, -1))[1]
+        self.assertLess(y_outer, y_inner)
+
+    def test_set_group_xticklabels_tiers_invalid_xvals(self):
+        ''' set_group_xticklabels tiers invalid xvals. '''
+        # pylint: disable=invalid-name
+        fig = matplotlib.figure.Figure()
+        ax = fig.add_subplot(111)
+
+        with self.assertRaisesRegex(ValueError, r'\[format\] .*xvals.*'):
+            fmt.set_group_xticklabels(ax, [['A', 'B', 'C'], ['a', 'b']],
+                                      range(4), -1)
+        self.assertEqual(len(ax.texts), 0)
+
+
+    def test_paper_style(self):
+        ''' paper_style(). '''
+        orig = matplotlib.rcParams.copy()
+        rc = fmt.paper_style(fontsize=11)
+        self.assertEqual(rc['font.size'], 11)
+        self.assertEqual(rc['legend.fontsize'], 11)
+        self.assertEqual(rc['font.family'], 'serif')
+        self.assertDictEqual(dict(matplotlib.rcParams), dict(orig))
+
+    def test_paper_context(self):
+        ''' paper_context(). '''
+        orig = matplotlib.rcParams.copy()
+        orig_locale = locale.setlocale(locale.LC_ALL)
+        with fmt.paper_context(fontsize=13, font='default'):
+            self.assertEqual(matplotlib.rcParams['font.size'], 13)
+            self.assertEqual(matplotlib.rcParams['pdf.fonttype'], 42)
+        self.assertDictEqual(dict(matplotlib.rcParams), dict(orig))
+        self.assertEqual(locale.setlocale(locale.LC_ALL), orig_locale)
+
+    def test_paper_plot_once(self):
+        ''' paper_plot_once(). '''
+        orig = matplotlib.rcParams.copy()
+        try:
+            fmt.paper_plot(fontsize=10, font='default')
+            marker = os.path.join(matplotlib.get_cachedir(), 'paper_plot_once')
+            open(marker, 'w').close()  # pylint: disable=consider-using-with
+            # Same settings, not applied again.
+            matplotlib.rcParams['font.size'] = 5
+            fmt.paper_plot_once(fontsize=10, font='default')
+            self.assertEqual(matplotlib.rcParams['font.size'], 5)
+            self.assertTrue(os.path.exists(marker))
+            # Different settings.
+            fmt.paper_plot_once(fontsize=11, font='default')
+            self.assertEqual(matplotlib.rcParams['font.size'], 11)
+            self.assertFalse(os.path.exists(marker))
+        finally:
+            matplotlib.rcParams.update(orig)
+
+    def test_paper_context_threads(self):
+        ''' paper_context() used from a thread pool. '''
+        def render(fontsize):
+            ''' Render a figure in a thread. '''
+            with fmt.paper_context(fontsize=fontsize, font='default'):
+                fig = matplotlib.figure.Figure()
+                FigureCanvasAgg(fig)
+                ax = fig.add_subplot(111)
+                ax.plot([0, 1], [1, 0])
+                text = ax.text(0.5, 0.5, 'text {}'.format(fontsize))
+                fig.savefig(BytesIO(), format='png')
+                return text.get_fontsize()
+
+        fontsizes = [6, 7, 8, 9, 10, 11, 12, 13] * 4
+        pool = ThreadPool(4)
+        try:
+            results = pool.map(render, fontsizes)
+        finally:
+            pool.close()
+            pool.join()
+        self.assertListEqual(results, fontsizes)
+
+    def test_paper_style_version(self):
+        ''' paper_style() for different versions. '''
+        rc14 = fmt.paper_style(version=(1, 4))
+        self.assertIn('axes.color_cycle', rc14)
+        self.assertNotIn('axes.prop_cycle', rc14)
+        self.assertNotIn('legend.framealpha', rc14)
+        rc30 = fmt.paper_style(version=(3, 0))
+        self.assertIn('axes.prop_cycle', rc30)
+        self.assertIn('xtick.top', rc30)
+
+    def test_paper_style_file(self):
+        ''' paper_style_file(). '''
+        self.assertIsNone(fmt.paper_style_file((1, 3)))
+        self.assertTrue(fmt.paper_style_file((1, 4, 3)).endswith('paper-mpl1.4.mplstyle'))
+        self.assertTrue(fmt.paper_style_file((1, 5)).endswith('paper-mpl1.5.mplstyle'))
+        self.assertTrue(fmt.paper_style_file((2, 2)).endswith('paper-mpl2.0.mplstyle'))
+        self.assertTrue(fmt.paper_style_file((9, 0)).endswith('paper-mpl3.0.mplstyle'))
+        self.assertTrue(os.path.isfile(fmt.paper_style_file()))
+
+    def test_paper_style_file_up_to_date(self):
+        ''' Shipped style sheets are up to date. '''
+        tmpdir = tempfile.mkdtemp()
+        try:
+            for version in [(1, 4), (1, 5), (2, 0), (3, 0)]:
+                fname = os.path.join(tmpdir, 'paper.mplstyle')
+                fmt.write_paper_style(fname, version=version)
+                with open(fname) as fh1, open(fmt.paper_style_file(version)) as fh2:
+                    self.assertEqual(fh1.read(), fh2.read())
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_write_paper_style(self):
+        ''' write_paper_style() can be loaded back. '''
+        tmpdir = tempfile.mkdtemp()
+        try:
+            fname = os.path.join(tmpdir, 'paper.mplstyle')
+            fmt.write_paper_style(fname, fontsize=12, font=('monospace', 'DejaVu Sans Mono'))
+            sheet = matplotlib.rc_params_from_file(fname, use_default_template=False)
+        finally:
+            shutil.rmtree(tmpdir)
+        rc = fmt.paper_style(fontsize=12, font=('monospace', 'DejaVu Sans Mono'))
+        self.assertSetEqual(set(sheet.keys()), set(rc.keys()))
+        for key, val in rc.items():
+            self.assertEqual(sheet[key], matplotlib.rcParams.validate[key](val))
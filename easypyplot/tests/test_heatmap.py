@@ -0,0 +1,134 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import io
+import unittest
+import numpy as np
+import matplotlib.figure
+from matplotlib.backends.backend_pdf import FigureCanvasPdf
+from matplotlib import pyplot as plt
+
+from easypyplot import heatmap
+
+from . import image_comparison
+from . import mpl_testing_setup, mpl_testing_teardown
+
+@image_comparison(baseline_images=['heatmap_base'])
+def test_heatmap_base():
+    ''' heatmap base. '''
+    fig = plt.figure()
+    ax = fig.gca()
+
+    heatmap.draw(ax, np.arange(20).reshape(4, 5), colorbar=True)
+
+
+@image_comparison(baseline_images=['heatmap_downsample'])
+def test_heatmap_downsample():
+    ''' heatmap downsampled large matrix. '''
+    fig = plt.figure()
+    ax = fig.gca()
+
+    xs, ys = np.meshgrid(np.linspace(0, 4, 3000), np.linspace(0, 4, 2000))
+    heatmap.draw(ax, np.sin(xs) * np.cos(ys))
+
+
+class TestHeatmap(unittest.TestCase):
+    ''' Tests for heatmap module. '''
+
+    def setUp(self):
+        self.origs = mpl_testing_setup()
+        self.fig = matplotlib.figure.Figure(figsize=(4, 3), dpi=100)
+        self.axes = self.fig.add_subplot(111)
+
+    def tearDown(self):
+        mpl_testing_teardown(self.origs)
+
+    def test_draw(self):
+        ''' draw() small matrix. '''
+        data = [[1, 2, 3], [4, 5, 6]]
+        img = heatmap.draw(self.axes, data, group_names=['a', 'b'],
+                           entry_names=['x', 'y', 'z'])
+        self.assertListEqual(list(self.axes.images), [img])
+        np.testing.assert_array_equal(img.get_array(), np.array(data).T)
+        self.assertTupleEqual(tuple(img.get_extent()), (-0.5, 1.5, 2.5, -0.5))
+        self.assertListEqual([t.get_text() for t in self.axes.get_xticklabels()],
+                             ['a', 'b'])
+        self.assertListEqual([t.get_text() for t in self.axes.get_yticklabels()],
+                             ['x', 'y', 'z'])
+        self.assertEqual(img.norm.vmin, 1)
+        self.assertEqual(img.norm.vmax, 6)
+
+    def test_draw_downsample(self):
+        ''' draw() large matrix is downsampled to the axes resolution. '''
+        data = np.random.RandomState(0).rand(2000, 1000)
+        img = heatmap.draw(self.axes, data, vmin=0, vmax=1)
+        rows, cols = img.get_array().shape
+        self.assertLessEqual(cols, int(self.axes.bbox.width))
+        self.assertLessEqual(rows, int(self.axes.bbox.height))
+        # Still in cell coordinates.
+        self.assertTupleEqual(tuple(img.get_extent()),
+                              (-0.5, 1999.5, 999.5, -0.5))
+
+        img = heatmap.draw(self.axes, data, downsample=(100, 50))
+        self.assertTupleEqual(img.get_array().shape, (50, 100))
+
+        img = heatmap.draw(self.axes, data, downsample=False)
+        self.assertTupleEqual(img.get_array().shape, (1000, 2000))
+
+    def test_draw_pdf_single_image(self):
+        ''' draw() large matrix as a single image in PDF. '''
+        data = np.random.RandomState(0).rand(1000, 1000)
+        heatmap.draw(self.axes, data)
+        FigureCanvasPdf(self.fig)
+        buf = io.BytesIO()
+        self.fig.savefig(buf, format='pdf')
+        self.assertLess(len(buf.getvalue()), 500000)
+        self.assertEqual(buf.getvalue().count(b'/Subtype /Image'), 1)
+
+    def test_block_average(self):
+        ''' block_average(). '''
+        matrix = np.arange(20, dtype=float).reshape(4, 5)
+        matrix[0, 0] = np.nan
+        avg = heatmap.block_average(matrix, 2, 3)
+        self.assertTupleEqual(avg.shape, (2, 3))
+        self.assertAlmostEqual(avg[0, 0], np.mean([1, 5, 6]))
+        self.assertAlmostEqual(avg[1, 2], np.mean([14, 19]))
+        self.assertIs(heatmap.block_average(matrix, 4, 5), matrix)
+
+    def test_annotate(self):
+        ''' draw() annotates cells that fit. '''
+        heatmap.draw(self.axes, [[0.25, 0.5], [0.75, 1]], annotate=True,
+                     cmap='gray')
+        self.assertListEqual(sorted(t.get_text() for t in self.axes.texts),
+                             ['0.25', '0.5', '0.75', '1'])
+        colors = {t.get_text(): t.get_color() for t in self.axes.texts}
+        self.assertEqual(colors['0.25'], 'w')
+        self.assertEqual(colors['1'], 'k')
+
+    def test_annotate_small(self):
+        ''' draw() skips annotation of small cells. '''
+        heatmap.draw(self.axes, np.ones((100, 100)), annotate=True)
+        self.assertEqual(len(self.axes.texts), 0)
+
+    def test_draw_invalid(self):
+        ''' draw() invalid arguments. '''
+        with self.assertRaisesRegex(ValueError, r'\[heatmap\] .*2-dimension.*'):
+            heatmap.draw(self.axes, [1, 2, 3])
+        with self.assertRaisesRegex(ValueError, r'\[heatmap\] .*group names.*'):
+            heatmap.draw(self.axes, [[1, 2]], group_names=['a', 'b'])
+        with self.assertRaisesRegex(ValueError, r'\[heatmap\] .*entry names.*'):
+            heatmap.draw(self.axes, [[1, 2]], entry_names=['a'])
+        with self.assertRaisesRegex(ValueError, r'\[heatmap\] .*downsample.*'):
+            heatmap.draw(self.axes, [[1, 2]], downsample=3)
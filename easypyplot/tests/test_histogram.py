@@ -0,0 +1,133 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import matplotlib.figure
+
+from easypyplot import histogram
+
+class TestHistogram(unittest.TestCase):
+    ''' Tests for histogram module. '''
+
+    def setUp(self):
+        self.rng = np.random.RandomState(0)
+        self.tmpdir = tempfile.mkdtemp()
+        self.orig_chunk_size = histogram.BIN_CHUNK_SIZE
+
+    def tearDown(self):
+        histogram.BIN_CHUNK_SIZE = self.orig_chunk_size
+        shutil.rmtree(self.tmpdir)
+
+    def _memmap(self, data):
+        fname = os.path.join(self.tmpdir, 'samples.bin')
+        mm = np.memmap(fname, dtype=data.dtype, mode='w+', shape=data.shape)
+        mm[:] = data
+        mm.flush()
+        del mm
+        return np.memmap(fname, dtype=data.dtype, mode='r', shape=data.shape)
+
+    def test_histogram(self):
+        ''' histogram() same as np.histogram(). '''
+        data = self.rng.randn(100000)
+        hist = histogram.histogram(data, bins=50)
+        counts, edges = np.histogram(data, bins=50)
+        np.testing.assert_array_equal(hist.counts, counts)
+        np.testing.assert_allclose(hist.edges, edges)
+        self.assertEqual(hist.total, data.size)
+
+    def test_histogram_log(self):
+        ''' histogram() log bins. '''
+        data = self.rng.lognormal(size=100000)
+        hist = histogram.histogram(data, bins=40, log=True)
+        self.assertTrue(hist.log)
+        self.assertAlmostEqual(hist.edges[0], data.min())
+        counts, _ = np.histogram(data, bins=hist.edges)
+        np.testing.assert_array_equal(hist.counts, counts)
+
+    def test_histogram_edges_weights(self):
+        ''' histogram() given non-uniform edges and weights. '''
+        data = self.rng.rand(10000)
+        weights = self.rng.rand(10000)
+        edges = [0, 0.1, 0.15, 0.5, 0.9, 1]
+        hist = histogram.histogram(data, bins=edges, weights=weights)
+        counts, _ = np.histogram(data, bins=edges, weights=weights)
+        np.testing.assert_allclose(hist.counts, counts)
+
+    def test_histogram_range(self):
+        ''' histogram() given range ignores out-of-range and NaN samples. '''
+        data = np.array([-1, 0, 0.5, 1, 2, np.nan, 1.5])
+        hist = histogram.histogram(data, bins=2, range=(0, 2))
+        np.testing.assert_array_equal(hist.counts, [2, 3])
+
+    def test_chunks_memmap(self):
+        ''' histogram() of memmap in chunks. '''
+        data = self.rng.randn(10000)
+        histogram.BIN_CHUNK_SIZE = 999
+        hist = histogram.histogram(self._memmap(data), bins=30)
+        counts, _ = np.histogram(data, bins=30)
+        np.testing.assert_array_equal(hist.counts, counts)
+
+    def test_processes(self):
+        ''' histogram() in a process pool. '''
+        data = self.rng.exponential(size=10000)
+        histogram.BIN_CHUNK_SIZE = 3000
+        counts, edges = np.histogram(data, bins=20)
+        hist = histogram.histogram(self._memmap(data), bins=20, processes=2)
+        np.testing.assert_array_equal(hist.counts, counts)
+        hist = histogram.histogram(data, bins=edges, processes=2,
+                                   weights=np.ones(10000))
+        np.testing.assert_array_equal(hist.counts, counts)
+
+    def test_merge_quantile(self):
+        ''' merge() and quantile(). '''
+        edges = histogram.histogram_edges(0, 1, bins=100)
+        hist1 = histogram.Histogram(edges).update(self.rng.rand(50000))
+        hist2 = histogram.Histogram(edges).update(self.rng.rand(50000))
+        hist1.merge(hist2)
+        self.assertEqual(hist1.total, 100000)
+        np.testing.assert_allclose(hist1.quantile([0.1, 0.5, 0.9]),
+                                   [0.1, 0.5, 0.9], atol=0.01)
+        self.assertTrue(np.isnan(histogram.Histogram(edges).quantile(0.5)))
+
+        with self.assertRaisesRegex(ValueError, r'\[histogram\] .*edges.*'):
+            hist1.merge(histogram.Histogram([0, 1]))
+
+    def test_invalid(self):
+        ''' Invalid arguments. '''
+        with self.assertRaisesRegex(ValueError, r'\[histogram\] .*edges.*'):
+            histogram.Histogram([0, 1, 1])
+        with self.assertRaisesRegex(ValueError, r'\[histogram\] .*positive.*'):
+            histogram.histogram_edges(0, 1, log=True)
+        with self.assertRaisesRegex(ValueError, r'\[histogram\] .*weights.*'):
+            histogram.histogram([1, 2], weights=[1])
+        with self.assertRaisesRegex(ValueError, r'\[histogram\] .*range.*'):
+            histogram.histogram(np.array([np.nan]))
+
+    def test_draw(self):
+        ''' draw(). '''
+        fig = matplotlib.figure.Figure()
+        ax = fig.add_subplot(111)
+        data = self.rng.lognormal(size=10000)
+        hist, hdl = histogram.draw(ax, data, bins=20, log=True, density=True)
+        self.assertEqual(len(hdl), 20)
+        self.assertEqual(ax.get_xscale(), 'log')
+        widths = [p.get_width() for p in hdl]
+        np.testing.assert_allclose(widths, np.diff(hist.edges))
+        heights = np.array([p.get_height() for p in hdl])
+        self.assertAlmostEqual(np.sum(heights * widths), 1)
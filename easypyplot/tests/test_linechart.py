@@ -0,0 +1,158 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import matplotlib.figure
+from matplotlib import pyplot as plt
+
+from easypyplot import linechart
+
+from . import image_comparison
+from . import mpl_testing_setup, mpl_testing_teardown
+
+def _data():
+    return np.cumsum(np.random.RandomState(0).randn(2, 100000), axis=1)
+
+
+@image_comparison(baseline_images=['linechart_base'])
+def test_linechart_base():
+    ''' line chart base. '''
+    fig = plt.figure()
+    ax = fig.gca()
+
+    linechart.draw(ax, [[1, 3, 2, 4], [4, 0, 5, 1]], xvals=[0, 1, 3, 4],
+                   linestyles=['-', '--'])
+
+
+@image_comparison(baseline_images=['linechart_decimate'])
+def test_linechart_decimate():
+    ''' line chart decimated long series. '''
+    fig = plt.figure()
+    ax = fig.gca()
+
+    linechart.draw(ax, _data())
+
+
+class TestLinechart(unittest.TestCase):
+    ''' Tests for linechart module. '''
+
+    def setUp(self):
+        self.origs = mpl_testing_setup()
+        self.fig = matplotlib.figure.Figure(figsize=(4, 3), dpi=100)
+        self.axes = self.fig.add_subplot(111)
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        mpl_testing_teardown(self.origs)
+
+    def test_draw(self):
+        ''' draw() small data without decimation. '''
+        data = [[1, 3, 2], [4, 0, 5]]
+        hdls = linechart.draw(self.axes, data, xvals=[0, 1, 3],
+                              entry_names=['a', 'b'], linestyles=['-', '--'])
+        self.assertEqual(len(hdls), 2)
+        self.assertListEqual(list(hdls[0].get_xdata()), [0, 1, 3])
+        self.assertListEqual(list(hdls[1].get_ydata()), [4, 0, 5])
+        self.assertEqual(hdls[1].get_linestyle(), '--')
+        legend = self.axes.get_legend()
+        self.assertListEqual([t.get_text() for t in legend.get_texts()],
+                             ['a', 'b'])
+
+    def test_draw_decimate(self):
+        ''' draw() decimates to the axes pixel width. '''
+        data = np.random.RandomState(0).randn(2, 100000)
+        data[0, 12345] = 100
+        hdls = linechart.draw(self.axes, data)
+        num_pixels = int(self.axes.bbox.width)
+        for hdl, series in zip(hdls, data):
+            self.assertLessEqual(len(hdl.get_xdata()), 2 * num_pixels + 2)
+            self.assertEqual(hdl.get_ydata().max(), series.max())
+            self.assertEqual(hdl.get_ydata().min(), series.min())
+
+        hdls = linechart.draw(self.axes, data, decimate=False)
+        self.assertEqual(len(hdls[0].get_xdata()), 100000)
+
+    def test_draw_log(self):
+        ''' draw() log scale. '''
+        linechart.draw(self.axes, [[1, 10, 100]], log=True)
+        self.assertEqual(self.axes.get_yscale(), 'log')
+
+    def test_draw_invalid(self):
+        ''' draw() invalid arguments. '''
+        with self.assertRaisesRegex(ValueError, r'\[linechart\] .*2-dimension.*'):
+            linechart.draw(self.axes, [1, 2, 3])
+        with self.assertRaisesRegex(ValueError, r'\[linechart\] .*xvals.*'):
+            linechart.draw(self.axes, [[1, 2, 3]], xvals=[0, 1])
+        with self.assertRaisesRegex(ValueError, r'\[linechart\] .*entry names.*'):
+            linechart.draw(self.axes, [[1, 2, 3]], entry_names=['a', 'b'])
+        with self.assertRaisesRegex(ValueError, r'\[linechart\] .*colors.*'):
+            linechart.draw(self.axes, [[1, 2, 3]] * 2, colors=['r'])
+        with self.assertRaisesRegex(ValueError, r'\[linechart\] .*linestyles.*'):
+            linechart.draw(self.axes, [[1, 2, 3]], linestyles=['-', ':'])
+        with self.assertRaisesRegex(ValueError, r'\[linechart\] .*decimate.*'):
+            linechart.draw(self.axes, [[1, 2, 3]], decimate=-1)
+
+    def test_min_max_decimate(self):
+        ''' min_max_decimate() keeps extremes in order. '''
+        xvals = np.arange(1000)
+        yvals = np.sin(xvals / 10.)
+        yvals[500] = 5
+        yvals[501] = -5
+        xs, ys = linechart.min_max_decimate(xvals, yvals, 10)
+        self.assertLessEqual(len(xs), 22)
+        self.assertTrue(np.all(np.diff(xs) > 0))
+        self.assertEqual(xs[0], 0)
+        self.assertEqual(xs[-1], 999)
+        self.assertIn(500, xs)
+        self.assertIn(501, xs)
+        np.testing.assert_array_equal(ys, yvals[xs])
+
+    def test_min_max_decimate_chunks(self):
+        ''' min_max_decimate() with small chunks is the same. '''
+        rng = np.random.RandomState(1)
+        xvals = np.sort(rng.rand(5000))
+        yvals = rng.randn(5000)
+        yvals[rng.randint(5000, size=100)] = np.nan
+        xs1, ys1 = linechart.min_max_decimate(xvals, yvals, 50)
+        xs2, ys2 = linechart.min_max_decimate(xvals, yvals, 50, chunk_size=7)
+        np.testing.assert_array_equal(xs1, xs2)
+        np.testing.assert_array_equal(ys1, ys2)
+
+    def test_min_max_decimate_short(self):
+        ''' min_max_decimate() returns short series as is. '''
+        xs, ys = linechart.min_max_decimate([0, 1, 2], [3, 4, 5], 10)
+        self.assertListEqual(list(xs), [0, 1, 2])
+        self.assertListEqual(list(ys), [3, 4, 5])
+
+    def test_memmap(self):
+        ''' draw() memmap data. '''
+        fname = os.path.join(self.tmpdir, 'data.bin')
+        data = np.memmap(fname, dtype=np.float32, mode='w+', shape=(2, 50000))
+        data[0] = np.linspace(0, 1, 50000)
+        data[1] = -data[0]
+        data.flush()
+        del data
+        data = np.memmap(fname, dtype=np.float32, mode='r', shape=(2, 50000))
+
+        hdls = linechart.draw(self.axes, data, decimate=100)
+        self.assertLessEqual(len(hdls[0].get_xdata()), 202)
+        self.assertAlmostEqual(hdls[0].get_ydata().max(), 1)
+        self.assertAlmostEqual(hdls[1].get_ydata().min(), -1)
+        del hdls, data
@@ -13,14 +13,23 @@ You should have received a copy of the Modified BSD-3 License along with this
 program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
 """
 
+import io
+import os
+import shutil
 import sys
+import tempfile
+import threading
+import unittest
+from matplotlib import pyplot as plt
 import pytest
 
+from easypyplot import format as fmt
 from easypyplot import pdf
 from easypyplot import util
 
 from . import sin_plot
 from . import image_comparison
+from . import mpl_testing_setup, mpl_testing_teardown
 
 @image_comparison(baseline_images=['pdf_base'], extensions=['pdf'],
                   saved_as=['pdf_base'])
@@ -98,3 +107,295 @@ def test_context():
                        font='default') as fig:
         sin_plot(fig.gca())
 
+
+
+class TestPdf(unittest.TestCase):
+    ''' Tests for pdf module. '''
+
+    def setUp(self):
+        self.origs = mpl_testing_setup()
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        mpl_testing_teardown(self.origs)
+
+    def test_standalone(self):
+        ''' Standalone figure not managed by pyplot. '''
+        fignums = plt.get_fignums()
+        name = os.path.join(self.tmpdir, 'pdf_standalone')
+        with pdf.plot_open(name, font='default', standalone=True) as fig:
+            self.assertListEqual(plt.get_fignums(), fignums)
+            sin_plot(fig.gca())
+        self.assertListEqual(plt.get_fignums(), fignums)
+        with open(name + '.pdf', 'rb') as fh:
+            self.assertTrue(fh.read().startswith(b'%PDF'))
+        # Cleared after teardown.
+        self.assertListEqual(fig.get_axes(), [])
+
+    def test_preset(self):
+        ''' Figure size preset. '''
+        pdfpage, fig = pdf.plot_setup(None, figsize='double', font='default',
+                                      standalone=True)
+        self.assertEqual(fig.dpi, 300)
+        self.assertAlmostEqual(fig.get_size_inches()[0], 505. / 72)
+        pdf.plot_teardown(pdfpage, fig)
+
+    def test_standalone_fresh(self):
+        ''' Standalone figure state not leaked to the next one. '''
+        name = os.path.join(self.tmpdir, 'pdf_standalone_fresh')
+        pdfpage, fig1 = pdf.plot_setup(name + '1', figsize=(4, 3),
+                                       font='default', standalone=True)
+        fig1.subplots_adjust(left=0.3)
+        fig1.patch.set_alpha(0.5)
+        sin_plot(fig1.gca())
+        pdf.plot_teardown(pdfpage, fig1)
+
+        pdfpage, fig2 = pdf.plot_setup(name + '2', figsize=(6, 2),
+                                       font='default', standalone=True)
+        try:
+            self.assertIsNot(fig2, fig1)
+            self.assertListEqual(list(fig2.get_size_inches()), [6, 2])
+            self.assertNotEqual(fig2.subplotpars.left, 0.3)
+            self.assertIsNone(fig2.patch.get_alpha())
+            sin_plot(fig2.gca())
+        finally:
+            pdf.plot_teardown(pdfpage, fig2)
+        self.assertTrue(os.path.exists(name + '2.pdf'))
+
+    def test_standalone_release_once(self):
+        ''' Standalone figure released only once. '''
+        pdfpage, fig = pdf.plot_setup(None, font='default', standalone=True)
+        pdf.plot_teardown(pdfpage, fig)
+        self.assertNotIn(fig, pdf._STANDALONE_FIGURES)
+        sin_plot(fig.gca())
+        # Not a standalone figure anymore, so not cleared again.
+        pdf._release_figure(fig)
+        self.assertEqual(len(fig.get_axes()), 1)
+
+    def test_fileobj(self):
+        ''' Write to file-like object. '''
+        buf = io.BytesIO()
+        with pdf.plot_open(buf, font='default') as fig:
+            sin_plot(fig.gca())
+        self.assertTrue(buf.getvalue().startswith(b'%PDF'))
+
+    def test_bytes(self):
+        ''' Write into memory and return bytes. '''
+        for standalone in [False, True]:
+            pdfpage, fig = pdf.plot_setup(None, font='default',
+                                          standalone=standalone)
+            sin_plot(fig.gca())
+            data = pdf.plot_teardown(pdfpage, fig)
+            self.assertTrue(data.startswith(b'%PDF'))
+            self.assertTrue(data.rstrip().endswith(b'%%EOF'))
+
+    def test_plot_bytes(self):
+        ''' Render a figure to bytes. '''
+        for standalone in [False, True]:
+            pdfpage, fig = pdf.plot_setup(io.BytesIO(), font='default',
+                                          standalone=standalone)
+            sin_plot(fig.gca())
+            data = pdf.plot_bytes(fig)
+            self.assertTrue(data.startswith(b'%PDF'))
+            self.assertTrue(data.rstrip().endswith(b'%%EOF'))
+            self.assertEqual(len(fig.get_axes()), 1)
+            pdf.plot_teardown(pdfpage, fig)
+
+    def test_open_none(self):
+        ''' Reject opening a context into memory. '''
+        with self.assertRaisesRegex(ValueError, r'\[pdf\] .*None.*'):
+            with pdf.plot_open(None, font='default'):
+                pass
+
+    def test_atomic(self):
+        ''' Write file atomically at teardown. '''
+        name = os.path.join(self.tmpdir, 'pdf_atomic')
+        pdfpage, fig = pdf.plot_setup(name, font='default')
+        sin_plot(fig.gca())
+        self.assertFalse(os.path.exists(name + '.pdf'))
+        pdf.plot_teardown(pdfpage, fig)
+        self.assertListEqual(os.listdir(self.tmpdir), ['pdf_atomic.pdf'])
+
+    def test_atomic_exception(self):
+        ''' No partial file left with exception. '''
+        name = os.path.join(self.tmpdir, 'pdf_atomic_exc')
+        with self.assertRaises(RuntimeError):
+            with pdf.plot_open(name, font='default') as fig:
+                sin_plot(fig.gca())
+                raise RuntimeError('interrupted')
+        self.assertListEqual(os.listdir(self.tmpdir), [])
+
+    def test_atomic_close_error(self):
+        ''' Error when closing the page leaves no file behind. '''
+        name = os.path.join(self.tmpdir, 'pdf_atomic_close')
+        pdfpage, fig = pdf.plot_setup(name, font='default', standalone=True)
+        sin_plot(fig.gca())
+        close = pdfpage.close
+        def _close():
+            close()
+            raise IOError('close')
+        pdfpage.close = _close
+        with self.assertRaisesRegex(IOError, 'close'):
+            pdf.plot_teardown(pdfpage, fig)
+        self.assertListEqual(os.listdir(self.tmpdir), [])
+        self.assertListEqual(fig.get_axes(), [])
+
+    def test_writebehind(self):
+        ''' Write file in the background. '''
+        names = [os.path.join(self.tmpdir, 'pdf_writebehind{}'.format(i))
+                 for i in range(3)]
+        for name in names:
+            with pdf.plot_open(name, font='default', standalone=True,
+                               writebehind=True) as fig:
+                sin_plot(fig.gca())
+        pdf.flush_writes()
+        self.assertListEqual(sorted(os.listdir(self.tmpdir)),
+                             [os.path.basename(n) + '.pdf' for n in names])
+        for name in names:
+            with open(name + '.pdf', 'rb') as fh:
+                self.assertTrue(fh.read().startswith(b'%PDF'))
+
+    def test_writebehind_error(self):
+        ''' Errors of background writes are raised at flush. '''
+        name = os.path.join(self.tmpdir, 'nonexist', 'pdf_writebehind_err')
+        with pdf.plot_open(name, font='default', writebehind=True) as fig:
+            sin_plot(fig.gca())
+        with self.assertRaises(EnvironmentError):
+            pdf.flush_writes()
+        # Errors are cleared.
+        pdf.flush_writes()
+
+
+@unittest.skipIf(sys.version_info < (3, 5), 'asyncio requires Python 3.5')
+class TestPdfAsync(unittest.TestCase):
+    ''' Tests for the asynchronous API of pdf module. '''
+
+    def setUp(self):
+        import asyncio
+        self.origs = mpl_testing_setup()
+        self.tmpdir = tempfile.mkdtemp()
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        import asyncio
+        pdf.set_async_max_workers(2)
+        self.loop.close()
+        asyncio.set_event_loop(None)
+        shutil.rmtree(self.tmpdir)
+        mpl_testing_teardown(self.origs)
+
+    def _check_pdf(self, name):
+        with open(name + '.pdf', 'rb') as fh:
+            self.assertTrue(fh.read().startswith(b'%PDF'))
+
+    def test_setup_teardown(self):
+        ''' Asynchronous setup and teardown. '''
+        name = os.path.join(self.tmpdir, 'pdf_async')
+        pdfpage, fig = self.loop.run_until_complete(pdf.plot_setup_async(
+            name, font='default', standalone=True))
+        sin_plot(fig.gca())
+        self.loop.run_until_complete(pdf.plot_teardown_async(pdfpage, fig))
+        self._check_pdf(name)
+
+    def test_setup_default_standalone(self):
+        ''' Asynchronous setup on the loop thread, with a standalone figure. '''
+        fignums = plt.get_fignums()
+        pdfpage, fig = self.loop.run_until_complete(pdf.plot_setup_async(
+            None, font='default'))
+        self.assertListEqual(plt.get_fignums(), fignums)
+        sin_plot(fig.gca())
+        data = self.loop.run_until_complete(
+            pdf.plot_teardown_async(pdfpage, fig))
+        self.assertTrue(data.startswith(b'%PDF'))
+
+    def test_teardown_lock(self):
+        ''' Asynchronous rendering holds the paper context lock. '''
+        # pylint: disable=protected-access
+        import asyncio
+        pdfpage, fig = self.loop.run_until_complete(pdf.plot_setup_async(
+            None, font='default'))
+        sin_plot(fig.gca())
+        with fmt._PAPER_CONTEXT_LOCK:
+            future = pdf.plot_teardown_async(pdfpage, fig)
+            self.loop.run_until_complete(asyncio.sleep(0.2))
+            self.assertFalse(future.done())
+        data = self.loop.run_until_complete(future)
+        self.assertTrue(data.startswith(b'%PDF'))
+
+    def test_setup_no_wait(self):
+        ''' Asynchronous setup with unchanged settings does not wait for the
+        paper context lock. '''
+        # pylint: disable=protected-access
+        pdfpage, fig = self.loop.run_until_complete(pdf.plot_setup_async(
+            None, font='default'))
+        pdf._plot_abort(pdfpage, fig)
+
+        locked = threading.Event()
+        release = threading.Event()
+        def _hold():
+            with fmt._PAPER_CONTEXT_LOCK:
+                locked.set()
+                release.wait()
+        holder = threading.Thread(target=_hold)
+        holder.start()
+        try:
+            locked.wait()
+            future = pdf.plot_setup_async(None, font='default')
+            self.assertTrue(future.done())
+            pdf._plot_abort(*future.result())
+        finally:
+            release.set()
+            holder.join()
+
+    def test_open(self):
+        ''' Asynchronous context. '''
+        name = os.path.join(self.tmpdir, 'pdf_async_open')
+        ctx = pdf.plot_open_async(name, font='default', standalone=True)
+        fig = self.loop.run_until_complete(ctx.__aenter__())
+        sin_plot(fig.gca())
+        self.loop.run_until_complete(ctx.__aexit__(None, None, None))
+        self._check_pdf(name)
+        self.assertListEqual(fig.get_axes(), [])
+
+    def test_open_exception(self):
+        ''' Asynchronous context with exception. '''
+        name = os.path.join(self.tmpdir, 'pdf_async_open_exc')
+        ctx = pdf.plot_open_async(name, font='default', standalone=True)
+        fig = self.loop.run_until_complete(ctx.__aenter__())
+        sin_plot(fig.gca())
+        self.loop.run_until_complete(ctx.__aexit__(ValueError, None, None))
+        # Not saved.
+        self.assertListEqual(fig.get_axes(), [])
+
+    def test_teardown_cancel(self):
+        ''' Cancel asynchronous teardown before rendering starts. '''
+        import asyncio
+        pdf.set_async_max_workers(1)
+        name = os.path.join(self.tmpdir, 'pdf_async_cancel')
+        pdfpage, fig = self.loop.run_until_complete(pdf.plot_setup_async(
+            name, font='default', standalone=True))
+        sin_plot(fig.gca())
+
+        # Block the only worker.
+        event = threading.Event()
+        pdf._async_executor().submit(event.wait)  # pylint: disable=protected-access
+        future = pdf.plot_teardown_async(pdfpage, fig)
+        future.cancel()
+        self.loop.run_until_complete(asyncio.sleep(0))
+        event.set()
+        pdf._async_executor().submit(lambda: None).result()  # pylint: disable=protected-access
+
+        self.assertTrue(future.cancelled())
+        self.assertListEqual(fig.get_axes(), [])
+
+    def test_open_none(self):
+        ''' Reject opening an asynchronous context into memory. '''
+        with self.assertRaisesRegex(ValueError, r'\[pdf\] .*None.*'):
+            pdf.plot_open_async(None, font='default')
+
+    def test_invalid_max_workers(self):
+        ''' Invalid max_workers. '''
+        with self.assertRaisesRegex(ValueError, r'\[pdf\] .*max_workers.*'):
+            pdf.set_async_max_workers(0)
@@ -0,0 +1,120 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import matplotlib
+from matplotlib import pyplot as plt
+
+from easypyplot import format as fmt
+from easypyplot import png
+
+from . import sin_plot
+from . import mpl_testing_setup, mpl_testing_teardown
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+class TestPng(unittest.TestCase):
+    ''' Tests for png module. '''
+
+    def setUp(self):
+        self.origs = mpl_testing_setup()
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        mpl_testing_teardown(self.origs)
+
+    def test_bytes(self):
+        ''' Render to bytes. '''
+        fig = png.plot_setup(figsize=(2, 1.5), font='default', dpi=50)
+        sin_plot(fig.gca())
+        data = png.plot_teardown(fig)
+        self.assertTrue(data.startswith(_PNG_SIGNATURE))
+
+    def test_fileobj(self):
+        ''' Render to file-like object. '''
+        buf = io.BytesIO()
+        with png.plot_open(buf, figsize=(2, 1.5), font='default') as fig:
+            sin_plot(fig.gca())
+        self.assertTrue(buf.getvalue().startswith(_PNG_SIGNATURE))
+
+    def test_preset(self):
+        ''' Figure size preset. '''
+        fig = png.plot_setup(figsize='thumbnail', font='default')
+        self.assertEqual(fig.dpi, 72)
+        self.assertAlmostEqual(fig.get_size_inches()[0], 2)
+        png.plot_teardown(fig)
+
+        fig = png.plot_setup(figsize='thumbnail', font='default', dpi=36)
+        self.assertEqual(fig.dpi, 36)
+        png.plot_teardown(fig)
+
+    def test_name_suffix(self):
+        ''' Render to file name with suffix appended. '''
+        name = os.path.join(self.tmpdir, 'png_name')
+        with png.plot_open(name, font='default') as fig:
+            sin_plot(fig.gca())
+        self.assertTrue(os.path.exists(name + '.png'))
+
+    def test_open_lock(self):
+        ''' plot_open() does not hold the paper_context() lock when drawing. '''
+        acquired = []
+        def _acquire():
+            if fmt._PAPER_CONTEXT_LOCK.acquire(False):  # pylint: disable=protected-access
+                acquired.append(True)
+                fmt._PAPER_CONTEXT_LOCK.release()  # pylint: disable=protected-access
+        with png.plot_open(io.BytesIO(), fontsize=13, font='default') as fig:
+            self.assertEqual(matplotlib.rcParams['font.size'], 13)
+            thread = threading.Thread(target=_acquire)
+            thread.start()
+            thread.join()
+            sin_plot(fig.gca())
+        self.assertListEqual(acquired, [True])
+
+    def test_setup_once(self):
+        ''' plot_setup() applies the same settings only once. '''
+        png.plot_teardown(png.plot_setup(fontsize=11, font='default'))
+        png.plot_teardown(png.plot_setup(fontsize=12, font='default'))
+        self.assertEqual(matplotlib.rcParams['font.size'], 12)
+        matplotlib.rcParams['font.size'] = 5
+        png.plot_teardown(png.plot_setup(fontsize=12, font='default'))
+        self.assertEqual(matplotlib.rcParams['font.size'], 5)
+
+    def test_no_pyplot(self):
+        ''' Not registered in pyplot. '''
+        fignums = plt.get_fignums()
+        fig = png.plot_setup(font='default')
+        png.plot_teardown(fig)
+        self.assertListEqual(plt.get_fignums(), fignums)
+
+    def test_reuse_canvas(self):
+        ''' Reuse canvas and renderer across figures of the same size. '''
+        # pylint: disable=protected-access
+        fig1 = png.plot_setup(figsize=(3, 2), font='default', dpi=60)
+        png.plot_teardown(fig1)
+        canvas = png._CANVAS_POOL[png._canvas_key(fig1)]
+        renderer = canvas.get_renderer()
+
+        fig2 = png.plot_setup(figsize=(3, 2), font='default', dpi=60)
+        sin_plot(fig2.gca())
+        self.assertTrue(png.plot_teardown(fig2).startswith(_PNG_SIGNATURE))
+        self.assertIs(png._CANVAS_POOL[png._canvas_key(fig2)], canvas)
+        self.assertIs(canvas.get_renderer(), renderer)
+        self.assertIsNot(fig2.canvas, canvas)
@@ -0,0 +1,132 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+import matplotlib.colors
+import matplotlib.figure
+from matplotlib import pyplot as plt
+
+from easypyplot import scatter
+
+from . import image_comparison
+from . import mpl_testing_setup, mpl_testing_teardown
+
+@image_comparison(baseline_images=['scatter_base'])
+def test_scatter_base():
+    ''' scatter density base, with sparse points. '''
+    fig = plt.figure()
+    ax = fig.gca()
+
+    rng = np.random.RandomState(0)
+    scatter.draw(ax, rng.randn(100000), rng.randn(100000), bins=(80, 60),
+                 sparse=2, markersize=4)
+
+
+class TestScatter(unittest.TestCase):
+    ''' Tests for scatter module. '''
+
+    def setUp(self):
+        self.origs = mpl_testing_setup()
+        self.fig = matplotlib.figure.Figure(figsize=(4, 3), dpi=100)
+        self.axes = self.fig.add_subplot(111)
+
+    def tearDown(self):
+        mpl_testing_teardown(self.origs)
+
+    def test_density_grid(self):
+        ''' density_grid() counts points. '''
+        xs = [0, 0.1, 0.6, 1, 1, np.nan, 2]
+        ys = [0, 0.2, 0.1, 1, 0.9, 0.5, 0.5]
+        grid = scatter.density_grid(xs, ys, (0, 1), (0, 1), 2, 2)
+        np.testing.assert_array_equal(grid, [[2, 1], [0, 2]])
+
+    def test_density_grid_histogram2d(self):
+        ''' density_grid() matches np.histogram2d. '''
+        rng = np.random.RandomState(0)
+        xs = rng.randn(10000)
+        ys = rng.randn(10000)
+        grid = scatter.density_grid(xs, ys, (-2, 2), (-3, 3), 40, 30)
+        expected, _, _ = np.histogram2d(xs, ys, bins=(40, 30),
+                                        range=((-2, 2), (-3, 3)))
+        np.testing.assert_array_equal(grid, expected.T)
+
+    def test_density_grid_chunked(self):
+        ''' density_grid() reads memmap chunk by chunk. '''
+        rng = np.random.RandomState(1)
+        xs = rng.rand(10000)
+        ys = rng.rand(10000)
+        fd, fname = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            mm = np.memmap(fname, dtype=np.float64, mode='w+', shape=(2, 10000))
+            mm[0] = xs
+            mm[1] = ys
+            mm.flush()
+            expected = scatter.density_grid(xs, ys, (0, 1), (0, 1), 16, 8)
+            orig = scatter.POINT_CHUNK_SIZE
+            scatter.POINT_CHUNK_SIZE = 999
+            try:
+                grid = scatter.density_grid(mm[0], mm[1], (0, 1), (0, 1),
+                                            16, 8)
+            finally:
+                scatter.POINT_CHUNK_SIZE = orig
+            np.testing.assert_array_equal(grid, expected)
+            del mm
+        finally:
+            os.remove(fname)
+
+    def test_draw(self):
+        ''' draw() pixel grid and sparse points. '''
+        rng = np.random.RandomState(2)
+        xs = np.concatenate([rng.randn(100000) * 0.1, [5]])
+        ys = np.concatenate([rng.randn(100000) * 0.1, [5]])
+        img, points = scatter.draw(self.axes, xs, ys)
+        self.assertListEqual(list(self.axes.images), [img])
+        rows, cols = img.get_array().shape
+        self.assertEqual(cols, int(self.axes.bbox.width))
+        self.assertEqual(rows, int(self.axes.bbox.height))
+        self.assertIsInstance(img.norm, matplotlib.colors.LogNorm)
+        self.assertEqual(img.get_array().sum() + len(points.get_offsets()),
+                         len(xs))
+        # The outlier is drawn as an individual point.
+        self.assertIn([5, 5], points.get_offsets().tolist())
+        self.assertTupleEqual(tuple(self.axes.get_xlim()),
+                              (xs.min(), xs.max()))
+
+    def test_draw_options(self):
+        ''' draw() with bins, ranges, and no sparse points. '''
+        xs = [0, 0.1, 0.6, 1, 1]
+        ys = [0, 0.2, 0.1, 1, 0.9]
+        img, points = scatter.draw(self.axes, xs, ys, xrange=(0, 1),
+                                   yrange=(0, 1), bins=(2, 2), logscale=False,
+                                   sparse=0, colorbar=True)
+        self.assertIsNone(points)
+        self.assertNotIsInstance(img.norm, matplotlib.colors.LogNorm)
+        np.testing.assert_array_equal(img.get_array().filled(0),
+                                      [[2, 1], [0, 2]])
+        self.assertEqual(len(self.fig.axes), 2)
+
+    def test_draw_invalid(self):
+        ''' draw() invalid arguments. '''
+        with self.assertRaisesRegex(ValueError, r'^\[scatter\] .*size'):
+            scatter.draw(self.axes, [0, 1], [0])
+        with self.assertRaisesRegex(ValueError, r'^\[scatter\] .*bins'):
+            scatter.draw(self.axes, [0, 1], [0, 1], bins=10)
+        with self.assertRaisesRegex(ValueError, r'^\[scatter\] .*range'):
+            scatter.draw(self.axes, [np.nan], [np.nan])
+
@@ -14,6 +14,7 @@ program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
 """
 
 import unittest
+import numpy as np
 import matplotlib
 
 from easypyplot import util
@@ -28,5 +29,36 @@ class TestUtil(unittest.TestCase):
         for v in vtpl:
             self.assertIsInstance(v, int)
         self.assertLessEqual(len(vtpl), 3)
-        self.assertEqual('.'.join(str(v) for v in vtpl), matplotlib.__version__)
+        self.assertTrue(matplotlib.__version__.startswith(
+            '.'.join(str(v) for v in vtpl)))
+        self.assertTupleEqual(vtpl, util.__mpl_version__)
 
+    def test_parse_version(self):
+        ''' Parse version strings. '''
+        self.assertTupleEqual(util.parse_version('3.4.2'), (3, 4, 2))
+        self.assertTupleEqual(util.parse_version('2.0'), (2, 0))
+        self.assertTupleEqual(util.parse_version('3.8.0rc1'), (3, 8, 0))
+        self.assertTupleEqual(util.parse_version('3.9.0.dev123+g1234567'),
+                              (3, 9, 0))
+        self.assertTupleEqual(util.parse_version('3.10.0.post1'), (3, 10, 0))
+        self.assertTupleEqual(util.parse_version('1!2.1.3'), (2, 1, 3))
+        with self.assertRaisesRegex(ValueError, r'\[util\] .*version.*'):
+            util.parse_version('unknown')
+
+    def test_mpl_supports(self):
+        ''' Feature flags. '''
+        self.assertEqual(util.mpl_supports('style'),
+                         util.__mpl_version__ >= (1, 4))
+        self.assertEqual(util.mpl_supports('legend.facecolor'),
+                         'legend.facecolor' in matplotlib.rcParams)
+        self.assertFalse(util.mpl_supports('no.such.feature'))
+        # Cached.
+        self.assertIn('no.such.feature', util._MPL_FEATURES)  # pylint: disable=protected-access
+
+    def test_data_range(self):
+        ''' Data range read block by block. '''
+        data = np.array([3, np.nan, -1, 5, np.nan, np.nan, 2])
+        for chunk_size in [1, 2, 100]:
+            self.assertTupleEqual(util.data_range(data, chunk_size), (-1, 5))
+        self.assertIsNone(util.data_range([np.nan, np.nan], 1))
+        self.assertIsNone(util.data_range([], 1))
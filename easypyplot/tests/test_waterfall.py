@@ -0,0 +1,119 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import unittest
+import numpy as np
+import matplotlib.colors
+import matplotlib.figure
+from matplotlib import pyplot as plt
+
+from easypyplot import waterfall
+
+from . import image_comparison
+from . import mpl_testing_setup, mpl_testing_teardown
+
+@image_comparison(baseline_images=['waterfall_base'])
+def test_waterfall_base():
+    ''' waterfall base. '''
+    fig = plt.figure()
+    ax = fig.gca()
+
+    waterfall.draw(ax, [10, -3, 5, -4, 2])
+
+
+@image_comparison(baseline_images=['waterfall_deltas'])
+def test_waterfall_deltas():
+    ''' waterfall only deltas without connectors. '''
+    fig = plt.figure()
+    ax = fig.gca()
+
+    waterfall.draw(ax, [3, -1, 2, -5], start=False, total=False,
+                   connectorcolor=None)
+
+
+class TestWaterfall(unittest.TestCase):
+    ''' Tests for waterfall module. '''
+
+    def setUp(self):
+        self.origs = mpl_testing_setup()
+        self.fig = matplotlib.figure.Figure(figsize=(4, 3), dpi=100)
+        self.axes = self.fig.add_subplot(111)
+
+    def tearDown(self):
+        mpl_testing_teardown(self.origs)
+
+    def test_draw(self):
+        ''' draw() floating bars, total, and connectors. '''
+        colors = ['#00ff00', '#ff0000', '#0000ff']
+        bars, connectors = waterfall.draw(
+            self.axes, [10, -3, 5], group_names=['base', 'a', 'b', 'final'],
+            kind_names=['inc', 'dec', 'abs'], colors=colors)
+        paths = bars.get_paths()
+        self.assertEqual(len(paths), 4)
+        spans = [(p.vertices[:, 1].min(), p.vertices[:, 1].max())
+                 for p in paths]
+        self.assertListEqual(spans, [(0, 10), (7, 10), (7, 12), (0, 12)])
+        np.testing.assert_array_almost_equal(
+            bars.get_facecolor()[:, :3],
+            [matplotlib.colors.ColorConverter().to_rgb(colors[k])
+             for k in (2, 1, 0, 2)])
+
+        segments = connectors.get_segments()
+        self.assertEqual(len(segments), 3)
+        np.testing.assert_array_almost_equal(
+            segments[0], [[0.4, 10], [0.6, 10]])
+        np.testing.assert_array_almost_equal(
+            segments[2], [[2.4, 12], [2.6, 12]])
+
+        self.assertListEqual([t.get_text() for t in self.axes.get_xticklabels()],
+                             ['base', 'a', 'b', 'final'])
+        self.assertListEqual(
+            [t.get_text() for t in self.axes.get_legend().get_texts()],
+            ['inc', 'dec', 'abs'])
+        self.assertGreaterEqual(self.axes.get_ylim()[1], 12)
+
+    def test_draw_options(self):
+        ''' draw() only deltas without connectors. '''
+        bars, connectors = waterfall.draw(self.axes, [-1, 2], start=False,
+                                          total=False, xticks=[2, 5],
+                                          connectorcolor=None)
+        self.assertIsNone(connectors)
+        paths = bars.get_paths()
+        self.assertEqual(len(paths), 2)
+        self.assertAlmostEqual(paths[0].vertices[:, 1].min(), -1)
+        self.assertAlmostEqual(paths[1].vertices[:, 1].max(), 1)
+        self.assertTupleEqual(tuple(self.axes.get_xlim()), (1, 6))
+
+    def test_draw_many(self):
+        ''' draw() many steps as single collections. '''
+        data = np.random.RandomState(0).randn(5000)
+        bars, connectors = waterfall.draw(self.axes, data)
+        self.assertEqual(len(bars.get_paths()), 5001)
+        self.assertEqual(len(connectors.get_segments()), 5000)
+        self.assertListEqual(list(self.axes.collections), [bars, connectors])
+        ys = bars.get_paths()[-1].vertices[:, 1]
+        self.assertAlmostEqual(ys.min() + ys.max(), data.sum())
+
+    def test_draw_invalid(self):
+        ''' draw() invalid arguments. '''
+        with self.assertRaisesRegex(ValueError, r'^\[waterfall\] .*1-dim'):
+            waterfall.draw(self.axes, [[1, 2]])
+        with self.assertRaisesRegex(ValueError, r'^\[waterfall\] .*group'):
+            waterfall.draw(self.axes, [1, 2], group_names=['a', 'b'])
+        with self.assertRaisesRegex(ValueError, r'^\[waterfall\] .*kind'):
+            waterfall.draw(self.axes, [1, 2], kind_names=['a'])
+        with self.assertRaisesRegex(ValueError, r'^\[waterfall\] .*colors'):
+            waterfall.draw(self.axes, [1, 2], colors=['r'])
+
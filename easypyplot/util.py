@@ -13,11 +13,125 @@ You should have received a copy of the Modified BSD-3 License along with this
 program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
 """
 
+import re
+import numpy as np
 import matplotlib
 
+# The release segment of a PEP 440 version, with optional epoch, e.g., the
+# 3.8.0 in 3.8.0rc1 or 3.9.0.dev123+g1234567.
+_VERSION_RELEASE_RE = re.compile(r'^\s*v?(?:\d+!)?(\d+(?:\.\d+)*)')
+
+def parse_version(version):
+    """ Parse the release numbers of a version string into an int tuple, at
+    most three numbers. Pre-, post-, dev-release and local parts are ignored.
+
+    version: the version string.
+    """
+    match = _VERSION_RELEASE_RE.match(version)
+    if match is None:
+        raise ValueError('[util] parse_version: invalid version {}.'
+                         .format(version))
+    return tuple(int(x) for x in match.group(1).split('.')[:3])
+
+
+_MPL_VERSION_CACHE = {}
+
 def matplotlib_version_tuple():
     """ Get the matplotlib version as a 3-tuple. """
-    return tuple([int(x) for x in matplotlib.__version__.split('.')])
+    version = matplotlib.__version__
+    try:
+        return _MPL_VERSION_CACHE[version]
+    except KeyError:
+        vtpl = parse_version(version)
+        _MPL_VERSION_CACHE[version] = vtpl
+        return vtpl
 
 __mpl_version__ = matplotlib_version_tuple()
 
+
+# Probes of matplotlib features that are not rc parameters.
+_MPL_FEATURE_PROBES = {
+    'colors.to_rgb': lambda: __mpl_version__ >= (2, 0),  # Added from 2.0
+    'style': lambda: __mpl_version__ >= (1, 4),  # Added from 1.4
+}
+
+_MPL_FEATURES = {}
+
+def mpl_supports(feature):
+    """ Whether the current matplotlib supports the feature. The result is
+    computed once and cached.
+
+    feature: a feature name in _MPL_FEATURE_PROBES, e.g., 'style', or an rc
+    parameter name, e.g., 'legend.facecolor'.
+    """
+    try:
+        return _MPL_FEATURES[feature]
+    except KeyError:
+        pass
+    probe = _MPL_FEATURE_PROBES.get(feature)
+    if probe is not None:
+        supported = bool(probe())
+    else:
+        supported = feature in matplotlib.rcParams
+    _MPL_FEATURES[feature] = supported
+    return supported
+
+
+def get_renderer(figure):
+    """ Get a renderer for the figure, used to measure artists without drawing.
+
+    figure: the figure instance.
+    """
+    try:
+        return figure.canvas.get_renderer()
+    except AttributeError:
+        # Canvases other than Agg (e.g., PDF, or none) cannot provide a
+        # renderer before drawing; use a standalone Agg renderer instead.
+        from matplotlib.backends.backend_agg import RendererAgg
+        width, height = figure.bbox.size
+        return RendererAgg(int(width), int(height), figure.dpi)
+
+
+def text_extents(renderer, texts, fontproperties):
+    """ Measure the extents of texts in display units (pixels).
+
+    Each distinct text is only measured once.
+
+    renderer: the renderer instance, see get_renderer().
+    texts: a sequence of strings.
+    fontproperties: the FontProperties instance applied to all texts.
+
+    return: arrays of widths, heights, and descents, in the order of texts.
+    """
+    cache = {}
+    extents = np.zeros((len(texts), 3))
+    for idx, text in enumerate(texts):
+        try:
+            ext = cache[text]
+        except KeyError:
+            ext = renderer.get_text_width_height_descent(
+                text, fontproperties, ismath=False)
+            cache[text] = ext
+        extents[idx] = ext
+    return extents[:, 0], extents[:, 1], extents[:, 2]
+
+
+def data_range(data, chunk_size):
+    """ Get the min and max of the data, ignoring NaN, read block by block.
+
+    data: a 1-dimension array. Could be a np.memmap, which is only read block
+    by block.
+    chunk_size: the number of values loaded into memory at once.
+
+    return: the (min, max) tuple, or None if there is no valid value.
+    """
+    lo, hi = np.inf, -np.inf
+    for start in range(0, len(data), chunk_size):
+        block = np.asarray(data[start:start + chunk_size], dtype=np.float64)
+        if np.all(np.isnan(block)):
+            continue
+        lo = min(lo, np.nanmin(block))
+        hi = max(hi, np.nanmax(block))
+    if lo > hi:
+        return None
+    return lo, hi
@@ -0,0 +1,194 @@
+""" $lic$
+Copyright (c) 2016-2021, Mingyu Gao
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the Modified BSD-3 License as published by the Open Source
+Initiative.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the BSD-3 License for more details.
+
+You should have received a copy of the Modified BSD-3 License along with this
+program. If not, see <https://opensource.org/licenses/BSD-3-Clause>.
+"""
+
+import numpy as np
+import matplotlib.collections
+import matplotlib.patches
+
+from .color import COLOR_SET
+from . import font
+
+def draw(axes,
+         data, group_names=None, kind_names=None,
+         start=True, total=True,
+         xticks=None, width=0.8,
+         colors=None, edgecolor='k', linewidth=0.5,
+         connectorcolor='k', connectorstyle='--', connectorwidth=0.5,
+         legendloc='upper right', legendncol=1,
+         xticklabelfontsize=None, xticklabelrotation='horizontal',
+         xticklabelfontproperties=None):
+    """ A waterfall chart drawing wrapper, e.g., for the breakdown from a
+    baseline through the deltas of each step to the final result.
+
+    All bars are drawn as a single collection, and all connector lines as
+    another single collection, so thousands of steps are cheap to draw.
+
+    axes: the axes instance to be drawn on.
+
+    data: 1-dimension, the deltas of the steps in order. If start, the first
+        value is the absolute start value instead.
+    group_names: names of all bars, including the total bar if total.
+    kind_names: names of the increase, decrease, and start/total bars in the
+        legend. No legend if None.
+
+    start: if True, the first value is drawn as an absolute bar from zero.
+    total: if True, append an absolute bar of the final value.
+
+    xticks: the positions of the centers of bars on x axis. Default to be
+        range(num_bars).
+    width: the width of each bar.
+
+    colors: the colors in HEX format of the increase, decrease, and start/total
+        bars.
+    edgecolor: the color of the bar edges.
+    linewidth: the width of the bar edges.
+
+    connectorcolor: the color of the connector lines between adjacent bars.
+        None to disable.
+    connectorstyle: the line style of the connector lines.
+    connectorwidth: the width of the connector lines.
+
+    legendloc: the location of the legend.
+    legendncol: number of columns of the legend.
+
+    xticklabelfontsize: the fontsize of the xtick labels.
+    xticklabelrotation: the rotation control of the xtick labels.
+    xticklabelfontproperties: the FontManager instance applied to the xtick
+        labels, including font name, size, etc.. The xticklabelfontsize has a
+        higher priority over xticklabelfontproperties.
+
+    return: the collection of the bars, and the collection of the connector
+        lines (None if disabled).
+    """
+    # pylint: disable=too-many-branches,too-many-locals,too-many-statements
+
+    ############################################################################
+    # data contains num_steps steps
+    try:
+        data = np.array(data, dtype=np.float64)
+    except ValueError:
+        raise ValueError('[waterfall] data cannot be convert to an array. '
+                         'Dimension mismatch?\n{}'.format(data))
+    if data.ndim != 1 or data.size == 0:
+        raise ValueError('[waterfall] data must be non-empty 1-dimension')
+    num_steps = data.size
+    num_bars = num_steps + (1 if total else 0)
+
+    if group_names is not None and len(group_names) != num_bars:
+        raise ValueError('[waterfall] group names must have {} elements'
+                         .format(num_bars))
+
+    if kind_names is not None and len(kind_names) != 3:
+        raise ValueError('[waterfall] kind names must have 3 elements')
+
+    ############################################################################
+    # Parse and adjust plot parameters
+    if xticks is None:
+        xticks = np.arange(num_bars)
+    elif len(xticks) != num_bars:
+        raise ValueError('[waterfall] xticks size does not match data')
+    else:
+        xticks = np.array(xticks, dtype=np.float64)
+
+    if colors is None:
+        colors = [COLOR_SET[1], COLOR_SET[2], COLOR_SET[0]]
+    if len(colors) < 3:
+        raise ValueError('[waterfall] Not enough colors')
+
+    if edgecolor is None:
+        edgecolor = 'none'
+
+    ############################################################################
+    # Coordinates of bars
+
+    # The running level after each step, and each delta floats from the
+    # previous level.
+    levels = np.cumsum(data)
+    ybottoms = levels - data
+    heights = data
+    # 0 for increase, 1 for decrease, 2 for start/total.
+    kinds = np.where(data >= 0, 0, 1)
+    if start:
+        kinds[0] = 2
+    if total:
+        ybottoms = np.append(ybottoms, 0)
+        heights = np.append(heights, levels[-1])
+        kinds = np.append(kinds, 2)
+    ytops = ybottoms + heights
+    xlefts = xticks - width / 2.
+    xrights = xticks + width / 2.
+
+    ############################################################################
+    # Draw all bars and connectors as collections
+    # Vertices of shape (num_bars, 4, 2).
+    verts = np.dstack([
+        np.column_stack([xlefts, xlefts, xrights, xrights]),
+        np.column_stack([ybottoms, ytops, ytops, ybottoms]),
+    ])
+    bars = matplotlib.collections.PolyCollection(
+        verts, facecolors=[colors[k] for k in kinds], edgecolors=edgecolor,
+        linewidths=linewidth)
+    axes.add_collection(bars)
+
+    connectors = None
+    if connectorcolor is not None and num_bars > 1:
+        # Each connector goes from the top of the running level of a bar to
+        # the next bar. The level after the last step connects to the total.
+        clevels = levels[:num_bars - 1]
+        segments = np.dstack([
+            np.column_stack([xrights[:-1], xlefts[1:]]),
+            np.column_stack([clevels, clevels]),
+        ])
+        connectors = matplotlib.collections.LineCollection(
+            segments, colors=connectorcolor, linestyles=connectorstyle,
+            linewidths=connectorwidth)
+        axes.add_collection(connectors)
+
+    axes.autoscale_view()
+
+    ############################################################################
+    # Axes options
+
+    # Remove xticks
+    axes.xaxis.set_ticks_position('none')
+
+    if group_names is not None:
+        try:
+            xticklabelfontproperties = font.font_properties(
+                xticklabelfontproperties)
+        except TypeError:
+            raise TypeError('[waterfall] currently only support '
+                            'xticklabelfontproperties types of str, dict, '
+                            'and FontProperties.')
+
+        # xticklabelfontsize overwrites xticklabelfontproperties.
+        if xticklabelfontsize is not None:
+            xticklabelfontproperties.set_size(xticklabelfontsize)
+
+        axes.set_xticks(xticks)
+        axes.set_xticklabels(
+            group_names,
+            rotation=xticklabelrotation,
+            fontproperties=xticklabelfontproperties)
+
+    if kind_names is not None:
+        proxies = [matplotlib.patches.Patch(facecolor=c, edgecolor=edgecolor,
+                                            linewidth=linewidth)
+                   for c in colors[:3]]
+        axes.legend(proxies, kind_names, loc=legendloc, ncol=legendncol)
+
+    axes.set_xlim([xticks[0]-1, xticks[-1]+1])
+
+    return bars, connectors